@@ -0,0 +1,36 @@
+from rest_framework.authentication import BaseAuthentication, get_authorization_header
+from rest_framework.exceptions import AuthenticationFailed
+
+from . import tokens
+
+KEYWORD = 'Bearer'
+
+
+def bearer_token(request):
+    """The token from an ``Authorization: Bearer`` header, or None"""
+    auth = get_authorization_header(request).split()
+    if not auth or auth[0].lower() != KEYWORD.lower().encode():
+        return None
+    if len(auth) != 2:
+        raise AuthenticationFailed('Invalid token header.')
+    try:
+        return auth[1].decode()
+    except UnicodeError:
+        raise AuthenticationFailed('Invalid token header.')
+
+
+class BearerTokenAuthentication(BaseAuthentication):
+    """Access tokens from accounts.tokens; no session or user lookup when the
+    user is cached"""
+
+    def authenticate(self, request):
+        token = bearer_token(request)
+        if token is None:
+            return None
+        try:
+            return tokens.authenticate(token)
+        except tokens.InvalidToken as e:
+            raise AuthenticationFailed(str(e))
+
+    def authenticate_header(self, request):
+        return KEYWORD
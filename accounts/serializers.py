@@ -1,5 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate
+from . import tokens
 from .models import User
 
 
@@ -46,3 +47,14 @@ class LoginSerializer(serializers.Serializer):
             raise serializers.ValidationError('User account is disabled')
         data['user'] = user
         return data
+
+
+class RefreshSerializer(serializers.Serializer):
+    refresh = serializers.CharField(write_only=True)
+
+    def validate(self, data):
+        try:
+            data['user'], data['tokens'] = tokens.refresh_tokens(data['refresh'])
+        except tokens.InvalidToken as e:
+            raise serializers.ValidationError(str(e))
+        return data
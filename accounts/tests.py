@@ -1,3 +1,41 @@
+from unittest import mock
+
 from django.test import TestCase
 
-# Create your tests here.
+from . import tokens
+from .models import RevokedToken, User
+
+
+class RefreshTokenTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('owner', email='owner@example.com', password='pw')
+        self.pair = tokens.issue_tokens(self.user)
+
+    def tearDown(self):
+        tokens.revoked.clear()
+        tokens.users.clear()
+
+    def refresh(self, token):
+        return self.client.post('/api/auth/token/refresh/', {'refresh': token}, content_type='application/json')
+
+    def test_refresh_token_works_once_across_workers(self):
+        self.assertEqual(self.refresh(self.pair['refresh']).status_code, 200)
+        # What another worker, or this one after a restart, would have
+        tokens.revoked.clear()
+        tokens.users.clear()
+        self.assertEqual(self.refresh(self.pair['refresh']).status_code, 400)
+
+    def test_logout_with_expired_access_token_revokes_refresh(self):
+        with mock.patch.object(tokens, 'ACCESS_TOKEN_SECONDS', -1):
+            pair = tokens.issue_tokens(self.user)
+        response = self.client.post(
+            '/api/auth/logout/', {'refresh': pair['refresh']},
+            content_type='application/json', HTTP_AUTHORIZATION=f"Bearer {pair['access']}",
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(pair['refresh']).status_code, 400)
+
+    def test_expired_entries_are_pruned(self):
+        RevokedToken.objects.create(jti='stale', expires_at='2000-01-01T00:00:00Z')
+        self.refresh(self.pair['refresh'])
+        self.assertFalse(RevokedToken.objects.filter(jti='stale').exists())
@@ -0,0 +1,231 @@
+"""
+Signed, expiring bearer tokens.
+
+Logging in hands out an access token and a refresh token. Both are a small
+JSON payload signed with ``SECRET_KEY`` by ``django.core.signing``, under
+different salts so neither passes for the other. Checking an access token
+is an HMAC and an expiry comparison; there is no session row to read.
+
+Access tokens carry the user id and last ``ACCESS_TOKEN_SECONDS``. Refresh
+tokens last ``REFRESH_TOKEN_SECONDS`` and are traded once, at
+``/api/auth/token/refresh/``, for a new pair. That exchange reads the user
+row, so deactivating a user or changing their password (which changes
+``get_session_auth_hash()``) ends it.
+
+A refresh token is used up by inserting its id into ``RevokedToken``, both
+when it is traded and at logout. The insert is what decides a race, and
+the table is shared by every worker and survives restarts, so a refresh
+token works exactly once. Rows go once the token would have expired anyway.
+
+Logout also adds the access token's id to ``revoked``, kept in memory. That
+list is per process: another worker keeps accepting a revoked access token
+until it expires, which the short access lifetime bounds.
+
+``users`` keeps recently authenticated users per process for
+``TOKEN_USER_CACHE_SECONDS``, so most token requests read no database at
+all. Saving or deleting a user drops its entry in the process that did it;
+other processes see the change once their entry expires.
+"""
+import copy
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.db import IntegrityError, transaction
+from django.utils.crypto import constant_time_compare
+
+from .models import RevokedToken
+
+ACCESS_TOKEN_SECONDS = getattr(settings, 'ACCESS_TOKEN_SECONDS', 15 * 60)
+REFRESH_TOKEN_SECONDS = getattr(settings, 'REFRESH_TOKEN_SECONDS', 14 * 24 * 60 * 60)
+
+_access_signer = signing.Signer(salt='accounts.tokens.access')
+_refresh_signer = signing.Signer(salt='accounts.tokens.refresh')
+
+
+class InvalidToken(Exception):
+    pass
+
+
+class RevocationList:
+    """Token ids revoked in this process, each kept until its token expires"""
+
+    PRUNE_SECONDS = 60
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.expires = {}
+        self.next_prune = 0
+
+    def add(self, claims):
+        """Revoke a token; False if it already was"""
+        now = time.time()
+        with self.lock:
+            if claims['jti'] in self.expires:
+                return False
+            self.expires[claims['jti']] = claims['exp']
+            if now >= self.next_prune:
+                self.expires = {jti: exp for jti, exp in self.expires.items() if exp > now}
+                self.next_prune = now + self.PRUNE_SECONDS
+            return True
+
+    def __contains__(self, jti):
+        return jti in self.expires
+
+    def clear(self):
+        with self.lock:
+            self.expires.clear()
+
+
+class UserCache:
+    """Recently authenticated users by id, least recently used dropped first.
+
+    Hands out copies, so a view that changes ``request.user`` never touches
+    another request's user.
+    """
+
+    def __init__(self, size, seconds):
+        self.size = size
+        self.seconds = seconds
+        self.lock = threading.Lock()
+        self.users = OrderedDict()
+
+    def get(self, user_id):
+        with self.lock:
+            entry = self.users.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self.users[user_id]
+                return None
+            self.users.move_to_end(user_id)
+            return copy.copy(entry[1])
+
+    def put(self, user):
+        if not self.size:
+            return
+        with self.lock:
+            self.users[user.pk] = (time.monotonic() + self.seconds, copy.copy(user))
+            self.users.move_to_end(user.pk)
+            while len(self.users) > self.size:
+                self.users.popitem(last=False)
+
+    def discard(self, user_id):
+        with self.lock:
+            self.users.pop(user_id, None)
+
+    def clear(self):
+        with self.lock:
+            self.users.clear()
+
+
+revoked = RevocationList()
+users = UserCache(
+    getattr(settings, 'TOKEN_USER_CACHE_SIZE', 1000),
+    getattr(settings, 'TOKEN_USER_CACHE_SECONDS', 60),
+)
+
+
+def _claims(user, lifetime):
+    return {'uid': user.pk, 'jti': secrets.token_hex(8), 'exp': int(time.time()) + lifetime}
+
+
+def issue_tokens(user):
+    """A fresh access/refresh pair for ``user``"""
+    refresh = _claims(user, REFRESH_TOKEN_SECONDS)
+    refresh['auth'] = user.get_session_auth_hash()
+    return {
+        'access': _access_signer.sign_object(_claims(user, ACCESS_TOKEN_SECONDS)),
+        'refresh': _refresh_signer.sign_object(refresh),
+        'expires_in': ACCESS_TOKEN_SECONDS,
+    }
+
+
+def _verify(signer, token):
+    try:
+        claims = signer.unsign_object(token)
+    except signing.BadSignature:
+        raise InvalidToken('Invalid token.')
+    if claims['exp'] <= time.time():
+        raise InvalidToken('Token has expired.')
+    if claims['jti'] in revoked:
+        raise InvalidToken('Token has been revoked.')
+    return claims
+
+
+def verify_access(token):
+    """The claims of a valid access token; never touches the database"""
+    return _verify(_access_signer, token)
+
+
+def _active(user):
+    if user is None:
+        raise InvalidToken('User not found.')
+    if not user.is_active:
+        raise InvalidToken('User inactive or deleted.')
+    return user
+
+
+def authenticate(token):
+    """``(user, claims)`` for an access token, the user cached when possible"""
+    claims = verify_access(token)
+    user = users.get(claims['uid'])
+    if user is None:
+        user = get_user_model()._default_manager.filter(pk=claims['uid']).first()
+        if user is not None:
+            users.put(user)
+    return _active(user), claims
+
+
+async def aauthenticate(token):
+    """``authenticate`` for async views"""
+    claims = verify_access(token)
+    user = users.get(claims['uid'])
+    if user is None:
+        user = await get_user_model()._default_manager.filter(pk=claims['uid']).afirst()
+        if user is not None:
+            users.put(user)
+    return _active(user), claims
+
+
+def _use_refresh(claims):
+    """Record a refresh token as used; False if it already was"""
+    expires_at = datetime.fromtimestamp(claims['exp'], tz=timezone.utc)
+    RevokedToken.objects.filter(expires_at__lte=datetime.now(tz=timezone.utc)).delete()
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=claims['jti'], expires_at=expires_at)
+    except IntegrityError:
+        return False
+    return True
+
+
+def refresh_tokens(token):
+    """Trade a refresh token for ``(user, new tokens)``; it can't be used again"""
+    claims = _verify(_refresh_signer, token)
+    user = get_user_model()._default_manager.filter(pk=claims['uid'], is_active=True).first()
+    if user is None or not constant_time_compare(claims['auth'], user.get_session_auth_hash()):
+        raise InvalidToken('Invalid token.')
+    if not _use_refresh(claims):
+        raise InvalidToken('Token has been revoked.')
+    users.put(user)
+    return user, issue_tokens(user)
+
+
+def revoke(access=None, refresh=None):
+    """Revoke whichever of the two tokens are given and valid"""
+    if access:
+        try:
+            revoked.add(_verify(_access_signer, access))
+        except InvalidToken:
+            pass
+    if refresh:
+        try:
+            _use_refresh(_verify(_refresh_signer, refresh))
+        except InvalidToken:
+            pass
@@ -4,6 +4,7 @@ from . import views
 urlpatterns = [
     path('register/', views.RegisterView.as_view(), name='register'),
     path('login/', views.login_view, name='login'),
+    path('token/refresh/', views.refresh_token, name='refresh_token'),
     path('logout/', views.logout_view, name='logout'),
     path('me/', views.current_user, name='current_user'),
     path('profile/', views.update_profile, name='update_profile'),
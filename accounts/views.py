@@ -1,10 +1,13 @@
 from rest_framework import status, generics
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth import login, logout
+from . import tokens
+from .authentication import bearer_token
 from .models import User
-from .serializers import UserSerializer, UserRegistrationSerializer, LoginSerializer
+from .serializers import UserSerializer, UserRegistrationSerializer, LoginSerializer, RefreshSerializer
 
 
 class RegisterView(generics.CreateAPIView):
@@ -19,6 +22,7 @@ class RegisterView(generics.CreateAPIView):
         login(request, user)
         return Response({
             'user': UserSerializer(user).data,
+            **tokens.issue_tokens(user),
             'message': 'Registration successful'
         }, status=status.HTTP_201_CREATED)
 
@@ -32,13 +36,28 @@ def login_view(request):
     login(request, user)
     return Response({
         'user': UserSerializer(user).data,
+        **tokens.issue_tokens(user),
         'message': 'Login successful'
     })
 
 
 @api_view(['POST'])
-@permission_classes([IsAuthenticated])
+@authentication_classes([])
+@permission_classes([AllowAny])
+def refresh_token(request):
+    # No authentication: the access token sent along is usually the expired one
+    serializer = RefreshSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    return Response(serializer.validated_data['tokens'])
+
+
+@api_view(['POST'])
+@authentication_classes([SessionAuthentication])
+@permission_classes([AllowAny])
 def logout_view(request):
+    # Open to a client whose access token has expired, so it can still
+    # revoke its refresh token; sessions keep their CSRF check
+    tokens.revoke(access=bearer_token(request), refresh=request.data.get('refresh'))
     logout(request)
     return Response({'message': 'Logout successful'})
 
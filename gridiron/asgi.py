@@ -2,6 +2,8 @@
 ASGI config for gridiron project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Run it under an ASGI server (uvicorn, daphne) to serve the live score stream
+in ``leagues.live``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/6.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,6 +48,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'leagues.instrumentation.PerformanceMiddleware',
+    'leagues.routing.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -79,13 +82,64 @@ WSGI_APPLICATION = 'gridiron.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# SQLite runs in WAL mode so readers never wait for the writer, waits up to
+# 20 s for the write lock instead of failing with "database is locked", and
+# takes that lock when a transaction starts rather than on its first write.
+# Connections are kept for 10 minutes instead of being reopened per request.
+SQLITE_OPTIONS = {
+    'timeout': 20,
+    'transaction_mode': 'IMMEDIATE',
+    'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': SQLITE_OPTIONS,
+        'CONN_MAX_AGE': 600,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Optional read replica, e.g. a copy of db.sqlite3 kept in sync by
+# Litestream. Viewset reads go there (see leagues.routing). The test
+# settings always configure one.
+REPLICA_DATABASE = os.environ.get('GRIDIRON_REPLICA_DB')
+if REPLICA_DATABASE:
+    DATABASES['replica'] = {**DATABASES['default'], 'NAME': REPLICA_DATABASE}
+
+DATABASE_ROUTERS = ['leagues.routing.ReplicaRouter']
+
+# Seconds a client keeps reading from the primary after it writes
+REPLICA_PIN_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+# The 'api' cache holds rendered responses for the player and matchup
+# endpoints. Switch it to django.core.cache.backends.filebased.FileBasedCache
+# (LOCATION being a directory) to share it between worker processes.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'api': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'gridiron-api',
+        'OPTIONS': {'MAX_ENTRIES': 5000},
+    },
+}
+API_CACHE_ALIAS = 'api'
+
+# Share of requests profiled by leagues.instrumentation.PerformanceMiddleware
+# (Server-Timing header, per-view histograms for perf_report and /api/perf/),
+# and how often one statement may repeat in a request before it is logged as
+# a likely N+1
+PERF_SAMPLE_RATE = 0.01
+PERF_DUPLICATE_THRESHOLD = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -132,16 +186,29 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'accounts.User'
 
 # REST Framework settings
+# Bearer tokens come first, so a request carrying one never loads a session.
+# HTTP Basic is gone: it ran the password hasher on every request.
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
+        'accounts.authentication.BearerTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    # Keyset pagination by id; the hot lists set their own ordering and
+    # page size limits (leagues.pagination)
+    'DEFAULT_PAGINATION_CLASS': 'leagues.pagination.KeysetPagination',
+    'PAGE_SIZE': 100,
 }
 
+# Lifetimes of the tokens issued at login (accounts.tokens), and the
+# per-process cache of token users that spares most requests a user query
+ACCESS_TOKEN_SECONDS = 15 * 60
+REFRESH_TOKEN_SECONDS = 14 * 24 * 60 * 60
+TOKEN_USER_CACHE_SIZE = 1000
+TOKEN_USER_CACHE_SECONDS = 60
+
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
     'http://localhost:3000',
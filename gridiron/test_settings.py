@@ -0,0 +1,28 @@
+"""
+Settings for the test suite, which ``manage.py test`` uses by default.
+
+Test databases are files in a temporary directory: threaded tests (the
+concurrent joins) can't share the in-memory default across connections.
+A replica alias is always configured, as a file of its own, so the replica
+routing tests run and can tell which database a read went to.
+"""
+import tempfile
+from pathlib import Path
+
+from .settings import *  # noqa: F401,F403
+from .settings import DATABASES
+
+TEST_DATABASE_DIR = Path(tempfile.gettempdir()) / 'gridiron-tests'
+TEST_DATABASE_DIR.mkdir(exist_ok=True)
+
+DATABASES = {
+    'default': {
+        **DATABASES['default'],
+        'TEST': {'NAME': TEST_DATABASE_DIR / 'primary.sqlite3'},
+    },
+}
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': TEST_DATABASE_DIR / 'replica.sqlite3',
+    'TEST': {'NAME': TEST_DATABASE_DIR / 'replica.sqlite3'},
+}
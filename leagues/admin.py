@@ -1,5 +1,9 @@
 from django.contrib import admin
-from .models import League, NFLPlayer, FantasyTeam, Roster, Matchup
+from .membership import team_added, team_removed
+from .models import (
+    League, NFLPlayer, PlayerWeekStats, FantasyTeam, Roster, Matchup, PlayoffOdds,
+    WaiverClaim, Draft, DraftPick, ArchivedSeason
+)
 
 
 @admin.register(League)
@@ -8,6 +12,11 @@ class LeagueAdmin(admin.ModelAdmin):
     list_filter = ['league_type', 'scoring_type', 'is_public', 'is_active', 'season_year']
     search_fields = ['name', 'commissioner__username']
     ordering = ['-created_at']
+    readonly_fields = ['team_count', 'roster_version']
+
+    @admin.display(description='Teams', ordering='team_count')
+    def current_team_count(self, obj):
+        return obj.team_count
 
 
 @admin.register(NFLPlayer)
@@ -18,13 +27,30 @@ class NFLPlayerAdmin(admin.ModelAdmin):
     ordering = ['position', 'name']
 
 
+@admin.register(PlayerWeekStats)
+class PlayerWeekStatsAdmin(admin.ModelAdmin):
+    list_display = ['player', 'season_year', 'week', 'fantasy_points']
+    list_filter = ['season_year', 'week', 'player__position']
+    search_fields = ['player__name']
+    ordering = ['-season_year', '-week']
+
+
 @admin.register(FantasyTeam)
 class FantasyTeamAdmin(admin.ModelAdmin):
-    list_display = ['name', 'owner', 'league', 'wins', 'losses', 'ties', 'points_for']
+    list_display = ['name', 'owner', 'league', 'division', 'waiver_priority', 'wins', 'losses', 'ties', 'points_for']
     list_filter = ['league']
     search_fields = ['name', 'owner__username']
     ordering = ['-points_for']
 
+    def save_model(self, request, obj, form, change):
+        # The admin may overfill a league on purpose, so no capacity check
+        super().save_model(request, obj, form, change)
+        if not change:
+            team_added(obj.league_id)
+        elif 'league' in form.changed_data:
+            team_removed(form.initial['league'])
+            team_added(obj.league_id)
+
 
 @admin.register(Roster)
 class RosterAdmin(admin.ModelAdmin):
@@ -38,3 +64,41 @@ class MatchupAdmin(admin.ModelAdmin):
     list_display = ['league', 'week', 'home_team', 'away_team', 'home_score', 'away_score', 'is_complete']
     list_filter = ['league', 'week', 'is_complete']
     ordering = ['league', 'week']
+
+
+@admin.register(WaiverClaim)
+class WaiverClaimAdmin(admin.ModelAdmin):
+    list_display = ['fantasy_team', 'player', 'drop_player', 'rank', 'status', 'created_at', 'processed_at']
+    list_filter = ['status', 'league']
+    search_fields = ['player__name', 'fantasy_team__name']
+    ordering = ['-created_at']
+
+
+@admin.register(PlayoffOdds)
+class PlayoffOddsAdmin(admin.ModelAdmin):
+    list_display = ['fantasy_team', 'playoffs', 'championship', 'projected_wins', 'computed_at']
+    list_filter = ['fantasy_team__league']
+    ordering = ['-playoffs']
+
+
+@admin.register(Draft)
+class DraftAdmin(admin.ModelAdmin):
+    list_display = ['league', 'draft_type', 'status', 'rounds', 'current_pick', 'pick_deadline']
+    list_filter = ['draft_type', 'status']
+    search_fields = ['league__name']
+
+
+@admin.register(DraftPick)
+class DraftPickAdmin(admin.ModelAdmin):
+    list_display = ['draft', 'overall_pick', 'fantasy_team', 'player', 'is_autopick']
+    list_filter = ['is_autopick']
+    search_fields = ['player__name', 'fantasy_team__name']
+
+
+@admin.register(ArchivedSeason)
+class ArchivedSeasonAdmin(admin.ModelAdmin):
+    list_display = ['name', 'season_year', 'league_type', 'team_count', 'successor', 'archived_at']
+    list_filter = ['season_year', 'league_type']
+    search_fields = ['name']
+    exclude = ['document']
+    readonly_fields = ['league_id', 'season_year', 'name', 'league_type', 'commissioner', 'successor', 'team_count']
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class LeaguesConfig(AppConfig):
     name = 'leagues'
+
+    def ready(self):
+        from . import signals  # noqa: F401
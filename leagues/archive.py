@@ -0,0 +1,215 @@
+"""
+Season rollover and the read-only season archive.
+
+``rollover_season`` moves a finished season out of the live tables. Each
+league becomes one ``ArchivedSeason`` row: a few columns to list and filter
+by, plus a gzipped JSON document of its final standings, matchups and
+rosters. The league's teams, rosters, matchups, waiver claims, odds and
+draft are then deleted, so the live tables and their indexes only ever hold
+the current season.
+
+Every active league is renewed into the next season with the same settings
+and owners. Teams start over at 0-0. Dynasty and keeper leagues also keep
+their rosters. The new league's ``team_count`` is written with it, as bulk
+writers do (see ``leagues.membership``). An archive points at the live
+league that continues it, and each rollover moves those links forward, so
+``League.archived_seasons`` is a league's whole history.
+
+A league is finished once it has been scheduled and none of its matchups is
+left to play. Leagues are handled in chunks, each in one transaction with a
+fixed number of queries. The archived rows are deleted with raw DELETEs, so
+no per-row delete signals fire. The matchups cache is invalidated once per
+chunk instead.
+"""
+import gzip
+import json
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from .bulk import writer_lock
+from .caching import invalidate
+from .models import (
+    ArchivedSeason, Draft, DraftPick, FantasyTeam, League, Matchup, PlayoffOdds, Roster, WaiverClaim
+)
+
+CHUNK_SIZE = 200
+
+# League types whose rosters carry over into the next season
+CARRY_ROSTERS = {'dynasty', 'keeper'}
+
+# Settings a renewed league keeps
+RENEWED_FIELDS = [
+    'name', 'commissioner_id', 'league_type', 'scoring_type', 'max_teams', 'is_public', 'entry_fee',
+    'prize_pool', 'regular_season_weeks', 'playoff_teams', 'scoring_rules',
+]
+
+MATCHUP_FIELDS = ['id', 'week', 'home_team', 'away_team', 'home_score', 'away_score', 'is_complete']
+
+
+def finished_leagues(season_year, leagues=None):
+    """Leagues of ``season_year`` that have a schedule with no matchup left to play"""
+    leagues = League.objects.all() if leagues is None else leagues
+    scheduled = Exists(Matchup.objects.filter(league=OuterRef('pk')))
+    return leagues.filter(scheduled, season_year=season_year).exclude(matchups__is_complete=False)
+
+
+def rollover_season(season_year, to_season=None, leagues=None, include_unfinished=False,
+                    chunk_size=CHUNK_SIZE):
+    """Archive the finished leagues of a season and renew them into ``to_season``.
+
+    Returns ``(archived, renewed, skipped)``, where skipped counts unfinished
+    leagues left in place.
+    """
+    to_season = to_season or season_year + 1
+    leagues = League.objects.all() if leagues is None else leagues
+    season = leagues.filter(season_year=season_year)
+    ready = season if include_unfinished else finished_leagues(season_year, leagues)
+    league_ids = list(ready.order_by('id').values_list('id', flat=True))
+    skipped = season.count() - len(league_ids)
+
+    archived = renewed = 0
+    for i in range(0, len(league_ids), chunk_size):
+        chunk = league_ids[i:i + chunk_size]
+        with writer_lock(), transaction.atomic():
+            renewed += _rollover(chunk, to_season)
+        archived += len(chunk)
+        invalidate('matchups')
+    return archived, renewed, skipped
+
+
+def _rollover(league_ids, to_season):
+    leagues = list(League.objects.filter(pk__in=league_ids).order_by('id'))
+
+    teams = defaultdict(list)
+    rows = FantasyTeam.objects.filter(league_id__in=league_ids).select_related('owner').order_by(
+        'league_id', '-wins', '-points_for', 'id'
+    )
+    for team in rows:
+        teams[team.league_id].append(team)
+
+    matchups = defaultdict(list)
+    rows = Matchup.objects.filter(league_id__in=league_ids).order_by('week', 'id').values_list(
+        'league_id', *MATCHUP_FIELDS
+    )
+    for league_id, *values in rows:
+        matchups[league_id].append(dict(zip(MATCHUP_FIELDS, values)))
+
+    rosters = defaultdict(list)
+    rows = Roster.objects.filter(fantasy_team__league_id__in=league_ids).order_by('id').values_list(
+        'fantasy_team_id', 'player_id', 'roster_position', 'is_starter'
+    )
+    for team_id, *entry in rows:
+        rosters[team_id].append(entry)
+
+    # The next season's leagues, then their teams and carried rosters
+    renewed = [league for league in leagues if league.is_active]
+    successors = League.objects.bulk_create([
+        League(
+            season_year=to_season,
+            team_count=len(teams[league.id]),
+            **{field: getattr(league, field) for field in RENEWED_FIELDS},
+        )
+        for league in renewed
+    ])
+    successor_ids = {league.id: successor.id for league, successor in zip(renewed, successors)}
+
+    old_teams = [team for league in renewed for team in teams[league.id]]
+    new_teams = FantasyTeam.objects.bulk_create([
+        FantasyTeam(
+            name=team.name, owner_id=team.owner_id, league_id=successor_ids[team.league_id],
+            division=team.division,
+        )
+        for team in old_teams
+    ])
+    carried = {league.id for league in renewed if league.league_type in CARRY_ROSTERS}
+    Roster.objects.bulk_create([
+        Roster(fantasy_team_id=new.id, player_id=player_id, roster_position=slot, is_starter=starter)
+        for old, new in zip(old_teams, new_teams) if old.league_id in carried
+        for player_id, slot, starter in rosters[old.id]
+    ], batch_size=2000)
+
+    ArchivedSeason.objects.bulk_create([
+        ArchivedSeason(
+            league_id=league.id,
+            season_year=league.season_year,
+            name=league.name,
+            league_type=league.league_type,
+            commissioner_id=league.commissioner_id,
+            successor_id=successor_ids.get(league.id),
+            team_count=len(teams[league.id]),
+            document=_compress(_document(league, teams[league.id], matchups[league.id], rosters)),
+        )
+        for league in leagues
+    ])
+    earlier = list(ArchivedSeason.objects.filter(successor_id__in=league_ids))
+    for archive in earlier:
+        archive.successor_id = successor_ids.get(archive.successor_id)
+    ArchivedSeason.objects.bulk_update(earlier, ['successor'])
+
+    # Children first, so every statement leaves no dangling reference
+    for queryset in [
+        DraftPick.objects.filter(draft__league_id__in=league_ids),
+        Draft.objects.filter(league_id__in=league_ids),
+        WaiverClaim.objects.filter(league_id__in=league_ids),
+        PlayoffOdds.objects.filter(fantasy_team__league_id__in=league_ids),
+        Roster.objects.filter(fantasy_team__league_id__in=league_ids),
+        Matchup.objects.filter(league_id__in=league_ids),
+        FantasyTeam.objects.filter(league_id__in=league_ids),
+        League.objects.filter(pk__in=league_ids),
+    ]:
+        queryset._raw_delete(queryset.db)
+    return len(renewed)
+
+
+def _document(league, teams, matchups, rosters):
+    return {
+        'league': {
+            'id': league.id,
+            'name': league.name,
+            'league_type': league.league_type,
+            'scoring_type': league.scoring_type,
+            'season_year': league.season_year,
+            'commissioner': league.commissioner_id,
+            'max_teams': league.max_teams,
+            'regular_season_weeks': league.regular_season_weeks,
+            'playoff_teams': league.playoff_teams,
+            'scoring_rules': league.scoring_rules,
+        },
+        'standings': [
+            {
+                'id': team.id,
+                'name': team.name,
+                'owner': team.owner_id,
+                'owner_username': team.owner.username,
+                'division': team.division,
+                'wins': team.wins,
+                'losses': team.losses,
+                'ties': team.ties,
+                'points_for': team.points_for,
+                'points_against': team.points_against,
+            }
+            for team in teams
+        ],
+        'matchups': matchups,
+        'rosters': {
+            str(team.id): [
+                {'player': player_id, 'roster_position': slot, 'is_starter': starter}
+                for player_id, slot, starter in rosters[team.id]
+            ]
+            for team in teams
+        },
+    }
+
+
+def _compress(document):
+    text = json.dumps(document, cls=DjangoJSONEncoder, separators=(',', ':'))
+    # mtime=0 keeps the bytes a function of the content alone
+    return gzip.compress(text.encode(), compresslevel=9, mtime=0)
+
+
+def read_document(archive):
+    """The archived season's document as stored by ``rollover_season``"""
+    return json.loads(gzip.decompress(archive.document))
@@ -0,0 +1,145 @@
+"""
+Async versions of the hot read endpoints, for ASGI workers.
+
+The sync DRF views hold a worker thread for the whole request, slow client
+included. These views await the async ORM instead, so a waiting request is a
+parked coroutine. Each builds the same queryset as its sync twin. That
+queryset loads everything the serializer reads up front, so serializing
+never touches the database and can run on the event loop. Queries that do
+not depend on each other are awaited together.
+
+Served under ``/api/async/`` next to the sync endpoints, with the same JSON
+bodies (page links aside, which point back at the async URLs). They take
+bearer tokens and sessions, like the sync views' default authentication.
+They render JSON only, and the player and matchup lists skip the ETag
+response cache.
+"""
+import asyncio
+
+from django.http import HttpResponse
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated, NotFound
+from rest_framework.renderers import JSONRenderer
+
+from accounts import tokens
+from accounts.authentication import KEYWORD, bearer_token
+from accounts.serializers import UserSerializer
+from .models import FantasyTeam
+from .pagination import LeaguePagination, MatchupPagination, PlayerPagination
+from .routing import reads_from_replica
+from .serializers import (
+    CompactLeagueSerializer, CompactMatchupSerializer, LeagueSerializer, MatchupSerializer,
+    NFLPlayerSerializer,
+)
+from .views import (
+    compact_payload, is_compact, league_queryset, matchup_queryset, player_queryset, roster_queryset,
+    roster_serializer_class,
+)
+
+# Rows fetched per database round trip; prefetches run once per chunk
+CHUNK_SIZE = 2000
+
+_renderer = JSONRenderer()
+
+
+def _json(data, status=200):
+    return HttpResponse(_renderer.render(data), status=status, content_type='application/json')
+
+
+async def _fetch(queryset):
+    return [obj async for obj in queryset.aiterator(chunk_size=CHUNK_SIZE)]
+
+
+async def _page(paginator_class, request, queryset):
+    """``(paginator, objects, error)`` for the requested page of ``queryset``"""
+    paginator = paginator_class()
+    try:
+        page = await paginator.apage_queryset(queryset, request)
+    except NotFound as e:
+        return None, None, _json({'detail': str(e.detail)}, status=404)
+    return paginator, await _fetch(page), None
+
+
+async def _user(request):
+    """The authenticated user, or an error response to return instead"""
+    try:
+        token = bearer_token(request)
+        if token is not None:
+            user, _ = await tokens.aauthenticate(token)
+            return user, None
+    except (AuthenticationFailed, tokens.InvalidToken) as e:
+        return None, _unauthorized(str(e))
+    user = await request.auser()
+    if not user.is_authenticated:
+        return None, _unauthorized(NotAuthenticated.default_detail)
+    return user, None
+
+
+def _unauthorized(detail):
+    response = _json({'detail': detail}, status=401)
+    response['WWW-Authenticate'] = KEYWORD
+    return response
+
+
+@require_safe
+@reads_from_replica
+async def league_list(request):
+    paginator, leagues, error = await _page(LeaguePagination, request, league_queryset(request.GET))
+    if error is not None:
+        return error
+    if is_compact(request.GET):
+        return _json(compact_payload(CompactLeagueSerializer, leagues, 'leagues', paginator))
+    return _json(paginator.get_paginated_data(LeagueSerializer(leagues, many=True).data))
+
+
+@require_safe
+@reads_from_replica
+async def player_list(request):
+    paginator, players, error = await _page(PlayerPagination, request, player_queryset(request.GET))
+    if error is not None:
+        return error
+    return _json(paginator.get_paginated_data(NFLPlayerSerializer(players, many=True).data))
+
+
+@require_safe
+@reads_from_replica
+async def matchup_list(request):
+    paginator, matchups, error = await _page(MatchupPagination, request, matchup_queryset(request.GET))
+    if error is not None:
+        return error
+    if is_compact(request.GET):
+        return _json(compact_payload(CompactMatchupSerializer, matchups, 'matchups', paginator))
+    return _json(paginator.get_paginated_data(MatchupSerializer(matchups, many=True).data))
+
+
+async def _owned_team_id(user, pk):
+    try:
+        return await FantasyTeam.objects.filter(owner=user).values_list('id', flat=True).aget(pk=pk)
+    except FantasyTeam.DoesNotExist:
+        return None
+
+
+@require_safe
+@reads_from_replica
+async def team_roster(request, pk):
+    user, error = await _user(request)
+    if error is not None:
+        return error
+    # The ownership check and the roster itself only depend on the URL, so
+    # both go out at once; the rows are dropped if the team isn't the user's
+    team_id, roster = await asyncio.gather(
+        _owned_team_id(user, pk),
+        _fetch(roster_queryset(pk, request.GET)),
+    )
+    if team_id is None:
+        return _json({'detail': f'No {FantasyTeam._meta.object_name} matches the given query.'}, status=404)
+    return _json(roster_serializer_class(request.GET)(roster, many=True).data)
+
+
+@require_safe
+@reads_from_replica
+async def current_user(request):
+    user, error = await _user(request)
+    if error is not None:
+        return error
+    return _json(UserSerializer(user).data)
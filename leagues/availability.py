@@ -0,0 +1,144 @@
+"""
+Per-league free-agent availability.
+
+Each worker keeps, per league, a bitmap of rostered players keyed by
+``NFLPlayer.id`` together with the league's ``roster_version`` it was built
+at. The player universe comes from the search index, which already tracks
+every active player, and is kept pre-sorted by average points, overall and
+per position, NFL team and both. A request walks the matching sorted list
+and skips rostered bits until it has enough players, so its cost depends on
+the page size and the league's roster size, not on the number of leagues.
+
+Roster saves and deletes bump ``League.roster_version`` through signals;
+bulk writers call ``rosters_changed``. A request reads the version with the
+league, and a bitmap built at any other version is reloaded with one query.
+Changes committed in this process are also applied to the cached bitmap, so
+the common case needs no reload at all.
+"""
+import threading
+from collections import OrderedDict
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import FantasyTeam, League, Roster
+from .search import player_index
+
+# Leagues whose bitmaps are kept, least recently used dropped first
+MAX_LEAGUES = 20000
+
+
+class AvailabilityIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.leagues = OrderedDict()
+        self.team_leagues = {}
+        self.revision = None
+        self.ranked = {}
+
+    def _ranking(self):
+        """Active player ids by average points, keyed by (position, team) filter"""
+        player_index.sync()
+        with player_index.lock:
+            revision = player_index.revision
+            if self.revision == revision:
+                return self.ranked
+            players = sorted(
+                player_index.players.values(),
+                key=lambda player: (-player['average_points'], player['name'], player['id']),
+            )
+        ranked = {(None, None): []}
+        for player in players:
+            for key in [
+                (None, None),
+                (player['position'], None),
+                (None, player['nfl_team']),
+                (player['position'], player['nfl_team']),
+            ]:
+                ranked.setdefault(key, []).append(player['id'])
+        self.ranked, self.revision = ranked, revision
+        return ranked
+
+    def _bitmap(self, league_id, version):
+        entry = self.leagues.get(league_id)
+        if entry is not None and entry[0] == version:
+            self.leagues.move_to_end(league_id)
+            return entry[1]
+
+        rows = Roster.objects.filter(fantasy_team__league_id=league_id).values_list(
+            'fantasy_team_id', 'player_id'
+        )
+        bits = bytearray()
+        for team_id, player_id in rows:
+            self.team_leagues[team_id] = league_id
+            bits = _set(bits, player_id)
+        self.leagues[league_id] = (version, bits)
+        self.leagues.move_to_end(league_id)
+        while len(self.leagues) > MAX_LEAGUES:
+            self.leagues.popitem(last=False)
+        return bits
+
+    def available(self, league_id, version, position=None, nfl_team=None, limit=50):
+        """Ids of the best ``limit`` unrostered players matching the filters"""
+        ranked = self._ranking().get((position or None, nfl_team or None), [])
+        if limit < 1:
+            return []
+        with self.lock:
+            bits = self._bitmap(league_id, version)
+            found = []
+            for player_id in ranked:
+                if not _isset(bits, player_id):
+                    found.append(player_id)
+                    if len(found) == limit:
+                        break
+            return found
+
+    def roster_changed(self, team_id, player_id, added):
+        """Bump the league's version and, once committed, patch our bitmap"""
+        league_id = self.team_leagues.get(team_id)
+        if league_id is None:
+            league_id = FantasyTeam.objects.filter(pk=team_id).values_list('league_id', flat=True).first()
+            if league_id is None:
+                return
+        League.objects.filter(pk=league_id).update(roster_version=F('roster_version') + 1)
+
+        def apply():
+            with self.lock:
+                entry = self.leagues.get(league_id)
+                if entry is None:
+                    return
+                version, bits = entry
+                bits = _set(bits, player_id) if added else _clear(bits, player_id)
+                # Any bump from elsewhere leaves this one behind the database,
+                # so the next request reloads
+                self.leagues[league_id] = (version + 1, bits)
+
+        transaction.on_commit(apply)
+
+
+def _set(bits, player_id):
+    byte = player_id >> 3
+    if byte >= len(bits):
+        bits.extend(bytes(byte + 1 - len(bits)))
+    bits[byte] |= 1 << (player_id & 7)
+    return bits
+
+
+def _clear(bits, player_id):
+    byte = player_id >> 3
+    if byte < len(bits):
+        bits[byte] &= ~(1 << (player_id & 7)) & 0xFF
+    return bits
+
+
+def _isset(bits, player_id):
+    byte = player_id >> 3
+    return byte < len(bits) and bits[byte] >> (player_id & 7) & 1
+
+
+def rosters_changed(league_ids):
+    """Invalidate availability after bulk roster writes that skip signals"""
+    League.objects.filter(pk__in=league_ids).update(roster_version=F('roster_version') + 1)
+
+
+availability_index = AvailabilityIndex()
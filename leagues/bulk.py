@@ -0,0 +1,34 @@
+"""Set-based write helpers shared by the batch jobs."""
+import threading
+from contextlib import nullcontext
+
+from django.db import connection
+
+# SQLite allows one writer at a time and its busy handler backs off in sleeps
+# of up to 100 ms, while a read transaction that later writes can fail with
+# "database is locked" outright; queueing writers on a mutex avoids both.
+_sqlite_writer = threading.Lock()
+
+
+def writer_lock():
+    """Serialize write transactions within the process on SQLite"""
+    if connection.vendor == 'sqlite':
+        return _sqlite_writer
+    return nullcontext()
+
+
+def bulk_write(model, objs, fields, batch_size=None):
+    """Write ``fields`` of already-saved, fully loaded rows.
+
+    Uses INSERT ... ON CONFLICT (id) DO UPDATE, which costs one statement per
+    batch instead of bulk_update's per-row CASE expressions. Rows must exist
+    and be locked or otherwise protected from deletion by the caller, or the
+    INSERT branch would bring them back.
+    """
+    return model.objects.bulk_create(
+        objs,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['id'],
+        update_fields=fields,
+    )
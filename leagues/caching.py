@@ -0,0 +1,140 @@
+"""
+Conditional GET and server-side response caching for read-heavy endpoints.
+
+Each cached response is stored under a key made of the request path and
+query string, the negotiated renderer, and a version. The version comes from
+one aggregate query over the rows the view would list: their count, the
+newest ``updated_at``, and the newest ``updated_at`` of any nested relations
+the view names. Any change to those rows therefore lands under a new key, and
+stale entries simply age out of the cache.
+
+Changes that don't touch a row's ``updated_at`` (a username change nested in
+a matchup, a deleted row) are stamped into the cache per resource by signal
+handlers through ``invalidate``, and that stamp is part of the version too.
+
+The version doubles as the ``ETag``, and the newest ``updated_at`` as
+``Last-Modified``, so an unchanged poll costs the version query and nothing
+else: a 304 when the client revalidates, or the cached body when it doesn't.
+
+The backend is the ``API_CACHE_ALIAS`` entry of ``CACHES``, locmem by default.
+Point it at a FileBasedCache to share entries and invalidation stamps between
+worker processes on one host.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+API_CACHE_ALIAS = getattr(settings, 'API_CACHE_ALIAS', 'default')
+
+
+def api_cache():
+    return caches[API_CACHE_ALIAS]
+
+
+def _changed_key(resource):
+    return f'api:changed:{resource}'
+
+
+def last_changed(resource):
+    """When ``resource`` was last invalidated, or None"""
+    return api_cache().get(_changed_key(resource))
+
+
+def invalidate(*resources):
+    """Move every cached response for ``resources`` to a fresh version"""
+    now = timezone.now()
+    api_cache().set_many({_changed_key(resource): now for resource in resources}, timeout=None)
+
+
+class CachedResponseMixin:
+    """Serve list and retrieve with ETag/Last-Modified and a response cache.
+
+    ``cache_resource`` names what signal handlers pass to ``invalidate``;
+    ``cache_version_fields`` lists related ``updated_at`` lookups whose
+    changes show up in the payload.
+    """
+    cache_resource = None
+    cache_version_fields = ()
+    cache_timeout = 300
+
+    def list(self, request, *args, **kwargs):
+        return self._cached(request, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached(request, super().retrieve, *args, **kwargs)
+
+    def get_cache_version(self):
+        """Return ``(version, last_modified)`` from a single aggregate query"""
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup = self.kwargs.get(self.lookup_url_kwarg or self.lookup_field)
+        if lookup is not None:
+            queryset = queryset.filter(**{self.lookup_field: lookup})
+        aggregates = {'count': Count('pk'), 'latest': Max('updated_at')}
+        for i, field in enumerate(self.cache_version_fields):
+            aggregates[f'related_{i}'] = Max(field)
+        values = queryset.order_by().aggregate(**aggregates)
+        values['changed'] = last_changed(self.cache_resource)
+
+        stamps = [value for key, value in values.items() if key != 'count' and value is not None]
+        version = ':'.join(
+            str(value.isoformat() if hasattr(value, 'isoformat') else value)
+            for value in values.values()
+        )
+        return version, max(stamps, default=None)
+
+    def _cached(self, request, handler, *args, **kwargs):
+        version, last_modified = self.get_cache_version()
+        digest = hashlib.sha1('|'.join([
+            self.cache_resource,
+            version,
+            request.get_full_path(),
+            request.accepted_renderer.format,
+        ]).encode()).hexdigest()
+        etag = f'"{digest}"'
+        # HTTP dates have whole-second precision
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            cached = api_cache().get(f'api:response:{digest}')
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+            else:
+                response = handler(request, *args, **kwargs)
+                self._cache_key = f'api:response:{digest}'
+
+        response['ETag'] = etag
+        if timestamp is not None:
+            response['Last-Modified'] = http_date(timestamp)
+        patch_cache_control(response, no_cache=True)
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        key = getattr(self, '_cache_key', None)
+        if key and isinstance(response, Response) and response.status_code == 200:
+            response.render()
+            api_cache().set(
+                key, (response.content, response['Content-Type']), self.cache_timeout
+            )
+        elif key and isinstance(response, StreamingHttpResponse) and response.status_code == 200:
+            response.streaming_content = self._cache_stream(
+                response.streaming_content, key, response['Content-Type']
+            )
+        return response
+
+    def _cache_stream(self, chunks, key, content_type):
+        """Pass a streamed body through, caching it once fully sent"""
+        sent = []
+        for chunk in chunks:
+            sent.append(chunk)
+            yield chunk
+        api_cache().set(key, (b''.join(sent), content_type), self.cache_timeout)
@@ -0,0 +1,285 @@
+"""
+Live draft engine.
+
+Each draft's working state (who is on the clock, which players are gone, each
+team's open roster slots and a best-available heap per position) is kept in
+memory for the lifetime of the draft, guarded by a per-draft lock. Picks are
+validated against that state and written through to ``DraftPick`` and
+``Roster`` in one short transaction. The draft row is advanced with a
+conditional UPDATE on ``current_pick``, so a second worker process holding a
+stale copy of the state fails cleanly instead of double-picking; nothing
+takes a table-wide lock. A pick first compares the stored ``current_pick``
+with its copy and reloads when another process has moved on, and a pick
+that still loses the race is retried once on freshly loaded state.
+"""
+import heapq
+import random
+import threading
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .bulk import writer_lock
+from .models import Draft, DraftPick, NFLPlayer, Roster
+
+# Positions worth a bench spot once a team's starters are filled
+BENCH_PRIORITY = ['RB', 'WR', 'QB', 'TE']
+
+
+class DraftError(Exception):
+    pass
+
+
+class DraftConflict(DraftError):
+    """The stored draft moved on since this process last looked"""
+
+
+class DraftState:
+    """In-memory view of one draft"""
+
+    def __init__(self, draft, picks, players, rosters):
+        self.draft = draft
+        self.lock = threading.Lock()
+        self.positions = {player_id: position for player_id, position, _ in players}
+        self.drafted = {player_id for player_id, _ in picks}
+
+        self.queues = {}
+        for player_id, position, average_points in players:
+            self.queues.setdefault(position, []).append((-average_points, player_id))
+        for queue in self.queues.values():
+            heapq.heapify(queue)
+
+        slot_order = Roster.STARTING_SLOTS + Roster.BENCH_SLOTS
+        self.open_slots = {team_id: list(slot_order) for team_id in draft.order}
+        for team_id, slot, player_id in rosters:
+            self.drafted.add(player_id)
+            if slot in self.open_slots.get(team_id, ()):
+                self.open_slots[team_id].remove(slot)
+
+    @classmethod
+    def load(cls, draft_id):
+        draft = Draft.objects.get(pk=draft_id)
+        picks = list(draft.picks.values_list('player_id', 'fantasy_team_id'))
+        players = list(
+            NFLPlayer.objects.filter(is_active=True).values_list('id', 'position', 'average_points')
+        )
+        rosters = list(
+            Roster.objects.filter(fantasy_team_id__in=draft.order)
+            .values_list('fantasy_team_id', 'roster_position', 'player_id')
+        )
+        return cls(draft, picks, players, rosters)
+
+    @property
+    def on_the_clock(self):
+        if self.draft.status != 'in_progress':
+            return None
+        return self.draft.team_for_pick(self.draft.current_pick)
+
+    def slot_for(self, team_id, position):
+        """First open slot on the team that accepts the position"""
+        for slot in self.open_slots[team_id]:
+            if position in Roster.SLOT_ELIGIBILITY[slot]:
+                return slot
+        return None
+
+    def validate(self, team_id, player_id):
+        if self.draft.status != 'in_progress':
+            raise DraftError('The draft is not in progress')
+        if team_id != self.on_the_clock:
+            raise DraftError('It is not your pick')
+        position = self.positions.get(player_id)
+        if position is None:
+            raise DraftError('Unknown or inactive player')
+        if player_id in self.drafted:
+            raise DraftError('That player has already been drafted')
+        slot = self.slot_for(team_id, position)
+        if slot is None:
+            raise DraftError(f'No open roster slot for a {position}')
+        return slot
+
+    def best_available(self, team_id):
+        """Highest-ranked undrafted player filling the team's biggest need.
+
+        Open starting slots come first; once they are filled the best player
+        at a bench position is taken.
+        """
+        open_slots = self.open_slots[team_id]
+        needs = {
+            position
+            for slot in open_slots if slot in Roster.STARTING_SLOTS
+            for position in Roster.SLOT_ELIGIBILITY[slot]
+        } or {position for position in BENCH_PRIORITY if self.slot_for(team_id, position)}
+
+        best = None
+        for position in needs:
+            queue = self.queues.get(position, [])
+            # Drop players taken since this heap was last looked at
+            while queue and queue[0][1] in self.drafted:
+                heapq.heappop(queue)
+            if queue and (best is None or queue[0] < best):
+                best = queue[0]
+        if best is None:
+            raise DraftError('No eligible players left')
+        return best[1]
+
+    def record(self, team_id, player_id, slot, draft):
+        self.drafted.add(player_id)
+        self.open_slots[team_id].remove(slot)
+        self.draft = draft
+
+
+_states = {}
+_states_lock = threading.Lock()
+
+
+def get_state(draft_id):
+    with _states_lock:
+        state = _states.get(draft_id)
+    if state is None:
+        state = DraftState.load(draft_id)
+        with _states_lock:
+            state = _states.setdefault(draft_id, state)
+    return state
+
+
+def forget(draft_id):
+    with _states_lock:
+        _states.pop(draft_id, None)
+
+
+def current_state(draft_id):
+    """``get_state``, reloaded first if another process moved the draft on"""
+    state = get_state(draft_id)
+    stored = Draft.objects.filter(pk=draft_id).values_list('current_pick', 'status').first()
+    if stored != (state.draft.current_pick, state.draft.status):
+        forget(draft_id)
+        state = get_state(draft_id)
+    return state
+
+
+def _advance(draft, now):
+    """Copy of ``draft`` moved on to the next pick"""
+    advanced = Draft(**{f.attname: getattr(draft, f.attname) for f in Draft._meta.concrete_fields})
+    advanced.current_pick = draft.current_pick + 1
+    if advanced.current_pick > draft.total_picks:
+        advanced.status = 'complete'
+        advanced.pick_deadline = None
+    else:
+        advanced.pick_deadline = now + timedelta(seconds=draft.pick_seconds)
+    advanced.updated_at = now
+    return advanced
+
+
+def _write_pick(state, team_id, player_id, slot, is_autopick):
+    draft = state.draft
+    now = timezone.now()
+    advanced = _advance(draft, now)
+    try:
+        with writer_lock(), transaction.atomic():
+            moved = Draft.objects.filter(
+                pk=draft.pk, status='in_progress', current_pick=draft.current_pick
+            ).update(
+                current_pick=advanced.current_pick,
+                status=advanced.status,
+                pick_deadline=advanced.pick_deadline,
+                updated_at=now,
+            )
+            if not moved:
+                raise DraftConflict('The draft has moved on; reload and try again')
+            pick = DraftPick.objects.create(
+                draft_id=draft.pk,
+                overall_pick=draft.current_pick,
+                fantasy_team_id=team_id,
+                player_id=player_id,
+                is_autopick=is_autopick,
+            )
+            Roster.objects.create(
+                fantasy_team_id=team_id,
+                player_id=player_id,
+                roster_position=slot,
+                is_starter=slot in Roster.STARTING_SLOTS,
+            )
+    except (DraftConflict, IntegrityError) as exc:
+        # Another process wrote first; rebuild from the database next time
+        forget(draft.pk)
+        if isinstance(exc, DraftConflict):
+            raise
+        raise DraftConflict('That pick was taken concurrently; reload and try again')
+
+    state.record(team_id, player_id, slot, advanced)
+    if advanced.status == 'complete':
+        forget(draft.pk)
+    return pick
+
+
+def _run_clock(state):
+    """Autopick for every team whose clock has run out"""
+    picks = []
+    now = timezone.now()
+    while (state.draft.status == 'in_progress' and state.draft.pick_deadline
+           and state.draft.pick_deadline <= now):
+        team_id = state.on_the_clock
+        player_id = state.best_available(team_id)
+        slot = state.validate(team_id, player_id)
+        picks.append(_write_pick(state, team_id, player_id, slot, is_autopick=True))
+    return picks
+
+
+def submit_pick(draft_id, team_id, player_id=None):
+    """Make a pick for the team on the clock.
+
+    Without ``player_id`` the best available player is autopicked.
+    Raises ``DraftError`` for invalid picks and ``DraftConflict`` when another
+    process changed the draft first, even after reloading it once.
+    """
+    try:
+        return _submit(current_state(draft_id), team_id, player_id)
+    except DraftConflict:
+        # _write_pick dropped the stale state, so this reloads it
+        return _submit(get_state(draft_id), team_id, player_id)
+
+
+def _submit(state, team_id, player_id):
+    with state.lock:
+        _run_clock(state)
+        autopick = player_id is None
+        if autopick:
+            if team_id != state.on_the_clock:
+                raise DraftError('It is not your pick')
+            player_id = state.best_available(team_id)
+        slot = state.validate(team_id, player_id)
+        return _write_pick(state, team_id, player_id, slot, is_autopick=autopick)
+
+
+def expire_clocks():
+    """Autopick overdue picks across all running drafts; returns picks made"""
+    made = 0
+    overdue = Draft.objects.filter(status='in_progress', pick_deadline__lte=timezone.now())
+    for draft_id in overdue.values_list('id', flat=True):
+        state = get_state(draft_id)
+        with state.lock:
+            try:
+                made += len(_run_clock(state))
+            except DraftError:
+                # A conflict, or no eligible player left; the other drafts go on
+                continue
+    return made
+
+
+def start_draft(draft, shuffle=True):
+    """Fix the pick order and put the first team on the clock"""
+    if draft.status != 'scheduled':
+        raise DraftError('The draft has already started')
+    order = list(draft.league.teams.values_list('id', flat=True))
+    if len(order) < 2:
+        raise DraftError('A draft needs at least two teams')
+    if shuffle:
+        random.shuffle(order)
+    draft.order = order
+    draft.status = 'in_progress'
+    draft.current_pick = 1
+    draft.pick_deadline = timezone.now() + timedelta(seconds=draft.pick_seconds)
+    draft.save()
+    forget(draft.pk)
+    return draft
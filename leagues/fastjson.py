@@ -0,0 +1,247 @@
+"""
+Fast JSON for the hot read-only lists.
+
+DRF renders a list by calling ``to_representation`` on every field of every
+row and handing the result to ``json.dumps``. For the player and matchup
+lists that per-field work is most of the request. ``RowEncoder`` compiles a
+``ModelSerializer`` once into the columns it reads, a converter per field
+that returns the field's JSON text directly, and a ``%`` template joining
+them. A list is then read with ``values_list`` and written out a chunk of
+rows at a time as the response streams.
+
+Nested serializers compile to their own encoders. Each related object is
+encoded once per request and spliced in by id, so a team that appears in
+many matchups is serialized once.
+
+The output is byte for byte what ``JSONRenderer`` makes of the serializer's
+data: compact separators, unescaped unicode, and U+2028/U+2029 escaped.
+Compiling a serializer with a field the compiler doesn't handle raises
+``TypeError``. Read-only fields backed by model properties need a query
+expression in ``COMPUTED``.
+"""
+from decimal import Decimal, getcontext
+from json.encoder import encode_basestring
+
+from django.db.models import F
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework import ISO_8601, serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import League
+
+CHUNK_SIZE = 2000
+
+# Read-only serializer fields that read model properties, as expressions
+COMPUTED = {
+    League: {
+        'current_team_count': F('team_count'),
+        'spots_available': F('max_teams') - F('team_count'),
+    },
+}
+
+_dumps = JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode
+
+
+def _null(convert):
+    return lambda value: 'null' if value is None else convert(value)
+
+
+def _string(value):
+    return encode_basestring(str(value))
+
+
+def _integer(value):
+    return str(int(value))
+
+
+def _boolean(value):
+    return 'true' if value else 'false'
+
+
+def _decimal(field):
+    exponent = Decimal('.1') ** field.decimal_places
+    context = getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+
+    def convert(value):
+        if not isinstance(value, Decimal):
+            value = Decimal(str(value).strip())
+        return f'"{value.quantize(exponent, rounding=field.rounding, context=context):f}"'
+    return convert
+
+
+def _datetime(zone):
+    def convert(value):
+        if not value:
+            return 'null'
+        text = value.astimezone(zone).isoformat()
+        if text.endswith('+00:00'):
+            text = text[:-6] + 'Z'
+        return f'"{text}"'
+    return convert
+
+
+def _escape(text):
+    # What JSONRenderer does to the whole document
+    return text.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+
+
+class RowEncoder:
+    def __init__(self, serializer_class):
+        self.serializer_class = serializer_class
+        self.model = serializer_class.Meta.model
+
+    def __repr__(self):
+        return f'RowEncoder({self.serializer_class.__name__})'
+
+    @cached_property
+    def compiled(self):
+        """``(columns, annotations, converters, template)``; a converter is
+        a function of the column value, a nested ``RowEncoder``, or
+        ``_datetime`` awaiting the current time zone"""
+        computed = COMPUTED.get(self.model, {})
+        columns = ['pk']
+        annotations = {}
+        converters = []
+        keys = []
+        for name, field in self.serializer_class().fields.items():
+            if field.write_only:
+                continue
+            source = field.source
+            if isinstance(field, serializers.ModelSerializer):
+                converter = encoder_for(type(field))
+            elif name in computed and isinstance(field, serializers.ReadOnlyField):
+                source = f'fast_{name}'
+                annotations[source] = computed[name]
+                converter = _null(_dumps)
+            elif isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+                converter = _null(_integer)
+            elif isinstance(field, serializers.DecimalField) \
+                    and getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING) \
+                    and not field.normalize_output and not field.localize:
+                converter = _null(_decimal(field))
+            elif isinstance(field, serializers.DateTimeField) and not hasattr(field, 'timezone') \
+                    and getattr(field, 'format', api_settings.DATETIME_FORMAT).lower() == ISO_8601:
+                converter = _datetime
+            elif isinstance(field, serializers.BooleanField):
+                converter = _null(_boolean)
+            elif isinstance(field, serializers.IntegerField):
+                converter = _null(_integer)
+            elif isinstance(field, (serializers.CharField, serializers.ChoiceField)):
+                converter = _null(_string)
+            elif isinstance(field, serializers.JSONField) and not field.binary:
+                converter = _null(_dumps)
+            else:
+                raise TypeError(f'{self.serializer_class.__name__}.{name}: {type(field).__name__} is not supported')
+            if '.' in source or source == '*':
+                raise TypeError(f'{self.serializer_class.__name__}.{name}: source {source!r} is not supported')
+            columns.append(source)
+            converters.append(converter)
+            keys.append(encode_basestring(name).replace('%', '%%') + ':%s')
+        return columns, annotations, converters, '{' + ','.join(keys) + '}'
+
+    def _values(self, queryset):
+        columns, annotations, _, _ = self.compiled
+        return queryset.select_related(None).prefetch_related(None).annotate(**annotations).values_list(*columns)
+
+    def _encode(self, rows, using, memo):
+        """JSON text for each ``values_list`` row, loading nested objects into ``memo``"""
+        _, _, converters, template = self.compiled
+        converters = list(converters)
+        for i, converter in enumerate(converters):
+            if isinstance(converter, RowEncoder):
+                converters[i] = converter._table({row[i + 1] for row in rows}, using, memo).__getitem__
+            elif converter is _datetime:
+                # Looked up once per chunk; DRF does it for every value
+                converters[i] = _datetime(timezone.get_current_timezone())
+        return [
+            template % tuple(convert(value) for convert, value in zip(converters, row[1:]))
+            for row in rows
+        ]
+
+    def _table(self, ids, using, memo):
+        """Encoded objects by pk, at least those in ``ids``"""
+        table = memo.setdefault(self, {None: 'null'})
+        missing = [pk for pk in ids if pk not in table]
+        if missing:
+            rows = list(self._values(self.model._default_manager.using(using).filter(pk__in=missing)))
+            table.update(zip((row[0] for row in rows), self._encode(rows, using, memo)))
+        return table
+
+    def stream(self, queryset, chunk_size=CHUNK_SIZE):
+        """An iterator over the JSON list of ``queryset`` in chunks of bytes"""
+        # Resolve the database now: the router's request state is gone by the
+        # time a streaming response is consumed
+        using = queryset.db
+        return self._stream(self._values(queryset.using(using)), using, chunk_size)
+
+    def _stream(self, queryset, using, chunk_size):
+        rows = queryset.iterator(chunk_size=chunk_size)
+        memo = {}
+        opening = '['
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield _escape(opening + ','.join(self._encode(chunk, using, memo))).encode()
+                opening = ','
+                chunk = []
+        if chunk:
+            yield _escape(opening + ','.join(self._encode(chunk, using, memo))).encode()
+            opening = ','
+        yield b'[]' if opening == '[' else b']'
+
+    def render(self, queryset):
+        return b''.join(self.stream(queryset))
+
+
+_encoders = {}
+
+
+def encoder_for(serializer_class):
+    """The shared ``RowEncoder`` of a serializer class"""
+    encoder = _encoders.get(serializer_class)
+    if encoder is None:
+        encoder = _encoders.setdefault(serializer_class, RowEncoder(serializer_class))
+    return encoder
+
+
+def paginated_stream(paginator, chunks):
+    """Wrap a streamed list in the keyset paginator's envelope"""
+    yield _escape('{"next":%s,"previous":%s,"results":' % (
+        _dumps(paginator.next), _dumps(paginator.previous),
+    )).encode()
+    yield from chunks
+    yield b'}'
+
+
+class FastListMixin:
+    """Stream list responses through a ``RowEncoder`` of ``serializer_class``.
+
+    Only for plain, unindented JSON; other renderers (the browsable API) go
+    through the serializer as before. A keyset paginator picks the page
+    first; see ``leagues.pagination``.
+    """
+
+    def list(self, request, *args, **kwargs):
+        renderer = request.accepted_renderer
+        paginator = self.paginator
+        if (
+            type(renderer) is not JSONRenderer
+            or renderer.get_indent(request.accepted_media_type, {}) is not None
+            or (paginator is not None and not hasattr(paginator, 'page_queryset'))
+        ):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        encoder = encoder_for(self.serializer_class)
+        if paginator is None:
+            chunks = encoder.stream(queryset)
+        else:
+            chunks = paginated_stream(paginator, encoder.stream(paginator.page_queryset(queryset, request, self)))
+        return StreamingHttpResponse(chunks, content_type=renderer.media_type)
+
@@ -0,0 +1,181 @@
+"""
+Streaming ingestion of weekly player stats and injury updates.
+
+Rows are read lazily from CSV or NDJSON and upserted in fixed-size batches, so
+memory use does not grow with the size of the feed. Player season totals are
+adjusted by the difference each stat line makes rather than recomputed, and
+rows identical to what is already stored cause no writes at all.
+"""
+import csv
+import json
+from decimal import Decimal
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from .bulk import bulk_write
+from .models import NFLPlayer, PlayerWeekStats
+from .scoring import DEFAULT_RULES, points_for_line
+
+STAT_FIELDS = list(DEFAULT_RULES)
+
+TRUE_VALUES = {'1', 'true', 't', 'yes', 'y'}
+
+
+def read_rows(stream, fmt):
+    """Yield one dict per row of a CSV or NDJSON stream."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'ndjson':
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def _blank(value):
+    return value is None or value == ''
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def parse_row(row):
+    """Normalize a raw feed row.
+
+    Returns ``(player_id, week, stats, injury)`` where ``week``/``stats`` are
+    None for injury-only rows and ``injury`` is None when the row's injury
+    columns are missing or blank. CSV rows have every column, so blanks
+    mean "no update"; clearing an injury takes ``is_injured`` set false.
+    A status with no ``is_injured`` value marks the player injured.
+    """
+    player_id = int(row['player_id'])
+    week = None if _blank(row.get('week')) else int(row['week'])
+    stats = None
+    if week is not None:
+        stats = {field: int(row.get(field) or 0) for field in STAT_FIELDS}
+
+    injury = None
+    status = row.get('injury_status')
+    injured = row.get('is_injured')
+    if not _blank(injured) or not _blank(status):
+        injury = {
+            'is_injured': not _blank(status) if _blank(injured) else _parse_bool(injured),
+            'injury_status': None if _blank(status) else status,
+        }
+    return player_id, week, stats, injury
+
+
+class StatIngester:
+    """Upsert stat lines and injury updates in batches for one season."""
+
+    def __init__(self, season_year, batch_size=1000):
+        self.season_year = season_year
+        self.batch_size = batch_size
+        self.counts = {
+            'rows': 0, 'created': 0, 'updated': 0, 'unchanged': 0,
+            'injuries': 0, 'skipped': 0,
+        }
+
+    def ingest(self, rows):
+        rows = iter(rows)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            self.counts['rows'] += len(batch)
+            self._ingest_batch(batch)
+        return self.counts
+
+    @transaction.atomic
+    def _ingest_batch(self, batch):
+        # Later rows for the same player/week win
+        lines = {}
+        injuries = {}
+        for row in batch:
+            player_id, week, stats, injury = parse_row(row)
+            if stats is not None:
+                lines[player_id, week] = stats
+            if injury is not None:
+                injuries[player_id] = injury
+
+        player_ids = {player_id for player_id, _ in lines} | set(injuries)
+        players = NFLPlayer.objects.select_for_update().in_bulk(player_ids)
+        missing = player_ids - set(players)
+        if missing:
+            self.counts['skipped'] += sum(1 for key in lines if key[0] in missing)
+            self.counts['skipped'] += sum(1 for key in injuries if key in missing)
+
+        existing = {
+            (line.player_id, line.week): line
+            for line in PlayerWeekStats.objects.filter(
+                season_year=self.season_year,
+                player_id__in=[player_id for player_id, _ in lines if player_id in players],
+                week__in={week for _, week in lines},
+            )
+        }
+
+        now = timezone.now()
+        to_create, to_update = [], []
+        changed_players = {}
+        for (player_id, week), stats in lines.items():
+            player = players.get(player_id)
+            if player is None:
+                continue
+            points = points_for_line(DEFAULT_RULES, stats)
+            line = existing.get((player_id, week))
+            if line is None:
+                to_create.append(PlayerWeekStats(
+                    player_id=player_id, season_year=self.season_year, week=week,
+                    fantasy_points=points, **stats
+                ))
+                player.points_total += points
+                player.games_played += 1
+            elif any(getattr(line, field) != value for field, value in stats.items()):
+                player.points_total += points - line.fantasy_points
+                for field, value in stats.items():
+                    setattr(line, field, value)
+                line.fantasy_points = points
+                line.updated_at = now
+                to_update.append(line)
+            else:
+                self.counts['unchanged'] += 1
+                continue
+            changed_players[player_id] = player
+
+        for player_id, injury in injuries.items():
+            player = players.get(player_id)
+            if player is None:
+                continue
+            if (player.is_injured, player.injury_status) != (injury['is_injured'], injury['injury_status']):
+                player.is_injured = injury['is_injured']
+                player.injury_status = injury['injury_status']
+                changed_players[player_id] = player
+                self.counts['injuries'] += 1
+
+        # New and changed rows go out as INSERT ... ON CONFLICT DO UPDATE, which
+        # is far cheaper than bulk_update's per-row CASE expressions.
+        PlayerWeekStats.objects.bulk_create(
+            to_create + to_update,
+            update_conflicts=True,
+            unique_fields=['player', 'season_year', 'week'],
+            update_fields=STAT_FIELDS + ['fantasy_points', 'updated_at'],
+        )
+        for player in changed_players.values():
+            player.average_points = (
+                (player.points_total / player.games_played).quantize(Decimal('0.01'))
+                if player.games_played else Decimal('0')
+            )
+            player.updated_at = now
+        bulk_write(
+            NFLPlayer, changed_players.values(),
+            ['points_total', 'average_points', 'games_played', 'is_injured', 'injury_status', 'updated_at'],
+        )
+        self.counts['created'] += len(to_create)
+        self.counts['updated'] += len(to_update)
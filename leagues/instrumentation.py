@@ -0,0 +1,346 @@
+"""
+Sampled per-request performance instrumentation.
+
+``PerformanceMiddleware`` profiles a random ``PERF_SAMPLE_RATE`` share of
+requests. For those it wraps every database connection with an execute
+wrapper, counting queries and their time and noting any statement run
+``PERF_DUPLICATE_THRESHOLD`` or more times, whatever its parameters: the
+usual shape of an N+1. Time is split into:
+
+- ``sql``: time inside the database driver;
+- ``serialize``: the rest of the view, which for DRF views is almost all
+  serializer work, since that is where querysets are turned into data;
+- ``render``: turning the response data into bytes (DRF renderers run after
+  the view returns);
+- ``total``: the whole request as seen from this middleware.
+
+Sampled responses carry a ``Server-Timing`` header with these numbers, and
+duplicate queries are logged as warnings. Streamed bodies (the fast player
+and matchup lists) run their queries while they are sent, so those requests
+are profiled until the body is done and recorded then, without the header,
+which has long gone out. Async streams, the live score feeds, are skipped.
+Every sample also lands in per-view histograms with fixed buckets, so they
+are cheap to keep and merge.
+Each process writes its histograms to ``PERF_STATS_DIR`` every
+``FLUSH_INTERVAL`` seconds. ``perf_report`` and the staff-only
+``/api/perf/`` endpoint merge every process's file.
+
+Unsampled requests pay for one random number.
+"""
+import atexit
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SAMPLE_RATE = 0.01
+DUPLICATE_THRESHOLD = getattr(settings, 'PERF_DUPLICATE_THRESHOLD', 5)
+STATS_DIR = getattr(settings, 'PERF_STATS_DIR', os.path.join(tempfile.gettempdir(), 'gridiron-perf'))
+FLUSH_INTERVAL = 10.0
+
+PHASES = ('total', 'sql', 'serialize', 'render')
+
+# Upper bounds of the histogram buckets in milliseconds; the last bucket
+# holds anything slower
+BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class RequestProfile:
+    """Execute wrapper collecting one request's queries"""
+
+    __slots__ = ('queries', 'sql_time', 'statements')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries += 1
+            self.statements[sql] += 1
+
+    def duplicates(self):
+        """``(sql, times)`` for statements repeated past the threshold"""
+        return [
+            (sql, count) for sql, count in self.statements.most_common()
+            if count >= DUPLICATE_THRESHOLD
+        ]
+
+
+def _empty_entry():
+    return {
+        'requests': 0,
+        'queries': 0,
+        'max_queries': 0,
+        'duplicated': 0,
+        'time': {phase: 0.0 for phase in PHASES},
+        'histograms': {phase: [0] * (len(BUCKETS) + 1) for phase in PHASES},
+    }
+
+
+def merge_entries(into, entry):
+    into['requests'] += entry['requests']
+    into['queries'] += entry['queries']
+    into['max_queries'] = max(into['max_queries'], entry['max_queries'])
+    into['duplicated'] += entry['duplicated']
+    for phase in PHASES:
+        into['time'][phase] += entry['time'][phase]
+        into['histograms'][phase] = [a + b for a, b in zip(into['histograms'][phase], entry['histograms'][phase])]
+    return into
+
+
+def histogram_percentile(counts, pct):
+    """Upper bound in ms of the bucket holding the ``pct`` percentile (None if slower than all)"""
+    target = sum(counts) * pct / 100
+    seen = 0
+    for bound, count in zip(BUCKETS + (None,), counts):
+        seen += count
+        if count and seen >= target:
+            return bound
+    return None
+
+
+class PerfStats:
+    """Per-view histograms of this process, flushed to ``STATS_DIR``"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.views = {}
+        self.next_flush = time.monotonic() + FLUSH_INTERVAL
+        self.dirty = False
+
+    def record(self, view, timings, queries, duplicated):
+        with self.lock:
+            entry = self.views.get(view)
+            if entry is None:
+                entry = self.views[view] = _empty_entry()
+            entry['requests'] += 1
+            entry['queries'] += queries
+            entry['max_queries'] = max(entry['max_queries'], queries)
+            entry['duplicated'] += bool(duplicated)
+            for phase in PHASES:
+                ms = timings[phase] * 1000
+                entry['time'][phase] += ms
+                entry['histograms'][phase][bisect_left(BUCKETS, ms)] += 1
+            self.dirty = True
+            flush = time.monotonic() >= self.next_flush
+        if flush:
+            self.flush()
+
+    def path(self):
+        return os.path.join(STATS_DIR, f'{os.getpid()}.json')
+
+    def flush(self):
+        with self.lock:
+            self.next_flush = time.monotonic() + FLUSH_INTERVAL
+            if not self.dirty:
+                return
+            self.dirty = False
+            data = json.dumps({'pid': os.getpid(), 'written_at': time.time(), 'views': self.views})
+        try:
+            os.makedirs(STATS_DIR, exist_ok=True)
+            partial = f'{self.path()}.{threading.get_ident()}.tmp'
+            with open(partial, 'w') as f:
+                f.write(data)
+            os.replace(partial, self.path())
+        except OSError:
+            logger.exception('Could not write performance stats to %s', STATS_DIR)
+
+    def reset(self):
+        with self.lock:
+            self.views = {}
+            self.dirty = False
+
+
+perf_stats = PerfStats()
+atexit.register(perf_stats.flush)
+
+
+def load_stats():
+    """Per-view entries merged across every process that has written stats"""
+    perf_stats.flush()
+    merged = {}
+    try:
+        names = os.listdir(STATS_DIR)
+    except FileNotFoundError:
+        return merged
+    for name in names:
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(STATS_DIR, name)) as f:
+                views = json.load(f)['views']
+        except (OSError, ValueError, KeyError):
+            continue
+        for view, entry in views.items():
+            merge_entries(merged.setdefault(view, _empty_entry()), entry)
+    return merged
+
+
+def reset_stats():
+    perf_stats.reset()
+    try:
+        names = os.listdir(STATS_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        if name.endswith('.json'):
+            os.remove(os.path.join(STATS_DIR, name))
+
+
+def summarize(views):
+    """Readable per-view rows: means and histogram percentiles in ms"""
+    rows = []
+    for view, entry in sorted(views.items(), key=lambda item: -item[1]['time']['total']):
+        requests = entry['requests'] or 1
+        total = entry['histograms']['total']
+        rows.append({
+            'view': view,
+            'requests': entry['requests'],
+            'mean_queries': entry['queries'] / requests,
+            'max_queries': entry['max_queries'],
+            'duplicated': entry['duplicated'],
+            'mean_ms': {phase: entry['time'][phase] / requests for phase in PHASES},
+            'p50_ms': histogram_percentile(total, 50),
+            'p95_ms': histogram_percentile(total, 95),
+            'p99_ms': histogram_percentile(total, 99),
+            'buckets_ms': list(BUCKETS),
+            'histograms': entry['histograms'],
+        })
+    return rows
+
+
+def _wrap_connections(stack, profile):
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(profile))
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return f"{request.method} {match.view_name if match else 'unresolved'}"
+
+
+def _server_timing(timings, queries, duplicates):
+    parts = [
+        f'sql;dur={timings["sql"] * 1000:.1f};desc="{queries} queries"',
+        f'serialize;dur={timings["serialize"] * 1000:.1f}',
+        f'render;dur={timings["render"] * 1000:.1f}',
+        f'total;dur={timings["total"] * 1000:.1f}',
+    ]
+    if duplicates:
+        parts.append(f'dup;desc="{len(duplicates)} statements repeated, worst {duplicates[0][1]}x"')
+    return ', '.join(parts)
+
+
+class PerformanceMiddleware:
+    """Profile a sample of requests; see the module docstring"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def sampled(self):
+        sample_rate = getattr(settings, 'PERF_SAMPLE_RATE', DEFAULT_SAMPLE_RATE)
+        return sample_rate > 0 and random.random() < sample_rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.sampled():
+            return self.get_response(request)
+
+        profile = RequestProfile()
+        request._perf_marks = {}
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            _wrap_connections(stack, profile)
+            response = self.get_response(request)
+        return self.finish(request, response, profile, started)
+
+    async def __acall__(self, request):
+        if not self.sampled():
+            return await self.get_response(request)
+
+        profile = RequestProfile()
+        request._perf_marks = {}
+        started = time.perf_counter()
+        # Connections belong to threads; the ORM's sync_to_async calls for
+        # this request all run on one thread, so wrap its connections there
+        stack = ExitStack()
+        await sync_to_async(_wrap_connections)(stack, profile)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self.finish(request, response, profile, started)
+
+    def finish(self, request, response, profile, started):
+        if response.streaming:
+            if not response.is_async:
+                response.streaming_content = self._profile_stream(
+                    request, response.streaming_content, profile, started
+                )
+            return response
+        timings, duplicates = self.record(request, profile, started, time.perf_counter())
+        response['Server-Timing'] = _server_timing(timings, profile.queries, duplicates)
+        return response
+
+    def _profile_stream(self, request, chunks, profile, started):
+        # Wrapped in whichever thread sends the body, and recorded once it
+        # is exhausted or closed
+        with ExitStack() as stack:
+            _wrap_connections(stack, profile)
+            try:
+                yield from chunks
+            finally:
+                self.record(request, profile, started, time.perf_counter())
+
+    def record(self, request, profile, started, ended):
+        marks = request._perf_marks
+        view_started = marks.get('view', started)
+        view_ended = marks.get('render', ended)
+        timings = {
+            'total': ended - started,
+            'sql': profile.sql_time,
+            'serialize': max(0.0, view_ended - view_started - profile.sql_time),
+            'render': ended - view_ended if 'render' in marks else 0.0,
+        }
+        duplicates = profile.duplicates()
+        view = _view_name(request)
+        for sql, count in duplicates:
+            logger.warning('%s ran the same query %d times: %s', view, count, sql[:300])
+        perf_stats.record(view, timings, profile.queries, duplicates)
+        return timings, duplicates
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        marks = getattr(request, '_perf_marks', None)
+        if marks is not None:
+            marks['view'] = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Runs between the view returning and the response being rendered
+        marks = getattr(request, '_perf_marks', None)
+        if marks is not None:
+            marks['render'] = time.perf_counter()
+        return response
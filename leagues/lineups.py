@@ -0,0 +1,345 @@
+"""
+Optimal starting lineups.
+
+Each rostered player is projected from their season average, shifted by the
+spread of their weekly scores according to the owner's ``ai_risk_tolerance``:
+conservative owners are credited the floor, aggressive ones the ceiling.
+Players on bye, on IR, or ruled out never start; with
+``ai_consider_injuries`` anyone flagged injured sits as well.
+
+Filling the starting slots is an assignment problem between slots and
+players, weighted by projection and constrained by
+``Roster.SLOT_ELIGIBILITY``, solved with the Hungarian algorithm. Every slot
+also gets a zero-value "empty" option so a short roster still solves. This
+handles FLEX (and any future multi-position slot) without trying
+combinations.
+
+``optimize_teams`` runs over any queryset of teams in chunks: one query for
+the chunk's rosters, one for the players' score spread, one for whose games
+have started, and one upsert for the rows whose slot changed.
+
+A player whose game for the week has started (a stat line for it exists)
+is locked: the optimizer leaves them in their slot and fills the others
+around them, and ``set_lineup`` refuses to move them.
+
+``set_lineup`` applies a lineup the owner picked. It checks the whole slot
+map in memory against the roster and ``Roster.SLOT_ELIGIBILITY``, so the
+transaction holds only the team's own roster rows, for one read and one
+``bulk_update``.
+"""
+from itertools import groupby
+
+from django.db import transaction
+from django.db.models import StdDev
+
+from .bulk import bulk_write
+from .models import FantasyTeam, PlayerWeekStats, Roster
+
+CHUNK_SIZE = 2000
+
+# Standard deviations of weekly score added to a player's average
+RISK_WEIGHTS = {'conservative': -0.5, 'balanced': 0.0, 'aggressive': 0.5}
+
+# Injury designations that mean the player will not play
+OUT_STATUSES = {'out', 'ir', 'injured reserve', 'suspended', 'pup', 'doubtful'}
+
+# Cost of leaving a slot empty: just worse than starting a zero-point player
+EMPTY_SLOT = 1e-6
+INELIGIBLE = float('inf')
+
+ROSTER_FIELDS = (
+    'id', 'fantasy_team_id', 'player_id', 'roster_position', 'is_starter', 'acquired_date',
+    'player__position', 'player__average_points', 'player__bye_week',
+    'player__is_injured', 'player__injury_status',
+    'fantasy_team__league__season_year',
+    'fantasy_team__owner__ai_risk_tolerance', 'fantasy_team__owner__ai_consider_injuries',
+)
+
+
+def assign(cost):
+    """Minimum-cost assignment of each row to a distinct column.
+
+    ``cost`` is a list of rows with at least as many columns as rows. Returns
+    the column chosen for each row. O(rows^2 * columns).
+    """
+    rows, columns = len(cost), len(cost[0])
+    inf = float('inf')
+    u = [0.0] * (rows + 1)
+    v = [0.0] * (columns + 1)
+    owner = [0] * (columns + 1)
+    way = [0] * (columns + 1)
+    for row in range(1, rows + 1):
+        owner[0] = row
+        column = 0
+        slack = [inf] * (columns + 1)
+        used = [False] * (columns + 1)
+        while True:
+            used[column] = True
+            current = owner[column]
+            costs = cost[current - 1]
+            delta = inf
+            best = 0
+            for j in range(1, columns + 1):
+                if not used[j]:
+                    reduced = costs[j - 1] - u[current] - v[j]
+                    if reduced < slack[j]:
+                        slack[j] = reduced
+                        way[j] = column
+                    if slack[j] < delta:
+                        delta = slack[j]
+                        best = j
+            for j in range(columns + 1):
+                if used[j]:
+                    u[owner[j]] += delta
+                    v[j] -= delta
+                else:
+                    slack[j] -= delta
+            column = best
+            if owner[column] == 0:
+                break
+        while column:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+
+    chosen = [0] * rows
+    for j in range(1, columns + 1):
+        if owner[j]:
+            chosen[owner[j] - 1] = j - 1
+    return chosen
+
+
+def best_lineup(candidates, slots=Roster.STARTING_SLOTS):
+    """Pick starters from ``(key, position, projection)`` candidates.
+
+    Returns ``{slot: key}``, leaving out slots nobody eligible could fill.
+    """
+    cost = []
+    for n, slot in enumerate(slots):
+        eligible = Roster.SLOT_ELIGIBILITY[slot]
+        row = [
+            -max(projection, 0.0) if position in eligible else INELIGIBLE
+            for _, position, projection in candidates
+        ]
+        # One empty option per slot, usable by that slot only
+        row += [EMPTY_SLOT if i == n else INELIGIBLE for i in range(len(slots))]
+        cost.append(row)
+    lineup = {}
+    for slot, column in zip(slots, assign(cost)):
+        if column < len(candidates):
+            lineup[slot] = candidates[column][0]
+    return lineup
+
+
+def projection(average, spread, risk_tolerance):
+    return float(average) + RISK_WEIGHTS.get(risk_tolerance, 0.0) * (spread or 0.0)
+
+
+def can_start(row, week):
+    """Whether a roster row (a ``ROSTER_FIELDS`` dict) may start this week"""
+    if row['roster_position'] == 'IR' or row['player__bye_week'] == week:
+        return False
+    status = (row['player__injury_status'] or '').strip().lower()
+    if status in OUT_STATUSES:
+        return False
+    return not (row['player__is_injured'] and row['fantasy_team__owner__ai_consider_injuries'])
+
+
+def _key(row):
+    return row['player_id'], row['fantasy_team__league__season_year']
+
+
+def plan_lineup(rows, week, spreads, started=frozenset()):
+    """Roster rows of one team whose slot or starter flag should change.
+
+    Players in ``started``, ``(player_id, season_year)`` pairs, keep their
+    slots. A roster too big for the bench is left unchanged.
+    """
+    locked = {row['id'] for row in rows if _key(row) in started}
+    slots = {row['id']: row['roster_position'] for row in rows if row['id'] in locked}
+    locked_slots = set(slots.values())
+    taken = set(locked_slots)
+
+    candidates = [
+        (
+            row['id'],
+            row['player__position'],
+            projection(
+                row['player__average_points'],
+                spreads.get(_key(row)),
+                row['fantasy_team__owner__ai_risk_tolerance'],
+            ),
+        )
+        for row in rows if row['id'] not in locked and can_start(row, week)
+    ]
+    open_slots = [slot for slot in Roster.STARTING_SLOTS if slot not in locked_slots]
+    starters = {key: slot for slot, key in best_lineup(candidates, open_slots).items()} if open_slots else {}
+
+    # Benched players keep their bench slot; demoted starters take free ones
+    # in order of projection
+    demoted = []
+    for row in rows:
+        if row['id'] in locked:
+            continue
+        if row['id'] in starters:
+            slots[row['id']] = starters[row['id']]
+        elif (row['roster_position'] in Roster.BENCH_SLOTS or row['roster_position'] == 'IR') \
+                and row['roster_position'] not in locked_slots:
+            slots[row['id']] = row['roster_position']
+            taken.add(row['roster_position'])
+        else:
+            demoted.append(row)
+    free = [slot for slot in Roster.BENCH_SLOTS if slot not in taken]
+    if len(demoted) > len(free):
+        # More players than slots: leave the lineup as the owner set it
+        return []
+    demoted.sort(key=lambda row: -float(row['player__average_points']))
+    for row, slot in zip(demoted, free):
+        slots[row['id']] = slot
+
+    changed = []
+    for row in rows:
+        if row['id'] in locked:
+            continue
+        slot = slots[row['id']]
+        is_starter = slot in Roster.STARTING_SLOTS
+        if slot != row['roster_position'] or is_starter != row['is_starter']:
+            changed.append(Roster(
+                id=row['id'],
+                fantasy_team_id=row['fantasy_team_id'],
+                player_id=row['player_id'],
+                roster_position=slot,
+                is_starter=is_starter,
+                acquired_date=row['acquired_date'],
+            ))
+    return changed
+
+
+def score_spreads(player_ids, seasons):
+    """Standard deviation of weekly fantasy points per (player, season)"""
+    stats = PlayerWeekStats.objects.filter(player_id__in=player_ids, season_year__in=seasons)
+    return {
+        (player_id, season): float(spread)
+        for player_id, season, spread in stats.values('player_id', 'season_year').annotate(
+            spread=StdDev('fantasy_points')
+        ).values_list('player_id', 'season_year', 'spread')
+        if spread is not None
+    }
+
+
+def optimize_teams(teams, week, chunk_size=CHUNK_SIZE):
+    """Set the best legal lineup for every team in a queryset.
+
+    Returns ``(teams, rows)``: teams examined and roster rows changed.
+    """
+    team_ids = list(teams.order_by('id').values_list('id', flat=True))
+    changed = 0
+    for start in range(0, len(team_ids), chunk_size):
+        chunk = team_ids[start:start + chunk_size]
+        with transaction.atomic():
+            rows = list(
+                Roster.objects.select_for_update(of=('self',))
+                .filter(fantasy_team_id__in=chunk)
+                .order_by('fantasy_team_id', 'id')
+                .values(*ROSTER_FIELDS)
+            )
+            player_ids = {row['player_id'] for row in rows}
+            seasons = {row['fantasy_team__league__season_year'] for row in rows}
+            spreads = score_spreads(player_ids, seasons)
+            started = set(
+                PlayerWeekStats.objects.filter(player_id__in=player_ids, season_year__in=seasons, week=week)
+                .values_list('player_id', 'season_year')
+            )
+            updates = []
+            for _, team_rows in groupby(rows, key=lambda row: row['fantasy_team_id']):
+                updates += plan_lineup(list(team_rows), week, spreads, started)
+            if updates:
+                bulk_write(Roster, updates, ['roster_position', 'is_starter'], batch_size=CHUNK_SIZE)
+            changed += len(updates)
+    return len(team_ids), changed
+
+
+def optimize_team(team, week):
+    """Set one team's best lineup; returns the number of roster rows moved"""
+    return optimize_teams(FantasyTeam.objects.filter(pk=team.pk), week)[1]
+
+
+class LineupError(Exception):
+    pass
+
+
+def set_lineup(team, week, lineup):
+    """Apply an owner's ``{slot: player_id}`` map to ``team``'s roster.
+
+    Slots missing from the map, or mapped to None, are left empty. Rostered
+    players the map leaves out go to the bench: their own bench or IR slot
+    if it is still free, otherwise the first free one, and it is an error
+    if the bench runs out. Players whose game
+    for ``week`` has started, meaning a stat line for it exists, cannot
+    move. Returns the number of roster rows changed.
+    """
+    slots = dict(Roster.ROSTER_POSITIONS)
+    placed = {}
+    for slot, player_id in lineup.items():
+        if slot not in slots:
+            raise LineupError(f'Unknown roster slot {slot}')
+        if player_id is None:
+            continue
+        if not isinstance(player_id, int) or isinstance(player_id, bool):
+            raise LineupError(f'{slot} must be a player id')
+        if player_id in placed:
+            raise LineupError(f'Player {player_id} is in more than one slot')
+        placed[player_id] = slot
+
+    started = set(
+        PlayerWeekStats.objects.filter(
+            player__roster_assignments__fantasy_team=team,
+            season_year=team.league.season_year,
+            week=week,
+        ).values_list('player_id', flat=True)
+    )
+
+    with transaction.atomic():
+        rows = list(
+            Roster.objects.select_for_update(of=('self',))
+            .filter(fantasy_team=team)
+            .order_by('id')
+            .values_list('id', 'player_id', 'roster_position', 'is_starter', 'player__name', 'player__position')
+        )
+        rostered = {row[1]: row for row in rows}
+        for player_id, slot in placed.items():
+            if player_id not in rostered:
+                raise LineupError(f'Player {player_id} is not on this roster')
+            position = rostered[player_id][5]
+            if position not in Roster.SLOT_ELIGIBILITY[slot]:
+                raise LineupError(f'A {position} cannot play {slot}')
+
+        targets = dict(placed)
+        taken = set(placed.values())
+        benched = []
+        for _, player_id, current, _, name, _ in rows:
+            if player_id in targets:
+                continue
+            if (current in Roster.BENCH_SLOTS or current == 'IR') and current not in taken:
+                targets[player_id] = current
+                taken.add(current)
+            else:
+                benched.append((player_id, name))
+        free = [slot for slot in Roster.BENCH_SLOTS if slot not in taken]
+        if len(benched) > len(free):
+            raise LineupError(f'No bench slot left for {benched[len(free)][1]}')
+        for (player_id, _), slot in zip(benched, free):
+            targets[player_id] = slot
+
+        changed = []
+        for roster_id, player_id, current, is_starter, name, _ in rows:
+            slot = targets[player_id]
+            starts = slot in Roster.STARTING_SLOTS
+            if slot == current and starts == is_starter:
+                continue
+            if player_id in started:
+                raise LineupError(f"{name}'s game has started")
+            changed.append(Roster(id=roster_id, roster_position=slot, is_starter=starts))
+        if changed:
+            Roster.objects.bulk_update(changed, ['roster_position', 'is_starter'])
+    return len(changed)
@@ -0,0 +1,187 @@
+"""
+Live score stream over server-sent events.
+
+Clients subscribe to a league-week and receive one ``score`` event per
+matchup whose score or completion changed, carrying only ``id``,
+``home_score``, ``away_score`` and ``is_complete``. The first events of a
+stream are the current scores so the client has a baseline.
+
+Each worker runs one ``ScoreHub`` on its event loop. Matchup saves in the
+same process reach it through a signal; everything else (``score_week``,
+other workers) is found by a single poll of the subscribed league-weeks'
+recently updated matchups every ``POLL_INTERVAL`` seconds while anyone is
+listening, however many clients are connected. Subscribers keep only the
+latest pending state per matchup, so a slow client costs at most one entry
+per matchup rather than a growing backlog.
+
+The stream is an async view and needs the ASGI entry point
+(``gridiron.asgi``); under WSGI it would hold a worker thread per client.
+"""
+import asyncio
+import json
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import Matchup
+
+POLL_INTERVAL = 1.0
+
+# Re-read matchups slightly older than the last poll in case a slow
+# transaction committed after a newer one; repeats are dropped as unchanged
+POLL_OVERLAP = timedelta(seconds=5)
+
+# Comment line sent on idle streams so proxies keep the connection open
+HEARTBEAT_SECONDS = 15
+
+CENTS = Decimal('0.01')
+
+SCORE_FIELDS = ('id', 'league_id', 'week', 'home_score', 'away_score', 'is_complete')
+
+
+class Subscriber:
+    __slots__ = ('pending', 'ready')
+
+    def __init__(self):
+        self.pending = {}
+        self.ready = asyncio.Event()
+
+    def push(self, matchup_id, delta):
+        self.pending[matchup_id] = delta
+        self.ready.set()
+
+    def drain(self):
+        self.ready.clear()
+        pending, self.pending = self.pending, {}
+        return pending.values()
+
+
+class ScoreHub:
+    def __init__(self):
+        self.loop = None
+        self.subscribers = defaultdict(set)
+        self.scores = {}
+        self.poller = None
+
+    # Event loop side
+
+    def subscribe(self, league_id, week):
+        self.loop = asyncio.get_running_loop()
+        subscriber = Subscriber()
+        self.subscribers[league_id, week].add(subscriber)
+        if self.poller is None or self.poller.done():
+            self.poller = self.loop.create_task(self._poll())
+        return subscriber
+
+    def unsubscribe(self, league_id, week, subscriber):
+        key = league_id, week
+        listeners = self.subscribers.get(key)
+        if listeners is None:
+            return
+        listeners.discard(subscriber)
+        if not listeners:
+            del self.subscribers[key]
+            self.scores = {
+                matchup_id: score for matchup_id, score in self.scores.items()
+                if score[0] != key
+            }
+
+    def dispatch(self, rows):
+        """Fan changed scores out to the subscribers of their league-week"""
+        for matchup_id, league_id, week, home_score, away_score, is_complete in rows:
+            key = league_id, week
+            listeners = self.subscribers.get(key)
+            if not listeners:
+                continue
+            # Saved instances may hold ints or floats where the poll has Decimals
+            home_score = Decimal(str(home_score)).quantize(CENTS)
+            away_score = Decimal(str(away_score)).quantize(CENTS)
+            score = (key, home_score, away_score, is_complete)
+            if self.scores.get(matchup_id) == score:
+                continue
+            self.scores[matchup_id] = score
+            delta = _delta(matchup_id, home_score, away_score, is_complete)
+            for subscriber in listeners:
+                subscriber.push(matchup_id, delta)
+
+    async def _poll(self):
+        since = timezone.now() - POLL_OVERLAP
+        while self.subscribers:
+            await asyncio.sleep(POLL_INTERVAL)
+            polled_at = timezone.now()
+            rows = await sync_to_async(_changed_scores)(since, list(self.subscribers))
+            since = polled_at - POLL_OVERLAP
+            self.dispatch(rows)
+
+    # Any thread
+
+    def publish(self, matchups):
+        """Push saved matchups to listeners in this process right away"""
+        loop = self.loop
+        if loop is None or loop.is_closed() or not self.subscribers:
+            return
+        rows = [tuple(getattr(matchup, field) for field in SCORE_FIELDS) for matchup in matchups]
+        loop.call_soon_threadsafe(self.dispatch, rows)
+
+
+def _delta(matchup_id, home_score, away_score, is_complete):
+    return {
+        'id': matchup_id,
+        'home_score': str(home_score),
+        'away_score': str(away_score),
+        'is_complete': is_complete,
+    }
+
+
+def _changed_scores(since, keys):
+    """Matchups of the subscribed ``(league_id, week)`` keys updated since ``since``"""
+    leagues = defaultdict(list)
+    for league_id, week in keys:
+        leagues[week].append(league_id)
+    subscribed = Q()
+    for week, league_ids in leagues.items():
+        subscribed |= Q(week=week, league_id__in=league_ids)
+    return list(
+        Matchup.objects.filter(subscribed, updated_at__gte=since).values_list(*SCORE_FIELDS)
+    )
+
+
+def _current_scores(league_id, week):
+    return list(Matchup.objects.filter(league_id=league_id, week=week).values_list(*SCORE_FIELDS))
+
+
+score_hub = ScoreHub()
+
+
+def _event(delta):
+    return f"event: score\ndata: {json.dumps(delta)}\n\n"
+
+
+async def score_stream(request, league_id, week):
+    """Server-sent score deltas for one league-week"""
+    async def events():
+        subscriber = score_hub.subscribe(league_id, week)
+        try:
+            yield 'retry: 5000\n\n'
+            current = await sync_to_async(_current_scores)(league_id, week)
+            for matchup_id, _, _, home_score, away_score, is_complete in current:
+                subscriber.push(matchup_id, _delta(matchup_id, home_score, away_score, is_complete))
+            while True:
+                try:
+                    await asyncio.wait_for(subscriber.ready.wait(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield ''.join(_event(delta) for delta in subscriber.drain())
+        finally:
+            score_hub.unsubscribe(league_id, week, subscriber)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
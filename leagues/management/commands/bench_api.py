@@ -0,0 +1,242 @@
+import http.client
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from leagues.models import FantasyTeam
+
+# Share of requests per endpoint, roughly what the web client sends
+DEFAULT_MIX = {
+    'leagues': 15,
+    'players': 25,
+    'matchups': 25,
+    'roster': 25,
+    'me': 10,
+}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def endpoint_path(name, session, rng, weeks):
+    team_id, league_id = rng.choice(session['teams'])
+    if name == 'leagues':
+        return '/api/leagues/'
+    if name == 'players':
+        return '/api/players/'
+    if name == 'matchups':
+        return f'/api/matchups/?league={league_id}&week={rng.randint(1, weeks)}'
+    if name == 'roster':
+        return f'/api/teams/{team_id}/roster/'
+    return '/api/auth/me/'
+
+
+def parse_mix(value):
+    """``leagues=15,players=25,...`` -> ``{'leagues': 15, ...}``"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in DEFAULT_MIX:
+            raise CommandError(f"Unknown endpoint {name!r}; choose from {', '.join(DEFAULT_MIX)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Command(BaseCommand):
+    help = 'Replay a mix of API traffic against a running server and report latency per endpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--duration', type=float, default=30, help='Seconds to measure')
+        parser.add_argument('--warmup', type=float, default=3, help='Seconds of traffic before measuring')
+        parser.add_argument('--concurrency', type=int, default=8, help='Client threads')
+        parser.add_argument('--sessions', type=int, default=50, help='Seeded users to log in as')
+        parser.add_argument('--password', default='bench', help='Password given to seed_data')
+        parser.add_argument('--auth', choices=['token', 'session'], default='token',
+                            help='Send the bearer token from login, or the session cookie')
+        parser.add_argument('--weeks', type=int, default=14, help='Weeks matchup requests pick from')
+        parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                            help='Endpoint weights, e.g. leagues=15,players=25,matchups=25,roster=25,me=10')
+        parser.add_argument('--output', help='Write the results as a JSON baseline to this file')
+        parser.add_argument('--compare', help='Fail if p95 latency regressed against this baseline')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Allowed p95 slowdown against --compare, as a fraction')
+
+    def handle(self, *args, **options):
+        target = urlsplit(options['url'])
+        sessions = self.login(target, options['sessions'], options['password'], options['auth'])
+        self.stdout.write(
+            f"Logged in {len(sessions)} users ({options['auth']} auth); {options['concurrency']} threads for "
+            f"{options['warmup']:g}s warmup + {options['duration']:g}s"
+        )
+
+        latencies, errors = self.run(target, sessions, options)
+        results = self.summarize(latencies, errors, options)
+        self.report(results)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2)
+            self.stdout.write(f"Baseline written to {options['output']}")
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            self.compare(baseline, results, options['tolerance'])
+
+    def connect(self, target):
+        connection_class = http.client.HTTPSConnection if target.scheme == 'https' else http.client.HTTPConnection
+        return connection_class(target.hostname, target.port, timeout=30)
+
+    def login(self, target, count, password, auth):
+        owners = defaultdict(list)
+        teams = FantasyTeam.objects.filter(owner__username__startswith='bench').values_list(
+            'owner__username', 'id', 'league_id'
+        )
+        for username, team_id, league_id in teams.order_by('?')[:count * 2]:
+            owners[username].append((team_id, league_id))
+        if not owners:
+            raise CommandError('No seeded users found; run seed_data first')
+
+        sessions = []
+        conn = self.connect(target)
+        for username, user_teams in list(owners.items())[:count]:
+            conn.request(
+                'POST', '/api/auth/login/',
+                body=json.dumps({'username': username, 'password': password}),
+                headers={'Content-Type': 'application/json'},
+            )
+            response = conn.getresponse()
+            body = response.read()
+            if response.status != 200:
+                raise CommandError(f"Login as {username} failed with HTTP {response.status}")
+            if auth == 'token':
+                headers = {'Authorization': f"Bearer {json.loads(body)['access']}"}
+            else:
+                cookie = SimpleCookie()
+                for header in response.headers.get_all('Set-Cookie') or []:
+                    cookie.load(header)
+                headers = {'Cookie': '; '.join(f'{key}={morsel.value}' for key, morsel in cookie.items())}
+            sessions.append({'headers': headers, 'teams': user_teams})
+        conn.close()
+        return sessions
+
+    def run(self, target, sessions, options):
+        names = list(options['mix'])
+        weights = [options['mix'][name] for name in names]
+        latencies = [defaultdict(list) for _ in range(options['concurrency'])]
+        errors = [defaultdict(int) for _ in range(options['concurrency'])]
+        started = time.perf_counter()
+        measure_from = started + options['warmup']
+        stop_at = measure_from + options['duration']
+
+        def worker(n):
+            rng = random.Random(n)
+            conn = self.connect(target)
+            while time.perf_counter() < stop_at:
+                session = rng.choice(sessions)
+                name = rng.choices(names, weights)[0]
+                path = endpoint_path(name, session, rng, options['weeks'])
+                sent = time.perf_counter()
+                try:
+                    conn.request('GET', path, headers={**session['headers'], 'Accept': 'application/json'})
+                    response = conn.getresponse()
+                    response.read()
+                    failed = response.status >= 400
+                    if response.will_close:
+                        conn.close()
+                except (OSError, http.client.HTTPException):
+                    failed = True
+                    conn.close()
+                    conn = self.connect(target)
+                elapsed = time.perf_counter() - sent
+                if sent < measure_from:
+                    continue
+                if failed:
+                    errors[n][name] += 1
+                else:
+                    latencies[n][name].append(elapsed)
+            conn.close()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        merged = defaultdict(list)
+        for thread_latencies in latencies:
+            for name, samples in thread_latencies.items():
+                merged[name] += samples
+        failures = defaultdict(int)
+        for thread_errors in errors:
+            for name, count in thread_errors.items():
+                failures[name] += count
+        return merged, failures
+
+    def summarize(self, latencies, errors, options):
+        duration = options['duration']
+        endpoints = {}
+        for name in options['mix']:
+            samples = latencies.get(name, [])
+            endpoints[name] = {
+                'requests': len(samples),
+                'errors': errors.get(name, 0),
+                'throughput': len(samples) / duration,
+                'p50_ms': percentile(samples, 50) * 1000 if samples else None,
+                'p95_ms': percentile(samples, 95) * 1000 if samples else None,
+                'p99_ms': percentile(samples, 99) * 1000 if samples else None,
+                'max_ms': max(samples) * 1000 if samples else None,
+            }
+        every = [s for samples in latencies.values() for s in samples]
+        return {
+            'recorded_at': timezone.now().isoformat(),
+            'url': options['url'],
+            'duration': duration,
+            'concurrency': options['concurrency'],
+            'sessions': options['sessions'],
+            'mix': options['mix'],
+            'total': {
+                'requests': len(every),
+                'errors': sum(errors.values()),
+                'throughput': len(every) / duration,
+                'p50_ms': percentile(every, 50) * 1000 if every else None,
+                'p95_ms': percentile(every, 95) * 1000 if every else None,
+                'p99_ms': percentile(every, 99) * 1000 if every else None,
+            },
+            'endpoints': endpoints,
+        }
+
+    def report(self, results):
+        self.stdout.write(f"{'endpoint':<10} {'req/s':>8} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        rows = list(results['endpoints'].items()) + [('total', results['total'])]
+        for name, row in rows:
+            if not row['requests']:
+                self.stdout.write(f"{name:<10} {'-':>8} {row['errors']:>7}")
+                continue
+            self.stdout.write(
+                f"{name:<10} {row['throughput']:>8.1f} {row['errors']:>7} "
+                f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}"
+            )
+
+    def compare(self, baseline, results, tolerance):
+        regressions = []
+        for name, row in results['endpoints'].items():
+            before = baseline.get('endpoints', {}).get(name)
+            if not before or before['p95_ms'] is None or row['p95_ms'] is None:
+                continue
+            if row['p95_ms'] > before['p95_ms'] * (1 + tolerance):
+                regressions.append(
+                    f"{name}: p95 {before['p95_ms']:.2f} ms -> {row['p95_ms']:.2f} ms"
+                )
+        if regressions:
+            raise CommandError('Latency regressed beyond tolerance:\n  ' + '\n  '.join(regressions))
+        self.stdout.write(self.style.SUCCESS(f"No endpoint regressed by more than {tolerance:.0%} at p95"))
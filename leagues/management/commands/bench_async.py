@@ -0,0 +1,135 @@
+import asyncio
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+
+from leagues import synthetic
+from leagues.models import FantasyTeam
+
+# (name, sync path, async path) templates, formatted with a team and week
+ENDPOINTS = [
+    ('leagues', '/api/leagues/', '/api/async/leagues/'),
+    ('players', '/api/players/?position={position}', '/api/async/players/?position={position}'),
+    ('matchups', '/api/matchups/?league={league}&week={week}', '/api/async/matchups/?league={league}&week={week}'),
+    ('roster', '/api/teams/{team}/roster/', '/api/async/teams/{team}/roster/'),
+    ('me', '/api/auth/me/', '/api/async/auth/me/'),
+]
+POSITIONS = ['QB', 'RB', 'WR', 'TE', 'K', 'DEF']
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def asgi_get(application, path, cookie):
+    """One GET through the ASGI application; returns the status code"""
+    route, _, query = path.partition('?')
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': route,
+        'raw_path': route.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [
+            (b'host', b'localhost'),
+            (b'accept', b'application/json'),
+            (b'cookie', cookie.encode()),
+        ],
+        'client': ('127.0.0.1', 10000),
+        'server': ('localhost', 80),
+    }
+    received = False
+    status = None
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await asyncio.Event().wait()
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+
+    await application(scope, receive, send)
+    return status
+
+
+class Command(BaseCommand):
+    help = 'Compare the sync and async read endpoints under concurrent load through the ASGI app'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leagues', type=int, default=50)
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 100, 500],
+                            help='Requests kept in flight')
+        parser.add_argument('--duration', type=float, default=5, help='Seconds per run')
+
+    def handle(self, *args, **options):
+        from gridiron.asgi import application
+
+        with synthetic.scratch_database():
+            players = synthetic.seed_players()
+            synthetic.seed_leagues(options['leagues'], players, weeks=2)
+            sessions = []
+            for team in FantasyTeam.objects.select_related('owner')[:200]:
+                session = SessionStore()
+                session['_auth_user_id'] = str(team.owner_id)
+                session['_auth_user_backend'] = 'django.contrib.auth.backends.ModelBackend'
+                session['_auth_user_hash'] = team.owner.get_session_auth_hash()
+                session.create()
+                sessions.append((team, f'{settings.SESSION_COOKIE_NAME}={session.session_key}'))
+
+            self.stdout.write(
+                f"{'':>6} {'in flight':>9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>9} {'errors':>7} {'threads':>8}"
+            )
+            for concurrency in options['concurrency']:
+                for mode in ('sync', 'async'):
+                    result = asyncio.run(self.run(application, sessions, mode, concurrency, options['duration']))
+                    latencies, errors, peak_threads = result
+                    self.stdout.write(
+                        f"{mode:>6} {concurrency:>9} {len(latencies) / options['duration']:>8.0f} "
+                        f"{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 99) * 1000:>9.1f} "
+                        f"{errors:>7} {peak_threads:>8}"
+                    )
+
+    async def run(self, application, sessions, mode, concurrency, duration):
+        latencies = []
+        errors = 0
+        peak_threads = threading.active_count()
+        stop_at = time.perf_counter() + duration
+
+        async def client(n):
+            nonlocal errors
+            rng = random.Random(n)
+            while time.perf_counter() < stop_at:
+                team, cookie = rng.choice(sessions)
+                _, sync_path, async_path = rng.choice(ENDPOINTS)
+                path = (sync_path if mode == 'sync' else async_path).format(
+                    team=team.id, league=team.league_id, week=rng.randint(1, 2), position=rng.choice(POSITIONS),
+                )
+                started = time.perf_counter()
+                status = await asgi_get(application, path, cookie)
+                if status != 200:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        async def watch_threads():
+            nonlocal peak_threads
+            while time.perf_counter() < stop_at:
+                peak_threads = max(peak_threads, threading.active_count())
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(watch_threads(), *(client(n) for n in range(concurrency)))
+        return latencies, errors, peak_threads
@@ -0,0 +1,107 @@
+import random
+import threading
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models.functions import Now
+
+from leagues import synthetic
+from leagues.models import FantasyTeam, Matchup
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = 'Measure read throughput with and without a concurrent score writer in a throwaway database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leagues', type=int, default=200)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=5, help='Seconds per phase')
+        parser.add_argument('--batch', type=int, default=20,
+                            help='Leagues whose scores the writer updates per transaction')
+        parser.add_argument('--journal-mode', choices=['wal', 'delete'], default='wal',
+                            help='SQLite journal mode, to compare against the rollback journal')
+
+    def handle(self, *args, **options):
+        with synthetic.scratch_database():
+            if connection.vendor == 'sqlite':
+                # New connections (one per thread) run init_command, so the
+                # journal mode has to be set there as well as now
+                sqlite_options = dict(connection.settings_dict.get('OPTIONS', {}))
+                sqlite_options['init_command'] = f"PRAGMA journal_mode={options['journal_mode']};"
+                connection.settings_dict['OPTIONS'] = sqlite_options
+                with connection.cursor() as cursor:
+                    cursor.execute(f"PRAGMA journal_mode={options['journal_mode']}")
+
+            players = synthetic.seed_players()
+            league_ids = synthetic.seed_leagues(options['leagues'], players, weeks=1)
+            self.stdout.write(
+                f"{len(league_ids)} leagues, {options['readers']} readers, "
+                f"{options['duration']:g}s per phase, journal_mode={options['journal_mode']}"
+            )
+
+            for label, writing in [('readers only', False), ('with writer', True)]:
+                reads, latencies, commits = self.run(league_ids, options, writing)
+                line = (
+                    f"{label:>13}: {reads / options['duration']:,.0f} reads/s  "
+                    f"p50 {percentile(latencies, 50) * 1000:.2f} ms  "
+                    f"p99 {percentile(latencies, 99) * 1000:.2f} ms  "
+                    f"max {max(latencies) * 1000:.2f} ms"
+                )
+                if writing:
+                    line += f"  ({commits / options['duration']:,.1f} writer commits/s)"
+                self.stdout.write(line)
+
+    def run(self, league_ids, options, writing):
+        stop = threading.Event()
+        latencies = [[] for _ in range(options['readers'])]
+        commits = [0]
+
+        def reader(n):
+            # A matchup page: the week's games with both teams
+            rng = random.Random(n)
+            try:
+                while not stop.is_set():
+                    started = time.perf_counter()
+                    list(
+                        Matchup.objects.filter(league_id=rng.choice(league_ids), week=1)
+                        .select_related('home_team', 'away_team')
+                    )
+                    latencies[n].append(time.perf_counter() - started)
+            finally:
+                connection.close()
+
+        def writer():
+            # Live scoring: every matchup and team of a batch of leagues per commit
+            rng = random.Random(-1)
+            try:
+                while not stop.is_set():
+                    batch = rng.sample(league_ids, min(options['batch'], len(league_ids)))
+                    with transaction.atomic():
+                        Matchup.objects.filter(league_id__in=batch).update(
+                            home_score=Decimal(rng.randint(50, 150)),
+                            away_score=Decimal(rng.randint(50, 150)),
+                            updated_at=Now(),
+                        )
+                        FantasyTeam.objects.filter(league_id__in=batch).update(updated_at=Now())
+                    commits[0] += 1
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=reader, args=(n,)) for n in range(options['readers'])]
+        if writing:
+            threads.append(threading.Thread(target=writer))
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        samples = [s for thread_samples in latencies for s in thread_samples]
+        return len(samples), samples, commits[0]
@@ -0,0 +1,95 @@
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from leagues import synthetic
+from leagues.draft import DraftConflict, get_state, start_draft, submit_pick
+from leagues.models import Draft
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Command(BaseCommand):
+    help = 'Load-test concurrent live drafts in a throwaway test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--drafts', type=int, default=200)
+        parser.add_argument('--threads', type=int, default=8)
+        parser.add_argument('--teams', type=int, default=12)
+        parser.add_argument('--rounds', type=int, default=14)
+        parser.add_argument('--rate', type=float, default=200,
+                            help='Target picks/sec across all drafts; 0 submits back to back')
+
+    def handle(self, *args, **options):
+        with synthetic.scratch_database():
+            players = synthetic.seed_players()
+            league_ids = synthetic.seed_leagues(
+                options['drafts'], players, teams_per_league=options['teams'], rosters=False
+            )
+            drafts = Draft.objects.bulk_create(
+                Draft(league_id=league_id, rounds=options['rounds']) for league_id in league_ids
+            )
+            for draft in Draft.objects.select_related('league'):
+                start_draft(draft)
+            draft_ids = [draft.id for draft in drafts]
+            self.stdout.write(f"Running {len(draft_ids)} drafts on {options['threads']} threads")
+
+            started = time.perf_counter()
+            latencies, conflicts = self.run(draft_ids, options['threads'], options['rate'])
+            elapsed = time.perf_counter() - started
+
+            samples = [s for thread_samples in latencies for s in thread_samples]
+            self.stdout.write(
+                f"{len(samples)} picks, {sum(conflicts)} conflicts, {len(samples) / elapsed:,.0f} picks/sec\n"
+                f"p50 {percentile(samples, 50) * 1000:.2f} ms  "
+                f"p95 {percentile(samples, 95) * 1000:.2f} ms  "
+                f"p99 {percentile(samples, 99) * 1000:.2f} ms  "
+                f"max {max(samples) * 1000:.2f} ms"
+            )
+            incomplete = Draft.objects.exclude(status='complete').count()
+            if incomplete:
+                self.stderr.write(f"{incomplete} drafts did not complete")
+
+    def run(self, draft_ids, thread_count, rate):
+        latencies = [[] for _ in range(thread_count)]
+        conflicts = [0] * thread_count
+        interval = thread_count / rate if rate else 0
+
+        def worker(n):
+            # Each thread drives its share of the drafts, interleaving picks
+            mine = draft_ids[n::thread_count]
+            rng = random.Random(n)
+            next_pick = time.perf_counter()
+            try:
+                while mine:
+                    if interval:
+                        next_pick += rng.expovariate(1 / interval)
+                        time.sleep(max(0, next_pick - time.perf_counter()))
+                    draft_id = rng.choice(mine)
+                    state = get_state(draft_id)
+                    team_id = state.on_the_clock
+                    if team_id is None:
+                        mine.remove(draft_id)
+                        continue
+                    started = time.perf_counter()
+                    try:
+                        submit_pick(draft_id, team_id)
+                    except DraftConflict:
+                        conflicts[n] += 1
+                        continue
+                    latencies[n].append(time.perf_counter() - started)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(thread_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return latencies, conflicts
@@ -0,0 +1,73 @@
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+
+from leagues import synthetic
+from leagues.fastjson import encoder_for
+from leagues.serializers import MatchupSerializer, NFLPlayerSerializer
+from leagues.views import matchup_queryset, player_queryset
+
+# (name, serializer, queryset for the list endpoint with no filters)
+LISTS = [
+    ('players', NFLPlayerSerializer, lambda: player_queryset({})),
+    ('matchups', MatchupSerializer, lambda: matchup_queryset({})),
+]
+
+
+def serializer_body(serializer_class, queryset):
+    return JSONRenderer().render(serializer_class(queryset, many=True).data)
+
+
+def streamed_size(serializer_class, queryset):
+    # Consume the chunks the way a response would, without keeping them
+    return sum(len(chunk) for chunk in encoder_for(serializer_class).stream(queryset))
+
+
+def measure(run, repeat):
+    """Best wall time over ``repeat`` runs, then peak traced memory of one more"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(timings), peak
+
+
+class Command(BaseCommand):
+    help = 'Compare the fast JSON path with DRF serializers on the player and matchup lists (throwaway database)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leagues', type=int, default=100)
+        parser.add_argument('--weeks', type=int, default=14)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        with synthetic.scratch_database():
+            players = synthetic.seed_players()
+            synthetic.seed_leagues(options['leagues'], players, weeks=options['weeks'])
+
+            self.stdout.write(
+                f"{'list':<9} {'path':<11} {'rows':>7} {'rows/s':>10} {'ms':>8} {'peak MB':>8}"
+            )
+            for name, serializer_class, queryset in LISTS:
+                rows = queryset().count()
+                body = serializer_body(serializer_class, queryset())
+                if encoder_for(serializer_class).render(queryset()) != body:
+                    raise CommandError(f"The fast {name} output differs from {serializer_class.__name__}")
+                for path, run in [
+                    ('serializer', lambda: serializer_body(serializer_class, queryset())),
+                    ('fast', lambda: streamed_size(serializer_class, queryset())),
+                ]:
+                    best, peak = measure(run, options['repeat'])
+                    self.stdout.write(
+                        f"{name:<9} {path:<11} {rows:>7} {rows / best:>10,.0f} {best * 1000:>8.1f} "
+                        f"{peak / 2 ** 20:>8.1f}"
+                    )
@@ -0,0 +1,155 @@
+import asyncio
+import random
+import time
+import tracemalloc
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand
+from django.db.models import F
+from django.db.models.functions import Now
+
+from leagues import live, synthetic
+from leagues.models import Matchup
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class Stream:
+    """One in-memory ASGI connection to the live score stream"""
+
+    def __init__(self, application, path, number):
+        self.application = application
+        self.scope = {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', b'localhost'), (b'accept', b'text/event-stream')],
+            'client': ('127.0.0.1', 10000 + number),
+            'server': ('localhost', 80),
+        }
+        self.requested = False
+        self.closed = asyncio.Event()
+        self.events = 0
+        self.waiter = None
+        self.task = None
+
+    def open(self):
+        self.task = asyncio.create_task(self.application(self.scope, self.receive, self.send))
+
+    async def receive(self):
+        if not self.requested:
+            self.requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await self.closed.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        if message['type'] != 'http.response.body':
+            return
+        count = message.get('body', b'').count(b'event: score')
+        if count:
+            self.events += count
+            if self.waiter is not None:
+                self.waiter(self, time.perf_counter())
+
+
+class Command(BaseCommand):
+    help = 'Measure live score fan-out latency and memory per SSE connection'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--connections', type=int, default=2000)
+        parser.add_argument('--leagues', type=int, default=20)
+        parser.add_argument('--updates', type=int, default=20,
+                            help='Score updates to time through each delivery path')
+
+    def handle(self, *args, **options):
+        # Importing the entry point sets up the same application a server runs
+        from gridiron.asgi import application
+
+        with synthetic.scratch_database():
+            league_ids = synthetic.seed_leagues(options['leagues'], {}, rosters=False, weeks=1)
+            asyncio.run(self.run(application, league_ids, options))
+
+    async def run(self, application, league_ids, options):
+        count = options['connections']
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        streams = [
+            Stream(application, f'/api/leagues/{league_ids[n % len(league_ids)]}/weeks/1/live/', n)
+            for n in range(count)
+        ]
+        started = time.perf_counter()
+        for stream in streams:
+            stream.open()
+        # Every stream starts with the current score of its league's matchups
+        while sum(1 for stream in streams if stream.events) < count:
+            await asyncio.sleep(0.05)
+        connected = time.perf_counter() - started
+        per_connection = (tracemalloc.get_traced_memory()[0] - before) / count
+        tracemalloc.stop()
+        self.stdout.write(
+            f"{count} connections over {len(league_ids)} league-weeks in {connected:.2f}s, "
+            f"{per_connection / 1024:.1f} KiB per connection"
+        )
+
+        by_league = {}
+        for n, stream in enumerate(streams):
+            by_league.setdefault(league_ids[n % len(league_ids)], []).append(stream)
+        matchups = await sync_to_async(list)(Matchup.objects.filter(week=1))
+        rng = random.Random(0)
+
+        for path in ('signal', 'poll'):
+            latencies = []
+            for _ in range(options['updates']):
+                matchup = rng.choice(matchups)
+                listeners = by_league[matchup.league_id]
+                latencies += await self.time_update(matchup, listeners, path)
+            self.stdout.write(
+                f"{path:>6}: {len(latencies)} deliveries  "
+                f"p50 {percentile(latencies, 50) * 1000:.2f} ms  "
+                f"p99 {percentile(latencies, 99) * 1000:.2f} ms  "
+                f"max {max(latencies) * 1000:.2f} ms"
+            )
+
+        for stream in streams:
+            stream.closed.set()
+        await asyncio.gather(*(stream.task for stream in streams), return_exceptions=True)
+        if live.score_hub.subscribers:
+            self.stderr.write(f"{len(live.score_hub.subscribers)} league-weeks still subscribed")
+
+    async def time_update(self, matchup, listeners, path):
+        """Change one score and time its arrival at every listener"""
+        arrived = {}
+        done = asyncio.Event()
+
+        def waiter(stream, at):
+            arrived.setdefault(stream, at)
+            if len(arrived) == len(listeners):
+                done.set()
+
+        for stream in listeners:
+            stream.waiter = waiter
+        started = time.perf_counter()
+        if path == 'signal':
+            # A save in this process is pushed to the hub by the post_save signal
+            matchup.home_score += Decimal('1.00')
+            await sync_to_async(matchup.save)()
+        else:
+            # Bulk updates, like score_week's, only reach the hub by polling
+            await sync_to_async(
+                Matchup.objects.filter(pk=matchup.pk).update
+            )(away_score=F('away_score') + 1, updated_at=Now())
+        await asyncio.wait_for(done.wait(), live.POLL_INTERVAL + 5)
+        for stream in listeners:
+            stream.waiter = None
+        return [at - started for at in arrived.values()]
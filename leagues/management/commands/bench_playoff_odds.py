@@ -0,0 +1,57 @@
+import os
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from leagues import synthetic
+from leagues.bulk import bulk_write
+from leagues.models import League, Matchup
+from leagues.playoffs import load_inputs, run_simulations
+from leagues.standings import rebuild_standings
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the playoff odds simulator against synthetic leagues (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leagues', type=int, default=200)
+        parser.add_argument('--teams', type=int, default=12)
+        parser.add_argument('--weeks', type=int, default=14)
+        parser.add_argument('--played', type=int, default=7, help='Weeks already complete')
+        parser.add_argument('--simulations', type=int, default=10000)
+        parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            league_ids = synthetic.seed_leagues(
+                options['leagues'], {}, teams_per_league=options['teams'], rosters=False,
+                weeks=options['weeks'],
+            )
+            rng = random.Random(0)
+            played = list(Matchup.objects.filter(week__lte=options['played']))
+            for matchup in played:
+                matchup.home_score = Decimal(f'{rng.gauss(100, 25):.2f}')
+                matchup.away_score = Decimal(f'{rng.gauss(100, 25):.2f}')
+                matchup.is_complete = True
+            bulk_write(Matchup, played, ['home_score', 'away_score', 'is_complete'])
+            leagues = League.objects.filter(id__in=league_ids)
+            rebuild_standings(leagues)
+
+            started = time.perf_counter()
+            inputs = load_inputs(leagues)
+            self.stdout.write(f"Loaded {len(inputs)} leagues in {time.perf_counter() - started:.2f}s")
+            transaction.set_rollback(True)
+
+        simulations = options['simulations']
+        total = len(inputs) * simulations
+        for processes in sorted({1, options['processes']}):
+            started = time.perf_counter()
+            run_simulations(inputs, simulations, processes)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(
+                f"{processes} process{'es' if processes > 1 else ''}: {total:,} seasons in {elapsed:.2f}s, "
+                f"{total / elapsed:,.0f} seasons/s, {total / elapsed / processes:,.0f} per core"
+            )
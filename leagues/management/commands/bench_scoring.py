@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from leagues import synthetic
+from leagues.scoring import score_week
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the weekly scoring engine against synthetic leagues (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leagues', type=int, default=10000)
+        parser.add_argument('--teams', type=int, default=12)
+        parser.add_argument('--season', type=int, default=2024)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        season = options['season']
+        with transaction.atomic():
+            started = time.perf_counter()
+            players = synthetic.seed_players()
+            synthetic.seed_leagues(
+                options['leagues'], players, teams_per_league=options['teams'],
+                season_year=season, weeks=1,
+            )
+            synthetic.seed_week_stats(season, 1)
+            self.stdout.write(f"Seeded {options['leagues']} leagues in {time.perf_counter() - started:.1f}s")
+
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                result = score_week(season, 1)
+                timings.append(time.perf_counter() - started)
+
+            best = min(timings)
+            self.stdout.write(
+                f"Scored {result['matchups']} matchups in {best:.3f}s "
+                f"(best of {len(timings)}, {result['matchups'] / best:,.0f} matchups/s)"
+            )
+            transaction.set_rollback(True)
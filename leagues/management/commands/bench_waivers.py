@@ -0,0 +1,78 @@
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models.functions import Now
+
+from leagues import synthetic
+from leagues.bulk import writer_lock
+from leagues.management.commands.process_waivers import report
+from leagues.models import FantasyTeam, League, Roster, WaiverClaim
+from leagues.waivers import process_waivers
+
+
+class Command(BaseCommand):
+    help = 'Benchmark overnight waiver processing in a throwaway test database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leagues', type=int, default=500)
+        parser.add_argument('--teams', type=int, default=12)
+        parser.add_argument('--claims', type=int, default=4, help='Claims per team')
+        parser.add_argument('--contention', action='store_true',
+                            help='Run lineup-style roster writes alongside to measure lock wait')
+
+    def handle(self, *args, **options):
+        with synthetic.scratch_database():
+            players = synthetic.seed_players()
+            league_ids = synthetic.seed_leagues(options['leagues'], players, teams_per_league=options['teams'])
+            self.seed_claims(league_ids, players, options['claims'])
+
+            stop = threading.Event()
+            writer = threading.Thread(target=self.contend, args=(league_ids, stop))
+            if options['contention']:
+                writer.start()
+            try:
+                run = process_waivers(League.objects.filter(id__in=league_ids))
+            finally:
+                stop.set()
+                if writer.is_alive():
+                    writer.join()
+            report(self.stdout, run)
+
+    def seed_claims(self, league_ids, players, per_team):
+        rng = random.Random(0)
+        free_pool = [player_id for ids in players.values() for player_id in ids]
+        claims = []
+        with transaction.atomic():
+            rosters = {}
+            for team_id, player_id in Roster.objects.filter(
+                fantasy_team__league_id__in=league_ids
+            ).values_list('fantasy_team_id', 'player_id'):
+                rosters.setdefault(team_id, []).append(player_id)
+            for team_id, league_id in FantasyTeam.objects.filter(
+                league_id__in=league_ids
+            ).values_list('id', 'league_id'):
+                # Claims draw on the top quarter of the pool so teams collide
+                for rank in range(per_team):
+                    claims.append(WaiverClaim(
+                        league_id=league_id,
+                        fantasy_team_id=team_id,
+                        player_id=rng.choice(free_pool[:len(free_pool) // 4]),
+                        drop_player_id=rng.choice(rosters[team_id]),
+                        rank=rank,
+                    ))
+            WaiverClaim.objects.bulk_create(claims, batch_size=synthetic.BATCH_SIZE)
+        self.stdout.write(f"Seeded {len(claims)} claims over {len(league_ids)} leagues")
+
+    def contend(self, league_ids, stop):
+        """Write random leagues' team rows the way roster moves would"""
+        rng = random.Random(1)
+        try:
+            while not stop.is_set():
+                with writer_lock(), transaction.atomic():
+                    FantasyTeam.objects.filter(league_id=rng.choice(league_ids)).update(updated_at=Now())
+                    time.sleep(0.002)
+        finally:
+            connection.close()
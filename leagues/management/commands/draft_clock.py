@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from leagues.draft import expire_clocks
+
+
+class Command(BaseCommand):
+    help = 'Autopick for teams whose draft clock has run out, polling until interrupted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds between sweeps')
+        parser.add_argument('--once', action='store_true', help='Run a single sweep and exit')
+
+    def handle(self, *args, **options):
+        while True:
+            made = expire_clocks()
+            if made:
+                self.stdout.write(f"Autopicked {made} players")
+            if options['once']:
+                break
+            time.sleep(options['interval'])
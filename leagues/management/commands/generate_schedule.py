@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from leagues.models import League
+from leagues.schedule import ScheduleError, generate_schedule, schedule_season
+
+
+class Command(BaseCommand):
+    help = 'Generate round-robin regular-season schedules for one league or a whole season'
+
+    def add_arguments(self, parser):
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument('--league', type=int, help='League id')
+        target.add_argument('--season', type=int, help='Schedule every unscheduled league of this season')
+        parser.add_argument('--weeks', type=int, help="Defaults to each league's regular_season_weeks")
+        parser.add_argument('--division-games', type=int, default=1,
+                            help='Times each pair of division rivals meets')
+        parser.add_argument('--replace', action='store_true',
+                            help='Replace unplayed matchups (single league only)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['league']:
+            try:
+                league = League.objects.get(pk=options['league'])
+                matchups = generate_schedule(
+                    league, weeks=options['weeks'], division_games=options['division_games'],
+                    replace=options['replace'],
+                )
+            except (League.DoesNotExist, ScheduleError) as exc:
+                raise CommandError(exc)
+            leagues = 1
+            matchups = len(matchups)
+        else:
+            leagues, matchups = schedule_season(
+                options['season'], weeks=options['weeks'], division_games=options['division_games']
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {matchups} matchups for {leagues} leagues in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,47 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from leagues.ingest import StatIngester, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Stream weekly player stats and injury updates from a CSV or NDJSON feed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Feed file, or '-' for stdin")
+        parser.add_argument('--season', type=int, required=True)
+        parser.add_argument('--format', choices=['csv', 'ndjson'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        fmt = options['format']
+        if fmt is None:
+            if path.endswith('.csv'):
+                fmt = 'csv'
+            elif path.endswith(('.ndjson', '.jsonl')):
+                fmt = 'ndjson'
+            else:
+                raise CommandError('Cannot infer the feed format; pass --format')
+
+        ingester = StatIngester(options['season'], batch_size=options['batch_size'])
+        started = time.perf_counter()
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            counts = ingester.ingest(read_rows(stream, fmt))
+        except (KeyError, ValueError) as exc:
+            raise CommandError(f"Bad row after {ingester.counts['rows']} rows: {exc!r}")
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {counts['rows']} rows in {elapsed:.2f}s "
+            f"({counts['rows'] / elapsed if elapsed else 0:,.0f} rows/sec): "
+            f"{counts['created']} created, {counts['updated']} updated, "
+            f"{counts['unchanged']} unchanged, {counts['injuries']} injury updates, "
+            f"{counts['skipped']} skipped"
+        ))
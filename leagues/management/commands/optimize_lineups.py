@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from leagues.lineups import optimize_teams
+from leagues.models import FantasyTeam
+
+
+class Command(BaseCommand):
+    help = "Set every team's highest-projected legal lineup for a week"
+
+    def add_arguments(self, parser):
+        parser.add_argument('season_year', type=int)
+        parser.add_argument('week', type=int)
+        parser.add_argument('--league', type=int, action='append', dest='leagues',
+                            help='Only this league id (repeatable)')
+
+    def handle(self, *args, **options):
+        teams = FantasyTeam.objects.filter(
+            league__season_year=options['season_year'], league__is_active=True
+        )
+        if options['leagues']:
+            teams = teams.filter(league_id__in=options['leagues'])
+        started = time.perf_counter()
+        count, changed = optimize_teams(teams, options['week'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Optimized {count} lineups ({changed} roster moves) in {elapsed:.1f}s"
+        ))
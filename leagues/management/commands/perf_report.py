@@ -0,0 +1,45 @@
+import json
+
+from django.core.management.base import BaseCommand
+
+from leagues.instrumentation import PHASES, load_stats, reset_stats, summarize
+
+
+def _ms(value):
+    return f'{value:.1f}' if value is not None else '-'
+
+
+class Command(BaseCommand):
+    help = 'Show per-view timing histograms collected by PerformanceMiddleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--view', help='Only views whose name contains this')
+        parser.add_argument('--json', action='store_true', help='Print the full rows, histograms included')
+        parser.add_argument('--reset', action='store_true', help='Discard the collected stats afterwards')
+
+    def handle(self, *args, **options):
+        rows = summarize(load_stats())
+        if options['view']:
+            rows = [row for row in rows if options['view'] in row['view']]
+
+        if options['json']:
+            self.stdout.write(json.dumps(rows, indent=2))
+        elif not rows:
+            self.stdout.write('No sampled requests yet')
+        else:
+            self.stdout.write(
+                f"{'view':<40} {'reqs':>6} {'queries':>8} {'dup':>5} "
+                + ' '.join(f'{phase:>9}' for phase in PHASES)
+                + f" {'p50 <=':>7} {'p95 <=':>7} {'p99 <=':>7}"
+            )
+            for row in rows:
+                self.stdout.write(
+                    f"{row['view'][:40]:<40} {row['requests']:>6} {row['mean_queries']:>8.1f} {row['duplicated']:>5} "
+                    + ' '.join(f"{row['mean_ms'][phase]:>9.2f}" for phase in PHASES)
+                    + f" {_ms(row['p50_ms']):>7} {_ms(row['p95_ms']):>7} {_ms(row['p99_ms']):>7}"
+                )
+            self.stdout.write('Phase columns are mean ms; percentiles are histogram bucket bounds in ms')
+
+        if options['reset']:
+            reset_stats()
+            self.stdout.write('Stats reset')
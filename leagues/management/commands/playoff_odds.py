@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from leagues.models import League
+from leagues.playoffs import DEFAULT_SIMULATIONS, simulate_leagues
+
+
+class Command(BaseCommand):
+    help = 'Simulate the rest of the season and store playoff and championship odds'
+
+    def add_arguments(self, parser):
+        parser.add_argument('season_year', type=int)
+        parser.add_argument('--league', type=int, action='append', dest='leagues',
+                            help='Only this league id (repeatable)')
+        parser.add_argument('--simulations', type=int, default=DEFAULT_SIMULATIONS)
+        parser.add_argument('--processes', type=int, default=None,
+                            help='Worker processes (default: one per CPU)')
+
+    def handle(self, *args, **options):
+        leagues = League.objects.filter(season_year=options['season_year'], is_active=True)
+        if options['leagues']:
+            leagues = leagues.filter(id__in=options['leagues'])
+        teams = simulate_leagues(leagues, options['simulations'], options['processes'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Stored odds for {teams} teams from {options['simulations']:,} simulations each"
+        ))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from leagues.models import League
+from leagues.waivers import process_waivers
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))] if ordered else 0.0
+
+
+class Command(BaseCommand):
+    help = 'Process pending waiver claims in priority order, one transaction per league'
+
+    def add_arguments(self, parser):
+        parser.add_argument('season_year', type=int)
+        parser.add_argument('--league', type=int, action='append', dest='leagues',
+                            help='Only this league id (repeatable)')
+        parser.add_argument('--window', type=float, default=None,
+                            help='Seconds the run must finish in; exits non-zero if exceeded')
+
+    def handle(self, *args, **options):
+        leagues = League.objects.filter(season_year=options['season_year'], is_active=True)
+        if options['leagues']:
+            leagues = leagues.filter(id__in=options['leagues'])
+        run = process_waivers(leagues)
+        report(self.stdout, run)
+        if options['window'] is not None and run.elapsed > options['window']:
+            raise CommandError(f"Run took {run.elapsed:.1f}s, over the {options['window']:.0f}s window")
+
+
+def report(stdout, run):
+    stdout.write(
+        f"{run.leagues} leagues, {run.claims} claims ({run.won} won, {run.lost} lost, "
+        f"{run.invalid} invalid) in {run.elapsed:.2f}s, {run.claims_per_second:,.0f} claims/s\n"
+        f"lock wait {run.lock_wait * 1000:.1f} ms total, "
+        f"p99 {percentile(run.lock_waits, 99) * 1000:.2f} ms, max {run.max_lock_wait * 1000:.2f} ms"
+    )
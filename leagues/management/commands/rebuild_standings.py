@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from leagues.models import League
+from leagues.standings import rebuild_standings
+
+CHUNK_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = 'Rebuild team standings from completed matchups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--league', type=int, action='append', dest='leagues', help='League id (repeatable)')
+        parser.add_argument('--season', type=int)
+
+    def handle(self, *args, **options):
+        leagues = League.objects.order_by('id')
+        if options['leagues']:
+            leagues = leagues.filter(id__in=options['leagues'])
+        if options['season']:
+            leagues = leagues.filter(season_year=options['season'])
+
+        league_ids = list(leagues.values_list('id', flat=True))
+        teams = 0
+        # One transaction per chunk keeps lock times short on large runs
+        for i in range(0, len(league_ids), CHUNK_SIZE):
+            teams += rebuild_standings(League.objects.filter(id__in=league_ids[i:i + CHUNK_SIZE]))
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt standings for {teams} teams in {len(league_ids)} leagues"
+        ))
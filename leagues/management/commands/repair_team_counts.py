@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from leagues.membership import repair_team_counts
+from leagues.models import League
+
+
+class Command(BaseCommand):
+    help = 'Reset League.team_count wherever it has drifted from the FantasyTeam rows'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--league', type=int, action='append', dest='leagues', help='League id (repeatable)')
+        parser.add_argument('--season', type=int)
+
+    def handle(self, *args, **options):
+        leagues = League.objects.all()
+        if options['leagues']:
+            leagues = leagues.filter(id__in=options['leagues'])
+        if options['season']:
+            leagues = leagues.filter(season_year=options['season'])
+
+        drifted = repair_team_counts(leagues)
+        for league_id, stored, actual in drifted:
+            self.stdout.write(f"League {league_id}: team_count {stored} -> {actual}")
+        self.stdout.write(self.style.SUCCESS(f"Repaired {len(drifted)} leagues"))
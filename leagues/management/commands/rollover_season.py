@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from leagues.archive import CHUNK_SIZE, rollover_season
+from leagues.models import League
+
+
+class Command(BaseCommand):
+    help = "Archive a finished season's leagues and renew them into the next season"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--season', type=int, required=True, help='Season to archive')
+        parser.add_argument('--to', type=int, dest='to_season', help='New season (default: the next one)')
+        parser.add_argument('--league', type=int, action='append', dest='leagues', help='League id (repeatable)')
+        parser.add_argument('--include-unfinished', action='store_true',
+                            help='Also archive leagues with matchups left to play')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        leagues = League.objects.all()
+        if options['leagues']:
+            leagues = leagues.filter(id__in=options['leagues'])
+
+        archived, renewed, skipped = rollover_season(
+            options['season'], to_season=options['to_season'], leagues=leagues,
+            include_unfinished=options['include_unfinished'], chunk_size=options['chunk_size'],
+        )
+        if skipped:
+            self.stdout.write(self.style.WARNING(f"Skipped {skipped} leagues with matchups left to play"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} leagues and renewed {renewed} "
+            f"in {time.perf_counter() - started:.2f}s"
+        ))
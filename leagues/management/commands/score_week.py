@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from leagues.scoring import refresh_player_totals, score_week
+
+
+class Command(BaseCommand):
+    help = 'Score every matchup for a week from the stored player stat lines'
+
+    def add_arguments(self, parser):
+        parser.add_argument('season_year', type=int)
+        parser.add_argument('week', type=int)
+        parser.add_argument(
+            '--complete', action='store_true',
+            help='Mark the week final and apply it to team standings',
+        )
+        parser.add_argument(
+            '--refresh-totals', action='store_true',
+            help='Also rebuild every player season total from stored stat lines',
+        )
+
+    def handle(self, *args, **options):
+        result = score_week(options['season_year'], options['week'], complete=options['complete'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {result['stat_lines']} stat lines and {result['matchups']} matchups, "
+            f"applied {result['standings']} to standings"
+        ))
+        if options['refresh_totals']:
+            players = refresh_player_totals(options['season_year'])
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt season totals for {players} players"))
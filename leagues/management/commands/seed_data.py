@@ -0,0 +1,58 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from leagues import synthetic
+from leagues.models import NFLPlayer
+
+
+class Command(BaseCommand):
+    help = 'Seed the database with synthetic users, leagues, rosters and a season of matchups'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--leagues', type=int, default=100)
+        parser.add_argument('--teams', type=int, default=12, help='Teams (and owners) per league')
+        parser.add_argument('--weeks', type=int, default=14, help='Weeks of matchups per league')
+        parser.add_argument('--users', type=int, default=0,
+                            help='Extra users with no team, on top of the league owners')
+        parser.add_argument('--season', type=int, default=2024)
+        parser.add_argument('--password', default='bench',
+                            help='Password for every seeded user, used by bench_api to log in')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rng = random.Random(options['seed'])
+        # Hashing once keeps seeding fast; every user shares the hash
+        password = make_password(options['password'])
+
+        with transaction.atomic():
+            if NFLPlayer.objects.exists():
+                players = {}
+                for player_id, position in NFLPlayer.objects.filter(is_active=True).values_list('id', 'position'):
+                    players.setdefault(position, []).append(player_id)
+            else:
+                players = synthetic.seed_players(rng)
+            league_ids = synthetic.seed_leagues(
+                options['leagues'], players, teams_per_league=options['teams'],
+                season_year=options['season'], weeks=options['weeks'], rng=rng, password=password,
+            )
+
+            User = get_user_model()
+            start = User.objects.count()
+            User.objects.bulk_create(
+                [
+                    User(username=f'bench{start + i}', email=f'bench{start + i}@example.com', password=password)
+                    for i in range(options['users'])
+                ],
+                batch_size=synthetic.BATCH_SIZE,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(league_ids)} leagues, {len(league_ids) * options['teams'] + options['users']} users "
+            f"and {sum(len(ids) for ids in players.values())} players in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,84 @@
+"""
+League membership and the stored team counter.
+
+``League.team_count`` mirrors the league's FantasyTeam rows, so a join
+claims its spot with one conditional UPDATE (``team_count < max_teams``).
+Two people racing for the last spot cannot both pass it, and no lock or
+extra count query is needed. The team row is inserted in the same
+transaction. If the insert fails, for instance on the one-team-per-owner
+constraint, the claimed spot is rolled back with it.
+
+Deleting a team gives its spot back through a signal. Paths that create or
+move teams without going through here (bulk seeding, the admin) keep the
+counter themselves, and ``repair_team_counts`` puts right any drift.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+
+from .models import FantasyTeam, League
+
+
+class JoinError(Exception):
+    pass
+
+
+class LeagueFull(JoinError):
+    pass
+
+
+class AlreadyMember(JoinError):
+    pass
+
+
+def join_league(league, user, team_name):
+    """Create ``user``'s team in ``league`` if a spot is free"""
+    with transaction.atomic():
+        claimed = League.objects.filter(pk=league.pk, team_count__lt=F('max_teams')).update(
+            team_count=F('team_count') + 1, updated_at=Now()
+        )
+        if not claimed:
+            if FantasyTeam.objects.filter(league=league, owner=user).exists():
+                raise AlreadyMember()
+            raise LeagueFull()
+        try:
+            team = FantasyTeam.objects.create(name=team_name, owner=user, league=league)
+        except IntegrityError:
+            raise AlreadyMember()
+    league.team_count += 1
+    return team
+
+
+def team_added(league_id):
+    League.objects.filter(pk=league_id).update(team_count=F('team_count') + 1, updated_at=Now())
+
+
+def team_removed(league_id):
+    League.objects.filter(pk=league_id, team_count__gt=0).update(
+        team_count=F('team_count') - 1, updated_at=Now()
+    )
+
+
+def repair_team_counts(leagues=None):
+    """Reset drifted counters from the FantasyTeam rows.
+
+    Returns ``[(league_id, stored, actual)]`` for every league fixed.
+    """
+    leagues = League.objects.all() if leagues is None else leagues
+    actual = Coalesce(
+        Subquery(
+            FantasyTeam.objects.filter(league=OuterRef('pk')).order_by()
+            .values('league').annotate(teams=Count('pk')).values('teams')
+        ),
+        0,
+    )
+    with transaction.atomic():
+        drifted = list(
+            leagues.annotate(actual=actual).exclude(team_count=F('actual'))
+            .values_list('id', 'team_count', 'actual')
+        )
+        if drifted:
+            League.objects.filter(pk__in=[league_id for league_id, _, _ in drifted]).update(
+                team_count=actual, updated_at=Now()
+            )
+    return drifted
@@ -0,0 +1,57 @@
+# Generated by Django 6.0 on 2026-10-18 20:36
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='league',
+            name='scoring_rules',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AlterField(
+            model_name='league',
+            name='league_type',
+            field=models.CharField(choices=[('standard', 'Standard'), ('ppr', 'PPR'), ('half_ppr', 'Half PPR'), ('dynasty', 'Dynasty'), ('keeper', 'Keeper'), ('custom', 'Custom')], default='standard', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='PlayerWeekStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('season_year', models.PositiveIntegerField()),
+                ('week', models.PositiveIntegerField()),
+                ('passing_yards', models.IntegerField(default=0)),
+                ('passing_tds', models.IntegerField(default=0)),
+                ('interceptions', models.IntegerField(default=0)),
+                ('rushing_yards', models.IntegerField(default=0)),
+                ('rushing_tds', models.IntegerField(default=0)),
+                ('receptions', models.IntegerField(default=0)),
+                ('receiving_yards', models.IntegerField(default=0)),
+                ('receiving_tds', models.IntegerField(default=0)),
+                ('fumbles_lost', models.IntegerField(default=0)),
+                ('two_point_conversions', models.IntegerField(default=0)),
+                ('field_goals_made', models.IntegerField(default=0)),
+                ('extra_points_made', models.IntegerField(default=0)),
+                ('sacks', models.IntegerField(default=0)),
+                ('defensive_interceptions', models.IntegerField(default=0)),
+                ('fumble_recoveries', models.IntegerField(default=0)),
+                ('defensive_tds', models.IntegerField(default=0)),
+                ('safeties', models.IntegerField(default=0)),
+                ('fantasy_points', models.DecimalField(decimal_places=2, default=0.0, max_digits=8)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='week_stats', to='leagues.nflplayer')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['season_year', 'week'], name='leagues_pla_season__5698e1_idx')],
+                'unique_together': {('player', 'season_year', 'week')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 20:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0002_player_week_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='nflplayer',
+            name='games_played',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
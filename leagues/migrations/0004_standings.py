@@ -0,0 +1,29 @@
+# Generated by Django 6.0 on 2026-10-18 20:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0003_player_games_played'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchup',
+            name='applied_away_score',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True),
+        ),
+        migrations.AddField(
+            model_name='matchup',
+            name='applied_home_score',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='fantasyteam',
+            index=models.Index(fields=['league', '-wins', '-points_for'], name='leagues_fan_league__91fcc9_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 20:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0004_standings'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fantasyteam',
+            name='division',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='league',
+            name='regular_season_weeks',
+            field=models.PositiveIntegerField(default=14),
+        ),
+    ]
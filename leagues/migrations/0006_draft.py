@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-18 20:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0005_schedule_settings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Draft',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('draft_type', models.CharField(choices=[('snake', 'Snake'), ('linear', 'Linear')], default='snake', max_length=10)),
+                ('status', models.CharField(choices=[('scheduled', 'Scheduled'), ('in_progress', 'In Progress'), ('complete', 'Complete')], default='scheduled', max_length=20)),
+                ('rounds', models.PositiveIntegerField(default=14)),
+                ('pick_seconds', models.PositiveIntegerField(default=90)),
+                ('order', models.JSONField(default=list)),
+                ('current_pick', models.PositiveIntegerField(default=1)),
+                ('pick_deadline', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('league', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='draft', to='leagues.league')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DraftPick',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('overall_pick', models.PositiveIntegerField()),
+                ('is_autopick', models.BooleanField(default=False)),
+                ('picked_at', models.DateTimeField(auto_now_add=True)),
+                ('draft', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='picks', to='leagues.draft')),
+                ('fantasy_team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='draft_picks', to='leagues.fantasyteam')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='draft_picks', to='leagues.nflplayer')),
+            ],
+            options={
+                'ordering': ['overall_pick'],
+                'unique_together': {('draft', 'overall_pick'), ('draft', 'player')},
+            },
+        ),
+    ]
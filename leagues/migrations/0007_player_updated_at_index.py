@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 21:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0006_draft'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='nflplayer',
+            index=models.Index(fields=['updated_at'], name='leagues_nfl_updated_dc89c3_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 21:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0007_player_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='matchup',
+            index=models.Index(fields=['updated_at'], name='leagues_mat_updated_de29fd_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 21:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0008_matchup_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='league',
+            name='playoff_teams',
+            field=models.PositiveIntegerField(default=4),
+        ),
+        migrations.CreateModel(
+            name='PlayoffOdds',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('playoffs', models.FloatField(default=0)),
+                ('championship', models.FloatField(default=0)),
+                ('projected_wins', models.FloatField(default=0)),
+                ('simulations', models.PositiveIntegerField(default=0)),
+                ('computed_at', models.DateTimeField()),
+                ('fantasy_team', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='playoff_odds', to='leagues.fantasyteam')),
+            ],
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0 on 2026-10-18 21:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0009_playoff_odds'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fantasyteam',
+            name='waiver_priority',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='WaiverClaim',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveIntegerField(default=0)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('won', 'Won'), ('lost', 'Lost'), ('invalid', 'Invalid')], default='pending', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('drop_player', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='waiver_drops', to='leagues.nflplayer')),
+                ('fantasy_team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waiver_claims', to='leagues.fantasyteam')),
+                ('league', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waiver_claims', to='leagues.league')),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='waiver_claims', to='leagues.nflplayer')),
+            ],
+            options={
+                'ordering': ['rank', 'created_at', 'id'],
+                'indexes': [models.Index(fields=['league', 'status'], name='leagues_wai_league__e4d4bd_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 21:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0010_waivers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='league',
+            name='roster_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
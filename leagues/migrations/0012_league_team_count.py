@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 21:30
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_teams(apps, schema_editor):
+    League = apps.get_model('leagues', 'League')
+    FantasyTeam = apps.get_model('leagues', 'FantasyTeam')
+    teams = (
+        FantasyTeam.objects.filter(league=OuterRef('pk'))
+        .order_by().values('league').annotate(n=Count('pk')).values('n')
+    )
+    League.objects.update(team_count=Coalesce(Subquery(teams), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0011_league_roster_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='league',
+            name='team_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_teams, migrations.RunPython.noop),
+    ]
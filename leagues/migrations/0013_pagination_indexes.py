@@ -0,0 +1,27 @@
+# Generated by Django 6.0 on 2026-10-18 21:46
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0012_league_team_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='league',
+            index=models.Index(fields=['created_at', 'id'], name='leagues_lea_created_917c1f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='matchup',
+            index=models.Index(fields=['week', 'id'], name='leagues_mat_week_35c36c_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='nflplayer',
+            index=models.Index(fields=['position', 'name', 'id'], name='leagues_nfl_positio_224d9a_idx'),
+        ),
+    ]
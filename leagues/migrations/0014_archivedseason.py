@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 21:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('leagues', '0013_pagination_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedSeason',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('league_id', models.PositiveIntegerField(unique=True)),
+                ('season_year', models.PositiveIntegerField()),
+                ('name', models.CharField(max_length=100)),
+                ('league_type', models.CharField(choices=[('standard', 'Standard'), ('ppr', 'PPR'), ('half_ppr', 'Half PPR'), ('dynasty', 'Dynasty'), ('keeper', 'Keeper'), ('custom', 'Custom')], max_length=20)),
+                ('team_count', models.PositiveIntegerField(default=0)),
+                ('document', models.BinaryField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('commissioner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_seasons', to=settings.AUTH_USER_MODEL)),
+                ('successor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_seasons', to='leagues.league')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['season_year', 'id'], name='leagues_arc_season__98773a_idx')],
+            },
+        ),
+    ]
@@ -1,7 +1,21 @@
 from django.db import models
+from django.db.models import F, Prefetch
 from django.conf import settings
 
 
+class LeagueQuerySet(models.QuerySet):
+    def with_team_counts(self):
+        """Annotate team count and open spots from the stored counter"""
+        return self.annotate(
+            num_teams=F('team_count'),
+            open_spots=F('max_teams') - F('team_count'),
+        )
+
+    def with_related(self):
+        """Load the commissioner and team counts alongside each league"""
+        return self.select_related('commissioner').with_team_counts()
+
+
 class League(models.Model):
     """Fantasy football league"""
     LEAGUE_TYPES = [
@@ -10,6 +24,7 @@ class League(models.Model):
         ('half_ppr', 'Half PPR'),
         ('dynasty', 'Dynasty'),
         ('keeper', 'Keeper'),
+        ('custom', 'Custom'),
     ]
 
     SCORING_TYPES = [
@@ -32,21 +47,36 @@ class League(models.Model):
     prize_pool = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     draft_date = models.DateTimeField(blank=True, null=True)
     season_year = models.PositiveIntegerField(default=2024)
+    regular_season_weeks = models.PositiveIntegerField(default=14)
+    playoff_teams = models.PositiveIntegerField(default=4)
+    # FantasyTeam rows in the league, maintained by leagues.membership
+    team_count = models.PositiveIntegerField(default=0)
+    # Bumped whenever a roster in the league gains or loses a player
+    roster_version = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
 
+    # Stat weight overrides for custom leagues, e.g. {"receptions": 0.75}
+    scoring_rules = models.JSONField(default=dict, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = LeagueQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} ({self.season_year})"
 
     @property
     def current_team_count(self):
-        return self.teams.count()
+        return self.team_count
 
     @property
     def spots_available(self):
-        return self.max_teams - self.current_team_count
+        return self.max_teams - self.team_count
+
+    class Meta:
+        # Keyset pagination order (leagues.pagination)
+        indexes = [models.Index(fields=['created_at', 'id'])]
 
 
 class NFLPlayer(models.Model):
@@ -107,6 +137,7 @@ class NFLPlayer(models.Model):
     # Season stats (updated weekly)
     points_total = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     average_points = models.DecimalField(max_digits=6, decimal_places=2, default=0.00)
+    games_played = models.PositiveIntegerField(default=0)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -116,6 +147,65 @@ class NFLPlayer(models.Model):
 
     class Meta:
         ordering = ['position', 'name']
+        indexes = [
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['position', 'name', 'id']),
+        ]
+
+
+class PlayerWeekStats(models.Model):
+    """Raw stat line for one player in one week"""
+    player = models.ForeignKey(
+        NFLPlayer,
+        on_delete=models.CASCADE,
+        related_name='week_stats'
+    )
+    season_year = models.PositiveIntegerField()
+    week = models.PositiveIntegerField()
+
+    # Offense
+    passing_yards = models.IntegerField(default=0)
+    passing_tds = models.IntegerField(default=0)
+    interceptions = models.IntegerField(default=0)
+    rushing_yards = models.IntegerField(default=0)
+    rushing_tds = models.IntegerField(default=0)
+    receptions = models.IntegerField(default=0)
+    receiving_yards = models.IntegerField(default=0)
+    receiving_tds = models.IntegerField(default=0)
+    fumbles_lost = models.IntegerField(default=0)
+    two_point_conversions = models.IntegerField(default=0)
+
+    # Kicking
+    field_goals_made = models.IntegerField(default=0)
+    extra_points_made = models.IntegerField(default=0)
+
+    # Defense/Special Teams
+    sacks = models.IntegerField(default=0)
+    defensive_interceptions = models.IntegerField(default=0)
+    fumble_recoveries = models.IntegerField(default=0)
+    defensive_tds = models.IntegerField(default=0)
+    safeties = models.IntegerField(default=0)
+
+    # Points under standard scoring, set by the scoring engine
+    fantasy_points = models.DecimalField(max_digits=8, decimal_places=2, default=0.00)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.player.name} - {self.season_year} week {self.week}"
+
+    class Meta:
+        unique_together = ['player', 'season_year', 'week']
+        indexes = [models.Index(fields=['season_year', 'week'])]
+
+
+class FantasyTeamQuerySet(models.QuerySet):
+    def with_related(self):
+        """Load owners and leagues (with team counts) in a constant number of queries"""
+        return self.select_related('owner').prefetch_related(
+            Prefetch('league', queryset=League.objects.with_related())
+        )
 
 
 class FantasyTeam(models.Model):
@@ -131,6 +221,9 @@ class FantasyTeam(models.Model):
         on_delete=models.CASCADE,
         related_name='teams'
     )
+    division = models.PositiveSmallIntegerField(blank=True, null=True)
+    # Lower claims first; unset means reverse standings order
+    waiver_priority = models.PositiveIntegerField(blank=True, null=True)
     wins = models.PositiveIntegerField(default=0)
     losses = models.PositiveIntegerField(default=0)
     ties = models.PositiveIntegerField(default=0)
@@ -140,11 +233,14 @@ class FantasyTeam(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = FantasyTeamQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.name} ({self.owner.username})"
 
     class Meta:
         unique_together = ['owner', 'league']
+        indexes = [models.Index(fields=['league', '-wins', '-points_for'])]
 
 
 class Roster(models.Model):
@@ -167,6 +263,27 @@ class Roster(models.Model):
         ('IR', 'Injured Reserve'),
     ]
 
+    # NFL positions each roster slot accepts
+    SLOT_ELIGIBILITY = {
+        'QB': ['QB'],
+        'RB1': ['RB'],
+        'RB2': ['RB'],
+        'WR1': ['WR'],
+        'WR2': ['WR'],
+        'TE': ['TE'],
+        'FLEX': ['RB', 'WR', 'TE'],
+        'K': ['K'],
+        'DEF': ['DEF'],
+        'BN1': ['QB', 'RB', 'WR', 'TE', 'K', 'DEF'],
+        'BN2': ['QB', 'RB', 'WR', 'TE', 'K', 'DEF'],
+        'BN3': ['QB', 'RB', 'WR', 'TE', 'K', 'DEF'],
+        'BN4': ['QB', 'RB', 'WR', 'TE', 'K', 'DEF'],
+        'BN5': ['QB', 'RB', 'WR', 'TE', 'K', 'DEF'],
+        'IR': ['QB', 'RB', 'WR', 'TE', 'K', 'DEF'],
+    }
+    STARTING_SLOTS = ['QB', 'RB1', 'RB2', 'WR1', 'WR2', 'TE', 'FLEX', 'K', 'DEF']
+    BENCH_SLOTS = ['BN1', 'BN2', 'BN3', 'BN4', 'BN5']
+
     fantasy_team = models.ForeignKey(
         FantasyTeam,
         on_delete=models.CASCADE,
@@ -189,6 +306,15 @@ class Roster(models.Model):
         unique_together = ['fantasy_team', 'player']
 
 
+class MatchupQuerySet(models.QuerySet):
+    def with_related(self):
+        """Load both teams, their owners and leagues in a constant number of queries"""
+        return self.select_related('home_team__owner', 'away_team__owner').prefetch_related(
+            Prefetch('home_team__league', queryset=League.objects.with_related()),
+            Prefetch('away_team__league', queryset=League.objects.with_related()),
+        )
+
+
 class Matchup(models.Model):
     """Weekly matchup between two teams"""
     league = models.ForeignKey(
@@ -211,11 +337,198 @@ class Matchup(models.Model):
     away_score = models.DecimalField(max_digits=8, decimal_places=2, default=0.00)
     is_complete = models.BooleanField(default=False)
 
+    # Scores last applied to team standings, null until the matchup is applied
+    applied_home_score = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True)
+    applied_away_score = models.DecimalField(max_digits=8, decimal_places=2, blank=True, null=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = MatchupQuerySet.as_manager()
+
     def __str__(self):
         return f"Week {self.week}: {self.away_team.name} @ {self.home_team.name}"
 
     class Meta:
         unique_together = ['league', 'week', 'home_team', 'away_team']
+        indexes = [
+            models.Index(fields=['updated_at']),
+            models.Index(fields=['week', 'id']),
+        ]
+
+
+class WaiverClaim(models.Model):
+    """Request to add a free agent, optionally dropping a rostered player"""
+    STATUSES = [
+        ('pending', 'Pending'),
+        ('won', 'Won'),
+        ('lost', 'Lost'),
+        ('invalid', 'Invalid'),
+    ]
+
+    league = models.ForeignKey(
+        League,
+        on_delete=models.CASCADE,
+        related_name='waiver_claims'
+    )
+    fantasy_team = models.ForeignKey(
+        FantasyTeam,
+        on_delete=models.CASCADE,
+        related_name='waiver_claims'
+    )
+    player = models.ForeignKey(
+        NFLPlayer,
+        on_delete=models.CASCADE,
+        related_name='waiver_claims'
+    )
+    drop_player = models.ForeignKey(
+        NFLPlayer,
+        on_delete=models.CASCADE,
+        related_name='waiver_drops',
+        blank=True,
+        null=True
+    )
+    # The team's own preference among its claims, lowest first
+    rank = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUSES, default='pending')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"{self.fantasy_team.name} claims {self.player.name}"
+
+    class Meta:
+        ordering = ['rank', 'created_at', 'id']
+        indexes = [models.Index(fields=['league', 'status'])]
+
+
+class PlayoffOdds(models.Model):
+    """Simulated postseason chances for a team"""
+    fantasy_team = models.OneToOneField(
+        FantasyTeam,
+        on_delete=models.CASCADE,
+        related_name='playoff_odds'
+    )
+    playoffs = models.FloatField(default=0)
+    championship = models.FloatField(default=0)
+    projected_wins = models.FloatField(default=0)
+    simulations = models.PositiveIntegerField(default=0)
+
+    computed_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.fantasy_team.name}: {self.playoffs:.1%} playoffs"
+
+
+class Draft(models.Model):
+    """Live draft for a league"""
+    DRAFT_TYPES = [
+        ('snake', 'Snake'),
+        ('linear', 'Linear'),
+    ]
+
+    STATUSES = [
+        ('scheduled', 'Scheduled'),
+        ('in_progress', 'In Progress'),
+        ('complete', 'Complete'),
+    ]
+
+    league = models.OneToOneField(
+        League,
+        on_delete=models.CASCADE,
+        related_name='draft'
+    )
+    draft_type = models.CharField(max_length=10, choices=DRAFT_TYPES, default='snake')
+    status = models.CharField(max_length=20, choices=STATUSES, default='scheduled')
+    rounds = models.PositiveIntegerField(default=14)
+    pick_seconds = models.PositiveIntegerField(default=90)
+
+    # Fantasy team ids in first-round pick order
+    order = models.JSONField(default=list)
+    current_pick = models.PositiveIntegerField(default=1)
+    pick_deadline = models.DateTimeField(blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.league.name} draft"
+
+    @property
+    def total_picks(self):
+        return self.rounds * len(self.order)
+
+    def team_for_pick(self, overall_pick):
+        """Fantasy team id on the clock for a 1-based overall pick"""
+        teams = len(self.order)
+        round_index, slot = divmod(overall_pick - 1, teams)
+        if self.draft_type == 'snake' and round_index % 2:
+            slot = teams - 1 - slot
+        return self.order[slot]
+
+
+class DraftPick(models.Model):
+    """Player selected in a draft"""
+    draft = models.ForeignKey(
+        Draft,
+        on_delete=models.CASCADE,
+        related_name='picks'
+    )
+    overall_pick = models.PositiveIntegerField()
+    fantasy_team = models.ForeignKey(
+        FantasyTeam,
+        on_delete=models.CASCADE,
+        related_name='draft_picks'
+    )
+    player = models.ForeignKey(
+        NFLPlayer,
+        on_delete=models.CASCADE,
+        related_name='draft_picks'
+    )
+    is_autopick = models.BooleanField(default=False)
+
+    picked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Pick {self.overall_pick}: {self.player.name}"
+
+    class Meta:
+        ordering = ['overall_pick']
+        unique_together = [['draft', 'overall_pick'], ['draft', 'player']]
+
+
+class ArchivedSeason(models.Model):
+    """Completed league season moved out of the live tables (leagues.archive)"""
+    # Id of the League row this season was played in, since deleted
+    league_id = models.PositiveIntegerField(unique=True)
+    season_year = models.PositiveIntegerField()
+    name = models.CharField(max_length=100)
+    league_type = models.CharField(max_length=20, choices=League.LEAGUE_TYPES)
+    commissioner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name='archived_seasons',
+        blank=True,
+        null=True
+    )
+    # The live league that continues this one, kept current across rollovers
+    successor = models.ForeignKey(
+        League,
+        on_delete=models.SET_NULL,
+        related_name='archived_seasons',
+        blank=True,
+        null=True
+    )
+    team_count = models.PositiveIntegerField(default=0)
+
+    # Gzipped JSON of the final standings, matchups and rosters
+    document = models.BinaryField()
+
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.season_year}, archived)"
+
+    class Meta:
+        indexes = [models.Index(fields=['season_year', 'id'])]
@@ -0,0 +1,196 @@
+"""
+Keyset (cursor) pagination.
+
+Each paginator orders by a unique, indexed key such as ``(position, name,
+id)``. A cursor holds the key of the last row sent (or the first, when
+paging backwards), and the next page is the rows after it:
+``WHERE (position, name, id) > (...)`` spelled out as ORs, followed by
+``LIMIT``. The database seeks straight there through the index, so page
+1000 costs what page 1 does. An offset would make it read and discard
+every earlier row instead.
+
+Cursors are opaque: base64 JSON that clients pass back unchanged. Pages hold
+``page_size`` rows. ``?page_size=`` can change that up to
+``max_page_size``. Responses look like DRF's ``CursorPagination``:
+``{"next": url, "previous": url, "results": [...]}``.
+
+Finding a page is two queries. The first reads only the key columns of the
+page plus one row, which tells whether there is more. The second is
+``page_queryset``, the list queryset narrowed to that key range in forward
+order, and the view can load it however it likes: through the serializer,
+or streamed by ``leagues.fastjson``. Async views do the same through
+``apage_queryset``.
+"""
+import base64
+import binascii
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    # Model fields, '-' for descending, ending in a unique one
+    ordering = ('id',)
+    page_size = api_settings.PAGE_SIZE or 100
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self):
+        self.next = self.previous = None
+
+    # Cursors
+
+    def encode_cursor(self, key, reverse):
+        values = [value.isoformat() if hasattr(value, 'isoformat') else value for value in key]
+        payload = json.dumps({'k': values, 'r': reverse}, separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+    def decode_cursor(self, params, model):
+        """``(key, reverse)`` from the request's cursor, or ``(None, False)``"""
+        encoded = params.get(self.cursor_query_param)
+        if not encoded:
+            return None, False
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4)))
+            key, reverse = payload['k'], payload['r']
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(key, list) or len(key) != len(self.ordering) or not isinstance(reverse, bool):
+            raise NotFound(self.invalid_cursor_message)
+        # Typed as the key fields, so a tampered value fails here and not in the query
+        try:
+            key = [model._meta.get_field(name).to_python(value) for (name, _), value in zip(self._fields(), key)]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if None in key:
+            raise NotFound(self.invalid_cursor_message)
+        return key, reverse
+
+    def get_page_size(self, params):
+        try:
+            size = int(params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # Queries
+
+    def _fields(self):
+        return [(field.lstrip('-'), field.startswith('-')) for field in self.ordering]
+
+    def _beyond(self, key, after, inclusive=False):
+        """Rows whose key sorts after ``key`` (before it when not ``after``)"""
+        clauses = []
+        equal = Q()
+        fields = self._fields()
+        for i, ((name, descending), value) in enumerate(zip(fields, key)):
+            lookup = 'gt' if after != descending else 'lt'
+            if inclusive and i == len(fields) - 1:
+                lookup += 'e'
+            clauses.append(equal & Q(**{f'{name}__{lookup}': value}))
+            equal &= Q(**{name: value})
+        return reduce(or_, clauses)
+
+    def _order(self, reverse):
+        if not reverse:
+            return list(self.ordering)
+        return [field[1:] if field.startswith('-') else f'-{field}' for field in self.ordering]
+
+    def _window(self, queryset, request):
+        """Keys of the rows past the cursor: a page's worth and one more"""
+        params = request.GET
+        self.request = request
+        self.page_size_value = self.get_page_size(params)
+        self.cursor_key, self.reverse = self.decode_cursor(params, queryset.model)
+        window = queryset.select_related(None).prefetch_related(None).order_by(*self._order(self.reverse))
+        if self.cursor_key is not None:
+            window = window.filter(self._beyond(self.cursor_key, after=not self.reverse))
+        names = [name for name, _ in self._fields()]
+        return window.values_list(*names)[:self.page_size_value + 1]
+
+    def _page(self, queryset, keys):
+        """Set the links from the page's keys and narrow ``queryset`` to them"""
+        more = len(keys) > self.page_size_value
+        keys = keys[:self.page_size_value]
+        if self.reverse:
+            keys.reverse()
+        url = self.request.build_absolute_uri()
+        self.next = self.previous = None
+        if keys:
+            has_next = more if not self.reverse else True
+            has_previous = (self.cursor_key is not None) if not self.reverse else more
+            if has_next:
+                self.next = replace_query_param(url, self.cursor_query_param, self.encode_cursor(keys[-1], False))
+            if has_previous:
+                self.previous = replace_query_param(url, self.cursor_query_param, self.encode_cursor(keys[0], True))
+        elif self.reverse:
+            # Paged back past the start: offer the first page
+            self.next = remove_query_param(url, self.cursor_query_param)
+        if not keys:
+            return queryset.none()
+        return queryset.filter(
+            self._beyond(keys[0], after=True, inclusive=True),
+            self._beyond(keys[-1], after=False, inclusive=True),
+        ).order_by(*self.ordering)
+
+    def page_queryset(self, queryset, request, view=None):
+        return self._page(queryset, list(self._window(queryset, request)))
+
+    async def apage_queryset(self, queryset, request, view=None):
+        return self._page(queryset, [key async for key in self._window(queryset, request)])
+
+    # DRF interface
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return list(self.page_queryset(queryset, request, view))
+
+    def get_paginated_data(self, data):
+        return {'next': self.next, 'previous': self.previous, 'results': data}
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class PlayerPagination(KeysetPagination):
+    ordering = ('position', 'name', 'id')
+    page_size = 100
+    max_page_size = 1000
+
+
+class LeaguePagination(KeysetPagination):
+    ordering = ('created_at', 'id')
+    page_size = 50
+    max_page_size = 200
+
+
+class MatchupPagination(KeysetPagination):
+    ordering = ('week', 'id')
+    page_size = 100
+    max_page_size = 500
+
+
+class ArchivePagination(KeysetPagination):
+    ordering = ('-season_year', '-id')
+    page_size = 50
+    max_page_size = 200
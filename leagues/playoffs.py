@@ -0,0 +1,246 @@
+"""
+Monte Carlo playoff and championship odds.
+
+Each team's weekly score is modelled as a normal distribution fitted to its
+completed matchups, shrunk towards the league's average while few games have
+been played. A league is simulated in batches of seasons as array math:
+every remaining regular season game of every simulated season is drawn at
+once, records are totalled with a matrix product against the schedule, seeds
+come from sorting on wins then points for, and the bracket is played out a
+round at a time across all simulations together.
+
+Seeding ignores the head-to-head tiebreaker ``league_standings`` applies;
+ties on record are rare once points for is simulated.
+
+``simulate_season`` loads every league's inputs in a few queries, fans the
+leagues out over a process pool, and stores the results in ``PlayoffOdds``.
+Workers only do the arithmetic and never touch the database.
+"""
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import django
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .models import FantasyTeam, League, Matchup, PlayoffOdds
+
+DEFAULT_SIMULATIONS = 20000
+
+# Seasons simulated per array batch, bounding memory at roughly
+# BATCH * remaining games * 16 bytes
+BATCH = 5000
+
+# Weekly score assumed before a league has played, and how many games of
+# that prior each team's own results are weighed against
+PRIOR_MEAN = 100.0
+PRIOR_STD = 25.0
+PRIOR_GAMES = 3
+
+
+@dataclass
+class LeagueInput:
+    league_id: int
+    team_ids: list
+    wins: np.ndarray
+    points_for: np.ndarray
+    means: np.ndarray
+    stds: np.ndarray
+    home: np.ndarray
+    away: np.ndarray
+    playoff_teams: int
+
+
+def _distributions(team_ids, scores):
+    """Shrunk mean and standard deviation of each team's weekly score"""
+    played = [s for team_id in team_ids for s in scores.get(team_id, ())]
+    league_mean = float(np.mean(played)) if played else PRIOR_MEAN
+    league_std = float(np.std(played)) if len(played) > 1 else PRIOR_STD
+    means, stds = [], []
+    for team_id in team_ids:
+        own = np.asarray(scores.get(team_id, ()), dtype=float)
+        games = len(own)
+        weight = games / (games + PRIOR_GAMES)
+        mean = own.mean() if games else league_mean
+        std = own.std() if games > 1 else league_std
+        means.append(weight * mean + (1 - weight) * league_mean)
+        stds.append(max(weight * std + (1 - weight) * league_std, 1.0))
+    return np.array(means), np.array(stds)
+
+
+def load_inputs(leagues):
+    """Build simulation inputs for a queryset of leagues in three queries"""
+    leagues = {league.id: league for league in leagues.only('id', 'playoff_teams', 'regular_season_weeks')}
+    teams = defaultdict(list)
+    for team in FantasyTeam.objects.filter(league__in=leagues).order_by('id').only(
+        'id', 'league_id', 'wins', 'ties', 'points_for'
+    ):
+        teams[team.league_id].append(team)
+
+    scores = defaultdict(list)
+    remaining = defaultdict(list)
+    matchups = Matchup.objects.filter(league__in=leagues).values_list(
+        'league_id', 'week', 'home_team_id', 'away_team_id', 'home_score', 'away_score', 'is_complete'
+    )
+    for league_id, week, home_id, away_id, home_score, away_score, is_complete in matchups.iterator():
+        if week > leagues[league_id].regular_season_weeks:
+            continue
+        if is_complete:
+            scores[home_id].append(float(home_score))
+            scores[away_id].append(float(away_score))
+        else:
+            remaining[league_id].append((home_id, away_id))
+
+    inputs = []
+    for league_id, league in leagues.items():
+        league_teams = teams.get(league_id)
+        # Nothing to simulate without two teams and a playoff spot
+        if not league_teams or len(league_teams) < 2 or league.playoff_teams < 1:
+            continue
+        team_ids = [team.id for team in league_teams]
+        index = {team_id: i for i, team_id in enumerate(team_ids)}
+        games = [(index[h], index[a]) for h, a in remaining[league_id] if h in index and a in index]
+        means, stds = _distributions(team_ids, scores)
+        inputs.append(LeagueInput(
+            league_id=league_id,
+            team_ids=team_ids,
+            # A tie is worth half a win when ranking records
+            wins=np.array([team.wins + team.ties / 2 for team in league_teams], dtype=float),
+            points_for=np.array([float(team.points_for) for team in league_teams]),
+            means=means,
+            stds=stds,
+            home=np.array([h for h, _ in games], dtype=np.intp),
+            away=np.array([a for _, a in games], dtype=np.intp),
+            playoff_teams=min(league.playoff_teams, len(team_ids)),
+        ))
+    return inputs
+
+
+def bracket_order(size):
+    """Seed positions for a single-elimination bracket of ``size`` (a power of two)"""
+    order = [0]
+    while len(order) < size:
+        order = [seed for s in order for seed in (s, 2 * len(order) - 1 - s)]
+    return order
+
+
+def _simulate_batch(data, sims, rng):
+    teams = len(data.team_ids)
+    games = len(data.home)
+
+    # Regular season: (sims, games) scores for both sides of every game
+    home_scores = rng.standard_normal((sims, games)) * data.stds[data.home] + data.means[data.home]
+    away_scores = rng.standard_normal((sims, games)) * data.stds[data.away] + data.means[data.away]
+    home_onehot = np.zeros((games, teams))
+    home_onehot[np.arange(games), data.home] = 1
+    away_onehot = np.zeros((games, teams))
+    away_onehot[np.arange(games), data.away] = 1
+
+    home_won = (home_scores > away_scores).astype(float)
+    wins = data.wins + home_won @ home_onehot + (1 - home_won) @ away_onehot
+    points_for = data.points_for + home_scores @ home_onehot + away_scores @ away_onehot
+
+    # Seeds: best record first, points for breaking ties
+    ranked = np.lexsort((points_for, wins), axis=-1)[:, ::-1]
+    seeds = ranked[:, :data.playoff_teams]
+    made = np.zeros((sims, teams))
+    np.put_along_axis(made, seeds, 1, axis=1)
+
+    # Postseason: pad to a power of two, top seeds getting byes (-1)
+    size = 1 << max(0, (data.playoff_teams - 1).bit_length())
+    field = np.full((sims, size), -1, dtype=np.intp)
+    field[:, :data.playoff_teams] = seeds
+    field = field[:, bracket_order(size)]
+    while field.shape[1] > 1:
+        first, second = field[:, 0::2], field[:, 1::2]
+        first_scores = _draw(rng, data, first)
+        second_scores = _draw(rng, data, second)
+        field = np.where(first_scores >= second_scores, first, second)
+    champions = np.bincount(field[:, 0], minlength=teams)
+
+    return made.sum(axis=0), champions, wins.sum(axis=0)
+
+
+def _draw(rng, data, field):
+    """Playoff scores for a field of team indices, byes never winning"""
+    index = np.maximum(field, 0)
+    scores = rng.standard_normal(field.shape) * data.stds[index] + data.means[index]
+    return np.where(field < 0, -np.inf, scores)
+
+
+def simulate_league(data, simulations=DEFAULT_SIMULATIONS, seed=0):
+    """Return ``{team_id: (playoffs, championship, projected_wins)}``"""
+    rng = np.random.default_rng([seed, data.league_id])
+    teams = len(data.team_ids)
+    made = np.zeros(teams)
+    champions = np.zeros(teams)
+    wins = np.zeros(teams)
+    done = 0
+    while done < simulations:
+        sims = min(BATCH, simulations - done)
+        batch_made, batch_champions, batch_wins = _simulate_batch(data, sims, rng)
+        made += batch_made
+        champions += batch_champions
+        wins += batch_wins
+        done += sims
+    return {
+        team_id: (made[i] / simulations, champions[i] / simulations, wins[i] / simulations)
+        for i, team_id in enumerate(data.team_ids)
+    }
+
+
+def _simulate(args):
+    data, simulations, seed = args
+    return simulate_league(data, simulations, seed)
+
+
+@transaction.atomic
+def store_odds(results, simulations):
+    now = timezone.now()
+    odds = [
+        PlayoffOdds(
+            fantasy_team_id=team_id,
+            playoffs=playoffs,
+            championship=championship,
+            projected_wins=projected_wins,
+            simulations=simulations,
+            computed_at=now,
+        )
+        for league in results
+        for team_id, (playoffs, championship, projected_wins) in league.items()
+    ]
+    PlayoffOdds.objects.bulk_create(
+        odds,
+        batch_size=2000,
+        update_conflicts=True,
+        unique_fields=['fantasy_team'],
+        update_fields=['playoffs', 'championship', 'projected_wins', 'simulations', 'computed_at'],
+    )
+    return len(odds)
+
+
+def run_simulations(inputs, simulations=DEFAULT_SIMULATIONS, processes=None, seed=0):
+    """Simulate each ``LeagueInput``, over a process pool unless ``processes=1``"""
+    jobs = [(data, simulations, seed) for data in inputs]
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or len(jobs) <= 1:
+        return [_simulate(job) for job in jobs]
+    # Spawned workers need the app registry before they can unpickle jobs
+    with ProcessPoolExecutor(max_workers=processes, initializer=django.setup) as pool:
+        chunksize = max(1, len(jobs) // (processes * 4))
+        return list(pool.map(_simulate, jobs, chunksize=chunksize))
+
+
+def simulate_leagues(leagues, simulations=DEFAULT_SIMULATIONS, processes=None, seed=0):
+    """Simulate and store odds for a queryset of leagues; returns teams updated"""
+    results = run_simulations(load_inputs(leagues), simulations, processes, seed)
+    return store_odds(results, simulations)
+
+
+def simulate_season(season_year, simulations=DEFAULT_SIMULATIONS, processes=None, seed=0):
+    """Nightly run: refresh odds for every active league of the season"""
+    leagues = League.objects.filter(season_year=season_year, is_active=True)
+    return simulate_leagues(leagues, simulations, processes, seed)
@@ -0,0 +1,123 @@
+"""
+Primary/replica database routing.
+
+When ``DATABASES`` has a ``replica`` alias, ``ReplicaMiddleware`` lets
+GET/HEAD/OPTIONS requests handled by a DRF viewset read from it. Everything
+else reads from the primary: unsafe methods, plain views such as auth,
+management commands and background threads, and anything inside a
+transaction on the primary. All writes go to the primary.
+
+Read-your-writes: after a request that wrote (any unsafe method, or a GET
+that wrote as a side effect) the response sets a ``REPLICA_PIN_COOKIE`` for
+``REPLICA_PIN_SECONDS``. While it is present that client reads from the
+primary, which covers replication lag. Within a request, the first write
+pins the rest of that request to the primary too.
+
+Without a replica alias the router sends everything to ``default``.
+"""
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_ALIAS = 'replica'
+REPLICA_PIN_COOKIE = 'db_primary'
+REPLICA_PIN_SECONDS = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RequestRouting:
+    __slots__ = ('replica', 'wrote')
+
+    def __init__(self, replica):
+        self.replica = replica
+        self.wrote = False
+
+
+_routing = ContextVar('db_routing', default=None)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        routing = _routing.get()
+        if routing is None or not routing.replica:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return REPLICA_ALIAS
+
+    def db_for_write(self, model, **hints):
+        routing = _routing.get()
+        if routing is not None:
+            routing.replica = False
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+
+class ReplicaMiddleware:
+    """Track per-request routing state and the read-your-writes pin"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        routing = RequestRouting(replica=False)
+        token = _routing.set(routing)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.pin(request, response, routing)
+
+    async def __acall__(self, request):
+        # The ORM's sync_to_async threads copy this context, so the router
+        # sees the same RequestRouting
+        routing = RequestRouting(replica=False)
+        token = _routing.set(routing)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _routing.reset(token)
+        return self.pin(request, response, routing)
+
+    def pin(self, request, response, routing):
+        if routing.wrote or request.method not in SAFE_METHODS:
+            response.set_cookie(
+                REPLICA_PIN_COOKIE, '1', max_age=REPLICA_PIN_SECONDS, httponly=True, samesite='Lax'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        routing = _routing.get()
+        if routing is None or routing.wrote or not replica_configured():
+            return
+        # Only viewsets (whose actions the DRF router names in
+        # view_func.actions) and views marked with reads_from_replica
+        routing.replica = (
+            request.method in SAFE_METHODS
+            and (getattr(view_func, 'actions', None) is not None or getattr(view_func, 'replica_reads', False))
+            and REPLICA_PIN_COOKIE not in request.COOKIES
+        )
+
+
+def reads_from_replica(view):
+    """Let a plain view's safe-method reads go to the replica like a viewset's"""
+    view.replica_reads = True
+    return view
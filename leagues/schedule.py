@@ -0,0 +1,189 @@
+"""
+Round-robin schedule generation.
+
+Schedules are built in memory with the circle method and written with one
+``bulk_create`` per league (or per chunk of leagues in batch mode).
+"""
+import random
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Max
+
+from .models import FantasyTeam, League, Matchup
+
+CHUNK_SIZE = 500
+
+
+class ScheduleError(Exception):
+    pass
+
+
+def round_robin(team_ids):
+    """Return the rounds of a single round robin as lists of (home, away).
+
+    An odd team count adds a bye: the team drawn against it sits the round out.
+    """
+    teams = list(team_ids)
+    if len(teams) % 2:
+        teams.append(None)
+    n = len(teams)
+    rounds = []
+    for r in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            home, away = teams[i], teams[n - 1 - i]
+            if home is not None and away is not None:
+                pairs.append((home, away))
+        rounds.append(pairs)
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return rounds
+
+
+def _balance_home_away(schedule):
+    """Orient each game so home games stay even across the season.
+
+    The team with fewer home games so far hosts; when level, a rematch goes
+    to the team that was away last time.
+    """
+    home_games = defaultdict(int)
+    last_host = {}
+    balanced = []
+    for pairs in schedule:
+        week = []
+        for a, b in pairs:
+            key = frozenset((a, b))
+            if home_games[a] > home_games[b] or (home_games[a] == home_games[b] and last_host.get(key) == a):
+                a, b = b, a
+            home_games[a] += 1
+            last_host[key] = a
+            week.append((a, b))
+        balanced.append(week)
+    return balanced
+
+
+def divisional_rounds(divisions, others=()):
+    """Merge each division's round robin into league-wide weeks.
+
+    Divisions must need the same number of rounds: a shorter round robin
+    would have to repeat games to keep up with a longer one. Teams in
+    ``others``, which have no division, play each other meanwhile, cycling
+    through their own round robin.
+    """
+    per_division = [round_robin(teams) for teams in divisions if len(teams) > 1]
+    if not per_division:
+        return []
+    if len({len(rounds) for rounds in per_division}) > 1:
+        raise ScheduleError('Divisions differ in size too much for repeat division games')
+    rest = round_robin(others) if len(others) > 1 else []
+    return [
+        [pair for rounds in per_division for pair in rounds[week]] + (rest[week % len(rest)] if rest else [])
+        for week in range(len(per_division[0]))
+    ]
+
+
+def build_schedule(teams, weeks, division_games=1, seed=None):
+    """Build ``weeks`` rounds of (home, away) pairs for ``(team_id, division)`` tuples.
+
+    Every team meets every other team once; with ``division_games`` > 1,
+    division rivals meet that many times in total. The cycle repeats if the
+    season is longer than one pass. A season too short for the whole cycle
+    keeps as many complete passes of rivalry games as fit and drops league
+    rounds instead, so rivals all meet the same number of extra times.
+    """
+    team_ids = [team_id for team_id, _ in teams]
+    if len(team_ids) < 2:
+        raise ScheduleError('A schedule needs at least two teams')
+    random.Random(seed).shuffle(team_ids)
+
+    rounds = round_robin(team_ids)
+    divisions = defaultdict(list)
+    for team_id, division in teams:
+        divisions[division].append(team_id)
+    others = sorted(divisions.pop(None, []))
+    rivalry = divisional_rounds([sorted(divisions[d]) for d in sorted(divisions)], others)
+    passes = division_games - 1 if rivalry else 0
+
+    schedule = []
+    while len(schedule) < weeks:
+        remaining = weeks - len(schedule)
+        fitting = min(passes, remaining // len(rivalry)) if rivalry else 0
+        schedule += rounds[:remaining - fitting * len(rivalry)] + rivalry * fitting
+    return _balance_home_away(schedule[:weeks])
+
+
+def _matchups(league_id, teams, weeks, division_games, start_week):
+    rounds = build_schedule(teams, weeks, division_games, seed=league_id)
+    return [
+        Matchup(league_id=league_id, week=start_week + week, home_team_id=home, away_team_id=away)
+        for week, pairs in enumerate(rounds)
+        for home, away in pairs
+    ]
+
+
+@transaction.atomic
+def generate_schedule(league, weeks=None, division_games=1, start_week=1, replace=False):
+    """Create the regular-season matchups for one league.
+
+    With ``replace`` the weeks after the last one with a completed game are
+    rescheduled: their unplayed matchups are deleted and those weeks of the
+    new schedule created. Otherwise a league that already has matchups is
+    refused.
+    """
+    weeks = weeks or league.regular_season_weeks
+    existing = Matchup.objects.filter(league=league)
+    played = 0
+    if replace:
+        played = existing.filter(is_complete=True).aggregate(week=Max('week'))['week'] or 0
+        existing = existing.filter(week__gt=played)
+        existing.filter(is_complete=False).delete()
+    if existing.exists():
+        raise ScheduleError(f"{league} already has a schedule")
+
+    teams = list(FantasyTeam.objects.filter(league=league).values_list('id', 'division'))
+    matchups = _matchups(league.id, teams, weeks, division_games, start_week)
+    return Matchup.objects.bulk_create([matchup for matchup in matchups if matchup.week > played])
+
+
+def schedule_season(season_year, weeks=None, division_games=1, chunk_size=CHUNK_SIZE):
+    """Schedule every unscheduled active league of a season.
+
+    Leagues are processed in chunks, each in its own transaction with one
+    query for the chunk's teams and one bulk insert for its matchups. Returns
+    ``(leagues_scheduled, matchups_created)``.
+    """
+    league_ids = list(
+        League.objects.filter(season_year=season_year, is_active=True)
+        .exclude(matchups__isnull=False)
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+    scheduled = created = 0
+    for i in range(0, len(league_ids), chunk_size):
+        chunk = league_ids[i:i + chunk_size]
+        with transaction.atomic():
+            season_weeks = dict(
+                League.objects.filter(id__in=chunk).values_list('id', 'regular_season_weeks')
+            )
+            teams = defaultdict(list)
+            rows = FantasyTeam.objects.filter(league_id__in=chunk).order_by('id').values_list(
+                'league_id', 'id', 'division'
+            )
+            for league_id, team_id, division in rows:
+                teams[league_id].append((team_id, division))
+
+            matchups = []
+            for league_id in chunk:
+                if len(teams[league_id]) < 2:
+                    continue
+                try:
+                    matchups += _matchups(
+                        league_id, teams[league_id], weeks or season_weeks[league_id], division_games, 1
+                    )
+                except ScheduleError:
+                    # Divisions that can't share rivalry weeks; left unscheduled
+                    continue
+                scheduled += 1
+            Matchup.objects.bulk_create(matchups, batch_size=2000)
+            created += len(matchups)
+    return scheduled, created
@@ -0,0 +1,199 @@
+"""
+Weekly fantasy scoring.
+
+Stat lines live in ``PlayerWeekStats`` and scoring rules are plain dicts mapping
+a stat column to the points it is worth. Points are computed in SQL as a
+weighted sum of stat columns, so a whole week is scored with one UPDATE per
+distinct rule set instead of a Python loop over players.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import (
+    Avg, Count, DecimalField, ExpressionWrapper, F, OuterRef, Q, Subquery, Sum, Value,
+)
+from django.db.models.functions import Coalesce, Now, Round
+
+from .models import League, Matchup, NFLPlayer, PlayerWeekStats, Roster
+from .standings import apply_standings
+
+
+STANDARD_RULES = {
+    'passing_yards': Decimal('0.04'),
+    'passing_tds': Decimal('4'),
+    'interceptions': Decimal('-2'),
+    'rushing_yards': Decimal('0.1'),
+    'rushing_tds': Decimal('6'),
+    'receptions': Decimal('0'),
+    'receiving_yards': Decimal('0.1'),
+    'receiving_tds': Decimal('6'),
+    'fumbles_lost': Decimal('-2'),
+    'two_point_conversions': Decimal('2'),
+    'field_goals_made': Decimal('3'),
+    'extra_points_made': Decimal('1'),
+    'sacks': Decimal('1'),
+    'defensive_interceptions': Decimal('2'),
+    'fumble_recoveries': Decimal('2'),
+    'defensive_tds': Decimal('6'),
+    'safeties': Decimal('2'),
+}
+
+SCORING_RULES = {
+    'standard': STANDARD_RULES,
+    'ppr': {**STANDARD_RULES, 'receptions': Decimal('1')},
+    'half_ppr': {**STANDARD_RULES, 'receptions': Decimal('0.5')},
+}
+
+# Rules used for the league-independent NFLPlayer.points_total
+DEFAULT_RULES = STANDARD_RULES
+
+POINTS_FIELD = DecimalField(max_digits=8, decimal_places=2)
+
+# Keep custom-league id lists well under SQLite's bound-parameter limit
+LEAGUE_CHUNK_SIZE = 500
+
+
+def rules_for_league(league_type, custom_rules=None):
+    """Return the scoring rules for a league type.
+
+    Dynasty and keeper leagues score like standard leagues. Custom leagues
+    start from standard and override individual stat weights.
+    """
+    if league_type == 'custom':
+        rules = dict(STANDARD_RULES)
+        for stat, weight in (custom_rules or {}).items():
+            if stat not in STANDARD_RULES:
+                raise ValueError(f"Unknown scoring stat: {stat}")
+            rules[stat] = Decimal(str(weight))
+        return rules
+    return SCORING_RULES.get(league_type, STANDARD_RULES)
+
+
+def _balanced_sum(terms):
+    # A left-deep chain of a + b + c ... nests one level per term, which
+    # overflows SQLite's parser inside correlated subqueries.
+    if len(terms) == 1:
+        return terms[0]
+    middle = len(terms) // 2
+    return _balanced_sum(terms[:middle]) + _balanced_sum(terms[middle:])
+
+
+def points_for_line(rules, stats):
+    """Score a single stat line given as a mapping of stat -> value."""
+    total = sum((weight * stats.get(stat, 0) for stat, weight in rules.items()), Decimal('0'))
+    return total.quantize(Decimal('0.01'))
+
+
+def points_expression(rules, prefix=''):
+    """Build a SQL expression summing weighted stat columns."""
+    terms = [F(f'{prefix}{stat}') * Value(weight) for stat, weight in rules.items() if weight]
+    return ExpressionWrapper(_balanced_sum(terms), output_field=POINTS_FIELD)
+
+
+def team_points(season_year, week, rules, team_ref):
+    """Correlated subquery totalling a team's starters for the week."""
+    starters = Roster.objects.filter(
+        fantasy_team=OuterRef(team_ref),
+        is_starter=True,
+        player__week_stats__season_year=season_year,
+        player__week_stats__week=week,
+    )
+    total = (
+        starters.values('fantasy_team')
+        .annotate(total=Sum(points_expression(rules, prefix='player__week_stats__')))
+        .values('total')
+    )
+    # Round in SQL so stored scores compare equal to the Decimals read back
+    return Round(Coalesce(Subquery(total, output_field=POINTS_FIELD), Value(Decimal('0'))), 2)
+
+
+def rule_groups(season_year):
+    """Yield ``(rules, league_filter)`` pairs covering every active league.
+
+    Built-in league types are matched by type so no per-league parameters are
+    bound. Custom leagues with identical rules are grouped and matched by id.
+    """
+    builtin = {}
+    for league_type, _ in League.LEAGUE_TYPES:
+        if league_type == 'custom':
+            continue
+        rules = rules_for_league(league_type)
+        builtin.setdefault(tuple(sorted(rules.items())), (rules, []))[1].append(league_type)
+    for rules, league_types in builtin.values():
+        yield rules, Q(league__league_type__in=league_types)
+
+    custom = {}
+    leagues = League.objects.filter(
+        season_year=season_year, is_active=True, league_type='custom'
+    ).values_list('id', 'scoring_rules')
+    for league_id, custom_rules in leagues:
+        rules = rules_for_league('custom', custom_rules)
+        custom.setdefault(tuple(sorted(rules.items())), (rules, []))[1].append(league_id)
+    for rules, league_ids in custom.values():
+        for i in range(0, len(league_ids), LEAGUE_CHUNK_SIZE):
+            yield rules, Q(league_id__in=league_ids[i:i + LEAGUE_CHUNK_SIZE])
+
+
+def score_player_week(season_year, week):
+    """Store default-rule fantasy points on every stat line for the week."""
+    return PlayerWeekStats.objects.filter(season_year=season_year, week=week).update(
+        fantasy_points=Round(points_expression(DEFAULT_RULES), 2),
+        updated_at=Now(),
+    )
+
+
+def refresh_player_totals(season_year, player_ids=None):
+    """Recompute NFLPlayer season totals and averages from stored stat lines.
+
+    Stat ingestion keeps these up to date incrementally; this is the full
+    rebuild used for repair.
+    """
+    season_stats = PlayerWeekStats.objects.filter(
+        player=OuterRef('pk'), season_year=season_year
+    ).values('player')
+    total = season_stats.annotate(total=Sum('fantasy_points')).values('total')
+    average = season_stats.annotate(average=Avg('fantasy_points')).values('average')
+    games = season_stats.annotate(games=Count('id')).values('games')
+
+    players = NFLPlayer.objects.filter(week_stats__season_year=season_year)
+    if player_ids is not None:
+        players = players.filter(id__in=player_ids)
+    return NFLPlayer.objects.filter(id__in=players.values('id')).update(
+        points_total=Coalesce(Subquery(total, output_field=POINTS_FIELD), Value(Decimal('0'))),
+        average_points=Coalesce(Subquery(average, output_field=POINTS_FIELD), Value(Decimal('0'))),
+        games_played=Coalesce(Subquery(games), Value(0)),
+        updated_at=Now(),
+    )
+
+
+def score_matchups(season_year, week):
+    """Score every matchup of the week, one UPDATE per scoring rule set."""
+    matchups = Matchup.objects.filter(
+        league__season_year=season_year, league__is_active=True, week=week
+    )
+    updated = 0
+    for rules, league_filter in rule_groups(season_year):
+        updated += matchups.filter(league_filter).update(
+            home_score=team_points(season_year, week, rules, 'home_team'),
+            away_score=team_points(season_year, week, rules, 'away_team'),
+            updated_at=Now(),
+        )
+    return updated
+
+
+@transaction.atomic
+def score_week(season_year, week, complete=False):
+    """Score a full week's stat lines and matchups.
+
+    With ``complete`` the week's matchups are also marked final. Standings
+    deltas are applied for any completed matchup whose score changed.
+    """
+    stat_lines = score_player_week(season_year, week)
+    matchups = score_matchups(season_year, week)
+    week_matchups = Matchup.objects.filter(
+        league__season_year=season_year, league__is_active=True, week=week
+    )
+    if complete:
+        week_matchups.update(is_complete=True, updated_at=Now())
+    standings = apply_standings(week_matchups)
+    return {'stat_lines': stat_lines, 'matchups': matchups, 'standings': standings}
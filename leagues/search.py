@@ -0,0 +1,216 @@
+"""
+In-process player name search.
+
+Each worker keeps a prefix index (a sorted list of name tokens searched with
+bisect) and a trigram index for typo-tolerant matches over active players.
+Local saves update the index through signals; changes made by other processes
+or by bulk writes are picked up by polling the newest ``updated_at``, which is
+an indexed MAX lookup, at most once per ``SYNC_INTERVAL`` seconds, and then
+loading only the rows changed since the last sync.
+"""
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Max
+
+from .models import NFLPlayer
+
+SYNC_INTERVAL = 1.0
+
+# Re-read rows slightly older than the last sync in case a slow transaction
+# committed after a newer one
+SYNC_OVERLAP = timedelta(seconds=5)
+
+# Share of the query's trigrams a name must contain to count as a fuzzy match
+FUZZY_THRESHOLD = 0.5
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def trigrams(text):
+    """Word trigrams, padded per word the way pg_trgm does"""
+    grams = set()
+    for token in tokenize(text):
+        padded = f"  {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class PlayerIndex:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.players = {}
+        self.tokens = []
+        self.grams = {}
+        self.loaded = False
+        self.synced_to = None
+        self.player_count = 0
+        self.next_sync = 0.0
+        # Bumped on every change so derived indexes know to rebuild
+        self.revision = 0
+
+    # Building
+
+    def _add(self, player_id, name, position, nfl_team, average_points):
+        entry = {
+            'id': player_id,
+            'name': name,
+            'position': position,
+            'nfl_team': nfl_team,
+            'average_points': Decimal(str(average_points)).quantize(Decimal('0.01')),
+            'tokens': tokenize(name),
+            'grams': trigrams(name),
+        }
+        self.players[player_id] = entry
+        self.revision += 1
+        for token in set(entry['tokens']):
+            insort(self.tokens, (token, player_id))
+        for gram in entry['grams']:
+            self.grams.setdefault(gram, set()).add(player_id)
+
+    def _remove(self, player_id):
+        entry = self.players.pop(player_id, None)
+        if entry is None:
+            return
+        self.revision += 1
+        for token in set(entry['tokens']):
+            i = bisect_left(self.tokens, (token, player_id))
+            if i < len(self.tokens) and self.tokens[i] == (token, player_id):
+                del self.tokens[i]
+        for gram in entry['grams']:
+            self.grams[gram].discard(player_id)
+
+    def _apply(self, rows):
+        for player_id, name, position, nfl_team, average_points, is_active in rows:
+            self._remove(player_id)
+            if is_active:
+                self._add(player_id, name, position, nfl_team, average_points)
+
+    def _load(self):
+        self.players, self.tokens, self.grams = {}, [], {}
+        self.revision += 1
+        self._apply(NFLPlayer.objects.values_list(
+            'id', 'name', 'position', 'nfl_team', 'average_points', 'is_active'
+        ).iterator())
+        self.loaded = True
+
+    def _sync(self):
+        """Catch up with changes made outside this process"""
+        now = time.monotonic()
+        if self.loaded and now < self.next_sync:
+            return
+        self.next_sync = now + SYNC_INTERVAL
+
+        state = NFLPlayer.objects.aggregate(latest=Max('updated_at'))
+        latest = state['latest']
+        if self.loaded and latest == self.synced_to:
+            return
+        count = NFLPlayer.objects.count()
+        if not self.loaded or self.synced_to is None or count < self.player_count:
+            # Rows were deleted; only a reload notices that
+            self._load()
+        else:
+            changed = NFLPlayer.objects.filter(updated_at__gte=self.synced_to - SYNC_OVERLAP)
+            self._apply(changed.values_list(
+                'id', 'name', 'position', 'nfl_team', 'average_points', 'is_active'
+            ))
+        self.synced_to = latest
+        self.player_count = count
+
+    def sync(self):
+        with self.lock:
+            self._sync()
+
+    # Signal hooks for saves made in this process
+
+    def player_saved(self, player):
+        with self.lock:
+            if self.loaded:
+                self._apply([(
+                    player.id, player.name, player.position, player.nfl_team,
+                    player.average_points, player.is_active,
+                )])
+
+    def player_deleted(self, player_id):
+        with self.lock:
+            if self.loaded:
+                self._remove(player_id)
+                self.player_count -= 1
+
+    # Queries
+
+    def _prefix_matches(self, query_tokens):
+        first = max(query_tokens, key=len)
+        start = bisect_left(self.tokens, (first,))
+        candidates = set()
+        for token, player_id in self.tokens[start:]:
+            if not token.startswith(first):
+                break
+            candidates.add(player_id)
+        rest = [token for token in query_tokens if token != first]
+        return [
+            player_id for player_id in candidates
+            if all(any(t.startswith(q) for t in self.players[player_id]['tokens']) for q in rest)
+        ]
+
+    def _fuzzy_matches(self, query, exclude):
+        query_grams = trigrams(query)
+        shared = Counter()
+        for gram in query_grams:
+            for player_id in self.grams.get(gram, ()):
+                shared[player_id] += 1
+        return {
+            player_id: count / len(query_grams)
+            for player_id, count in shared.items()
+            if player_id not in exclude and count / len(query_grams) >= FUZZY_THRESHOLD
+        }
+
+    def search(self, query, limit=10, position=None):
+        """Return up to ``limit`` players matching ``query``.
+
+        Prefix matches on name words come first, ranked by average points;
+        if there are too few, trigram matches fill in, ranked by similarity.
+        """
+        query_tokens = tokenize(query)
+        if not query_tokens:
+            return []
+        with self.lock:
+            self._sync()
+            players = self.players
+
+            def allowed(player_id):
+                return position is None or players[player_id]['position'] == position
+
+            prefix = [player_id for player_id in self._prefix_matches(query_tokens) if allowed(player_id)]
+            ranked = heapq.nlargest(limit, prefix, key=lambda player_id: players[player_id]['average_points'])
+            if len(ranked) < limit and len(query) >= 3:
+                fuzzy = self._fuzzy_matches(query, set(prefix))
+                ranked += heapq.nlargest(
+                    limit - len(ranked),
+                    (player_id for player_id in fuzzy if allowed(player_id)),
+                    key=lambda player_id: (fuzzy[player_id], players[player_id]['average_points']),
+                )
+            return [
+                {
+                    'id': player_id,
+                    'name': players[player_id]['name'],
+                    'position': players[player_id]['position'],
+                    'nfl_team': players[player_id]['nfl_team'],
+                    # Formatted the way NFLPlayerSerializer renders decimals
+                    'average_points': str(players[player_id]['average_points']),
+                }
+                for player_id in ranked
+            ]
+
+
+player_index = PlayerIndex()
@@ -1,5 +1,11 @@
+import math
+
 from rest_framework import serializers
-from .models import League, NFLPlayer, FantasyTeam, Roster, Matchup
+from .models import (
+    League, NFLPlayer, FantasyTeam, Roster, Matchup, PlayoffOdds, WaiverClaim, Draft, DraftPick,
+    ArchivedSeason
+)
+from .scoring import STANDARD_RULES
 from accounts.serializers import UserSerializer
 
 
@@ -9,7 +15,52 @@ class NFLPlayerSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class LeagueSerializer(serializers.ModelSerializer):
+class LeagueSettingsMixin:
+    """Checks shared by league creation and updates; partial updates fall
+    back to the league's stored values"""
+
+    # Weeks in an NFL regular season
+    MAX_WEEKS = 18
+    # Largest points a single stat unit may be worth, either way
+    MAX_WEIGHT = 1000
+
+    def validate_scoring_rules(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError('Expected an object of stat weights')
+        for stat, weight in value.items():
+            if stat not in STANDARD_RULES:
+                raise serializers.ValidationError(f'Unknown scoring stat: {stat}')
+            if isinstance(weight, bool) or not isinstance(weight, (int, float)) \
+                    or not math.isfinite(weight) or abs(weight) > self.MAX_WEIGHT:
+                raise serializers.ValidationError(
+                    f'{stat}: expected a number between -{self.MAX_WEIGHT} and {self.MAX_WEIGHT}'
+                )
+        return value
+
+    def validate_regular_season_weeks(self, value):
+        if not 1 <= value <= self.MAX_WEEKS:
+            raise serializers.ValidationError(f'Must be between 1 and {self.MAX_WEEKS}')
+        return value
+
+    def _setting(self, data, field):
+        if field in data:
+            return data[field]
+        if self.instance is not None:
+            return getattr(self.instance, field)
+        return League._meta.get_field(field).get_default()
+
+    def validate(self, data):
+        data = super().validate(data)
+        playoff_teams = self._setting(data, 'playoff_teams')
+        max_teams = self._setting(data, 'max_teams')
+        if not 1 <= playoff_teams <= max_teams:
+            raise serializers.ValidationError(
+                {'playoff_teams': f'Must be between 1 and max_teams ({max_teams})'}
+            )
+        return data
+
+
+class LeagueSerializer(LeagueSettingsMixin, serializers.ModelSerializer):
     commissioner = UserSerializer(read_only=True)
     current_team_count = serializers.ReadOnlyField()
     spots_available = serializers.ReadOnlyField()
@@ -19,18 +70,20 @@ class LeagueSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'commissioner', 'league_type', 'scoring_type',
             'max_teams', 'is_public', 'entry_fee', 'prize_pool',
-            'draft_date', 'season_year', 'is_active',
+            'draft_date', 'season_year', 'regular_season_weeks', 'playoff_teams', 'is_active',
+            'scoring_rules',
             'current_team_count', 'spots_available', 'created_at'
         ]
         read_only_fields = ['id', 'commissioner', 'created_at']
 
 
-class LeagueCreateSerializer(serializers.ModelSerializer):
+class LeagueCreateSerializer(LeagueSettingsMixin, serializers.ModelSerializer):
     class Meta:
         model = League
         fields = [
             'name', 'league_type', 'scoring_type', 'max_teams',
-            'is_public', 'entry_fee', 'prize_pool', 'draft_date', 'season_year'
+            'is_public', 'entry_fee', 'prize_pool', 'draft_date', 'season_year',
+            'regular_season_weeks', 'playoff_teams', 'scoring_rules'
         ]
 
 
@@ -41,10 +94,44 @@ class FantasyTeamSerializer(serializers.ModelSerializer):
     class Meta:
         model = FantasyTeam
         fields = [
-            'id', 'name', 'owner', 'league', 'wins', 'losses', 'ties',
-            'points_for', 'points_against', 'created_at'
+            'id', 'name', 'owner', 'league', 'division', 'waiver_priority', 'wins', 'losses',
+            'ties', 'points_for', 'points_against', 'created_at'
+        ]
+        read_only_fields = ['id', 'owner', 'league', 'division', 'waiver_priority', 'wins', 'losses', 'ties', 'points_for', 'points_against', 'created_at']
+
+
+class CompactLeagueSerializer(LeagueSerializer):
+    commissioner = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
+class CompactFantasyTeamSerializer(FantasyTeamSerializer):
+    owner = serializers.PrimaryKeyRelatedField(read_only=True)
+    league = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
+class StandingSerializer(serializers.ModelSerializer):
+    rank = serializers.IntegerField(read_only=True)
+    owner = serializers.CharField(source='owner.username', read_only=True)
+
+    class Meta:
+        model = FantasyTeam
+        fields = [
+            'rank', 'id', 'name', 'owner', 'wins', 'losses', 'ties',
+            'points_for', 'points_against'
+        ]
+
+
+class PlayoffOddsSerializer(serializers.ModelSerializer):
+    team = serializers.IntegerField(source='fantasy_team_id', read_only=True)
+    name = serializers.CharField(source='fantasy_team.name', read_only=True)
+    owner = serializers.CharField(source='fantasy_team.owner.username', read_only=True)
+
+    class Meta:
+        model = PlayoffOdds
+        fields = [
+            'team', 'name', 'owner', 'playoffs', 'championship', 'projected_wins',
+            'simulations', 'computed_at'
         ]
-        read_only_fields = ['id', 'owner', 'league', 'wins', 'losses', 'ties', 'points_for', 'points_against', 'created_at']
 
 
 class RosterSerializer(serializers.ModelSerializer):
@@ -55,6 +142,11 @@ class RosterSerializer(serializers.ModelSerializer):
         fields = ['id', 'player', 'roster_position', 'is_starter', 'acquired_date']
 
 
+class RosterPlayerIdSerializer(RosterSerializer):
+    """Roster rows naming the player by id, for clients holding the player snapshot"""
+    player = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
 class MatchupSerializer(serializers.ModelSerializer):
     home_team = FantasyTeamSerializer(read_only=True)
     away_team = FantasyTeamSerializer(read_only=True)
@@ -65,3 +157,94 @@ class MatchupSerializer(serializers.ModelSerializer):
             'id', 'league', 'week', 'home_team', 'away_team',
             'home_score', 'away_score', 'is_complete'
         ]
+
+
+class CompactMatchupSerializer(MatchupSerializer):
+    home_team = serializers.PrimaryKeyRelatedField(read_only=True)
+    away_team = serializers.PrimaryKeyRelatedField(read_only=True)
+
+
+def sideload_tables(matchups=(), teams=(), leagues=()):
+    """Build id-keyed lookup tables for objects referenced by compact payloads.
+
+    Walks relations that the view's queryset has already loaded, so no
+    queries are issued. Each object is serialized once however many rows
+    point at it.
+    """
+    teams = {team.id: team for team in teams}
+    for matchup in matchups:
+        teams[matchup.home_team_id] = matchup.home_team
+        teams[matchup.away_team_id] = matchup.away_team
+
+    leagues = {league.id: league for league in leagues}
+    users = {}
+    for team in teams.values():
+        leagues[team.league_id] = team.league
+        users[team.owner_id] = team.owner
+    for league in leagues.values():
+        users[league.commissioner_id] = league.commissioner
+
+    tables = {'users': {user.id: UserSerializer(user).data for user in users.values()}}
+    if leagues:
+        tables['leagues'] = {league.id: CompactLeagueSerializer(league).data for league in leagues.values()}
+    if teams:
+        tables['teams'] = {team.id: CompactFantasyTeamSerializer(team).data for team in teams.values()}
+    return tables
+
+
+class WaiverClaimSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = WaiverClaim
+        fields = [
+            'id', 'fantasy_team', 'player', 'drop_player', 'rank', 'status',
+            'created_at', 'processed_at'
+        ]
+        read_only_fields = ['id', 'fantasy_team', 'status', 'created_at', 'processed_at']
+
+    def validate(self, data):
+        team = self.context['team']
+        roster = set(team.roster.values_list('player_id', flat=True))
+        if data['player'].id in roster:
+            raise serializers.ValidationError({'player': 'Player is already on your roster'})
+        drop = data.get('drop_player')
+        if drop is not None and drop.id not in roster:
+            raise serializers.ValidationError({'drop_player': 'Player is not on your roster'})
+        return data
+
+
+class DraftPickSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DraftPick
+        fields = ['overall_pick', 'fantasy_team', 'player', 'is_autopick', 'picked_at']
+
+
+class DraftSerializer(serializers.ModelSerializer):
+    on_the_clock = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Draft
+        fields = [
+            'id', 'league', 'draft_type', 'status', 'rounds', 'pick_seconds',
+            'order', 'current_pick', 'on_the_clock', 'pick_deadline', 'created_at'
+        ]
+        read_only_fields = ['id', 'status', 'order', 'current_pick', 'pick_deadline', 'created_at']
+
+    def get_on_the_clock(self, obj):
+        if obj.status != 'in_progress':
+            return None
+        return obj.team_for_pick(obj.current_pick)
+
+    def validate_rounds(self, value):
+        slots = len(Roster.STARTING_SLOTS) + len(Roster.BENCH_SLOTS)
+        if not 1 <= value <= slots:
+            raise serializers.ValidationError(f'Rounds must be between 1 and {slots}')
+        return value
+
+
+class ArchivedSeasonSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ArchivedSeason
+        fields = [
+            'id', 'league_id', 'season_year', 'name', 'league_type', 'commissioner',
+            'successor', 'team_count', 'archived_at'
+        ]
@@ -0,0 +1,85 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .availability import availability_index
+from .caching import invalidate
+from .live import score_hub
+from .membership import team_removed
+from .models import FantasyTeam, League, Matchup, NFLPlayer, Roster
+from .search import player_index
+from .standings import apply_standings, revert_matchup
+
+
+@receiver(post_save, sender=Matchup)
+def update_standings(sender, instance, raw=False, **kwargs):
+    """Apply standings deltas when a matchup completes or its score changes"""
+    if raw:
+        return
+    if instance.is_complete or instance.applied_home_score is not None:
+        apply_standings(Matchup.objects.filter(pk=instance.pk))
+        # Keep the instance in step so a later save() doesn't undo the apply
+        instance.refresh_from_db(fields=['applied_home_score', 'applied_away_score'])
+
+
+@receiver(post_save, sender=Matchup)
+def push_score(sender, instance, raw=False, **kwargs):
+    # Only once committed, so listeners never see a score that rolls back
+    if not raw:
+        transaction.on_commit(lambda: score_hub.publish([instance]))
+
+
+@receiver(post_delete, sender=Matchup)
+def revert_standings(sender, instance, **kwargs):
+    if instance.applied_home_score is not None:
+        revert_matchup(instance)
+
+
+@receiver(post_save, sender=NFLPlayer)
+def index_player(sender, instance, raw=False, **kwargs):
+    if not raw:
+        player_index.player_saved(instance)
+
+
+@receiver(post_delete, sender=NFLPlayer)
+def unindex_player(sender, instance, **kwargs):
+    player_index.player_deleted(instance.pk)
+
+
+@receiver(post_delete, sender=FantasyTeam)
+def release_spot(sender, instance, **kwargs):
+    team_removed(instance.league_id)
+
+
+@receiver(post_save, sender=Roster)
+def roster_added(sender, instance, created=False, raw=False, **kwargs):
+    if created and not raw:
+        availability_index.roster_changed(instance.fantasy_team_id, instance.player_id, added=True)
+
+
+@receiver(post_delete, sender=Roster)
+def roster_removed(sender, instance, **kwargs):
+    availability_index.roster_changed(instance.fantasy_team_id, instance.player_id, added=False)
+
+
+@receiver(post_delete, sender=NFLPlayer)
+def invalidate_players(sender, **kwargs):
+    invalidate('players')
+
+
+@receiver(post_delete, sender=Matchup)
+@receiver(post_save, sender=FantasyTeam)
+@receiver(post_delete, sender=FantasyTeam)
+@receiver(post_save, sender=League)
+def invalidate_matchups(sender, raw=False, **kwargs):
+    """Catch changes nested in matchup responses that updated_at can't show"""
+    if not raw:
+        invalidate('matchups')
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_owner(sender, raw=False, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no cached response includes
+    if not raw and update_fields != frozenset(['last_login']):
+        invalidate('matchups')
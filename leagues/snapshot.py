@@ -0,0 +1,91 @@
+"""
+Player-universe snapshot for client-side caching.
+
+``/api/players/snapshot/`` serves every active player, serialized exactly as
+``/api/players/`` lists them, as one gzip-compressed JSON document
+``{"version": ..., "players": [...]}``. Each worker builds it once per
+version and keeps the compressed bytes, so a request writes a prebuilt
+buffer and runs no serializer.
+
+The version is a digest of the table's row count, newest ``updated_at``,
+and the ``players`` invalidation stamp that deletes set (see
+``leagues.caching``). It is also the ETag. Workers see the same data and
+compute the same version, so a client can revalidate against any of them.
+The version is checked at most once per ``CHECK_INTERVAL`` seconds, which
+means most requests, 304s included, run no query at all.
+
+Clients keep the snapshot by version and ask the roster endpoints for
+``?players=ids``, which returns player ids in place of nested player objects.
+"""
+import gzip
+import hashlib
+import threading
+import time
+
+from django.db.models import Count, Max
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+from rest_framework.renderers import JSONRenderer
+
+from .caching import last_changed
+from .models import NFLPlayer
+from .routing import reads_from_replica
+from .serializers import NFLPlayerSerializer
+
+CHECK_INTERVAL = 1.0
+
+
+class PlayerSnapshot:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.content = None
+        self.next_check = 0.0
+
+    def _current_version(self):
+        state = NFLPlayer.objects.order_by().aggregate(count=Count('pk'), latest=Max('updated_at'))
+        parts = [state['count'], state['latest'], last_changed('players')]
+        return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+    def _build(self, version):
+        players = NFLPlayer.objects.filter(is_active=True)
+        document = JSONRenderer().render({
+            'version': version,
+            'players': NFLPlayerSerializer(players, many=True).data,
+        })
+        # mtime=0 keeps the bytes identical across workers and rebuilds
+        return gzip.compress(document, compresslevel=9, mtime=0)
+
+    def get(self):
+        """``(version, gzipped document)``, rebuilt if the players changed"""
+        with self.lock:
+            now = time.monotonic()
+            if self.content is None or now >= self.next_check:
+                self.next_check = now + CHECK_INTERVAL
+                version = self._current_version()
+                if version != self.version:
+                    self.content = self._build(version)
+                    self.version = version
+            return self.version, self.content
+
+
+player_snapshot = PlayerSnapshot()
+
+
+@require_safe
+@reads_from_replica
+def snapshot_view(request):
+    version, content = player_snapshot.get()
+    etag = f'"{version}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response = HttpResponse(content, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(content), content_type='application/json')
+    response['ETag'] = etag
+    response['Vary'] = 'Accept-Encoding'
+    patch_cache_control(response, no_cache=True)
+    return response
@@ -0,0 +1,217 @@
+"""
+Materialized standings.
+
+Team records on ``FantasyTeam`` are maintained as deltas: each matchup stores
+the scores it last contributed (``applied_home_score``/``applied_away_score``)
+so a completion or a later score correction only adds the difference.
+``rebuild_standings`` recomputes everything from matchups for repair.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .bulk import bulk_write
+from .models import FantasyTeam, Matchup
+
+STANDINGS_FIELDS = ['wins', 'losses', 'ties', 'points_for', 'points_against', 'updated_at']
+
+ZERO = Decimal('0')
+
+
+def _result(points_for, points_against):
+    """Return a (wins, losses, ties, points_for, points_against) contribution."""
+    if points_for is None:
+        return (0, 0, 0, ZERO, ZERO)
+    if points_for > points_against:
+        return (1, 0, 0, points_for, points_against)
+    if points_for < points_against:
+        return (0, 1, 0, points_for, points_against)
+    return (0, 0, 1, points_for, points_against)
+
+
+def matchup_deltas(matchup):
+    """Yield ``(team_id, delta)`` for what has changed since the last apply."""
+    if matchup.is_complete:
+        home, away = matchup.home_score, matchup.away_score
+    else:
+        home = away = None
+    applied_home, applied_away = matchup.applied_home_score, matchup.applied_away_score
+
+    for team_id, new, old in [
+        (matchup.home_team_id, _result(home, away), _result(applied_home, applied_away)),
+        (matchup.away_team_id, _result(away, home), _result(applied_away, applied_home)),
+    ]:
+        delta = tuple(n - o for n, o in zip(new, old))
+        if any(delta):
+            yield team_id, delta
+
+
+def _pending(matchups):
+    """Restrict to matchups whose standings contribution may be out of date."""
+    stale = (
+        Q(applied_home_score__isnull=True)
+        | ~Q(applied_home_score=F('home_score'))
+        | ~Q(applied_away_score=F('away_score'))
+    )
+    return matchups.filter(
+        Q(is_complete=True) & stale
+        | Q(is_complete=False, applied_home_score__isnull=False)
+    )
+
+
+@transaction.atomic
+def apply_standings(matchups):
+    """Apply outstanding standings deltas for a queryset of matchups.
+
+    Returns the number of matchups applied. Teams are locked for the duration
+    so concurrent corrections serialize instead of losing updates.
+    """
+    pending = list(_pending(matchups).select_for_update())
+    if not pending:
+        return 0
+
+    totals = defaultdict(lambda: [0, 0, 0, ZERO, ZERO])
+    for matchup in pending:
+        for team_id, delta in matchup_deltas(matchup):
+            total = totals[team_id]
+            for i, value in enumerate(delta):
+                total[i] += value
+        if matchup.is_complete:
+            matchup.applied_home_score = matchup.home_score
+            matchup.applied_away_score = matchup.away_score
+        else:
+            matchup.applied_home_score = matchup.applied_away_score = None
+
+    teams = FantasyTeam.objects.select_for_update().in_bulk(list(totals))
+    for team_id, (wins, losses, ties, points_for, points_against) in totals.items():
+        team = teams[team_id]
+        team.wins += wins
+        team.losses += losses
+        team.ties += ties
+        team.points_for += points_for
+        team.points_against += points_against
+    _save_records(teams.values())
+    bulk_write(Matchup, pending, ['applied_home_score', 'applied_away_score'])
+    return len(pending)
+
+
+def revert_matchup(matchup):
+    """Remove a deleted matchup's contribution from its teams' records.
+
+    Uses plain UPDATEs so a team deleted in the same cascade stays deleted.
+    """
+    reverted = Matchup(
+        home_team_id=matchup.home_team_id,
+        away_team_id=matchup.away_team_id,
+        is_complete=False,
+        applied_home_score=matchup.applied_home_score,
+        applied_away_score=matchup.applied_away_score,
+    )
+    for team_id, delta in matchup_deltas(reverted):
+        wins, losses, ties, points_for, points_against = delta
+        FantasyTeam.objects.filter(pk=team_id).update(
+            wins=F('wins') + wins,
+            losses=F('losses') + losses,
+            ties=F('ties') + ties,
+            points_for=F('points_for') + points_for,
+            points_against=F('points_against') + points_against,
+            updated_at=timezone.now(),
+        )
+
+
+def _save_records(teams):
+    now = timezone.now()
+    teams = list(teams)
+    for team in teams:
+        team.updated_at = now
+    bulk_write(FantasyTeam, teams, STANDINGS_FIELDS)
+
+
+@transaction.atomic
+def rebuild_standings(leagues):
+    """Recompute team records for a queryset of leagues from their matchups."""
+    teams = FantasyTeam.objects.select_for_update().filter(league__in=leagues).in_bulk()
+    for team in teams.values():
+        team.wins = team.losses = team.ties = 0
+        team.points_for = team.points_against = ZERO
+
+    matchups = Matchup.objects.filter(league__in=leagues, is_complete=True).values_list(
+        'home_team_id', 'away_team_id', 'home_score', 'away_score'
+    )
+    for home_id, away_id, home_score, away_score in matchups.iterator():
+        for team_id, result in [
+            (home_id, _result(home_score, away_score)),
+            (away_id, _result(away_score, home_score)),
+        ]:
+            team = teams[team_id]
+            team.wins += result[0]
+            team.losses += result[1]
+            team.ties += result[2]
+            team.points_for += result[3]
+            team.points_against += result[4]
+    _save_records(teams.values())
+
+    league_matchups = Matchup.objects.filter(league__in=leagues)
+    league_matchups.filter(is_complete=True).update(
+        applied_home_score=F('home_score'), applied_away_score=F('away_score')
+    )
+    league_matchups.filter(is_complete=False).update(
+        applied_home_score=None, applied_away_score=None
+    )
+    return len(teams)
+
+
+def _win_pct(wins, losses, ties):
+    games = wins + losses + ties
+    return (wins + ties / 2) / games if games else 0
+
+
+def league_standings(league):
+    """Return the league's teams ranked by record with head-to-head tiebreaks.
+
+    Records are read from the stored team rows in one indexed query. Only
+    when teams are level on win percentage are the matchups between those
+    teams read to break the tie; points for and points against follow.
+    """
+    teams = list(
+        FantasyTeam.objects.filter(league=league)
+        .select_related('owner')
+        .order_by('-wins', '-points_for', 'id')
+    )
+    groups = defaultdict(list)
+    for team in teams:
+        groups[_win_pct(team.wins, team.losses, team.ties)].append(team)
+
+    tied_ids = [team.id for group in groups.values() if len(group) > 1 for team in group]
+    head_to_head = defaultdict(lambda: [0, 0, 0])
+    if tied_ids:
+        games = Matchup.objects.filter(
+            league=league, is_complete=True,
+            home_team_id__in=tied_ids, away_team_id__in=tied_ids,
+        ).values_list('home_team_id', 'away_team_id', 'home_score', 'away_score')
+        pct = {team.id: _win_pct(team.wins, team.losses, team.ties) for team in teams}
+        for home_id, away_id, home_score, away_score in games:
+            if pct[home_id] != pct[away_id]:
+                continue
+            for team_id, result in [
+                (home_id, _result(home_score, away_score)),
+                (away_id, _result(away_score, home_score)),
+            ]:
+                record = head_to_head[team_id]
+                for i in range(3):
+                    record[i] += result[i]
+
+    ranked = []
+    for win_pct in sorted(groups, reverse=True):
+        ranked.extend(sorted(groups[win_pct], key=lambda team: (
+            -_win_pct(*head_to_head[team.id]),
+            -team.points_for,
+            team.points_against,
+            team.id,
+        )))
+    for rank, team in enumerate(ranked, start=1):
+        team.rank = rank
+    return ranked
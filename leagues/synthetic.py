@@ -0,0 +1,182 @@
+"""
+Synthetic data used by the benchmark commands.
+
+Everything here writes with ``bulk_create`` so large volumes can be seeded
+quickly. Callers are expected to run inside a transaction they roll back, or
+inside ``scratch_database()`` when the benchmark needs several connections.
+"""
+import os
+import random
+import tempfile
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from .models import League, NFLPlayer, PlayerWeekStats, FantasyTeam, Roster, Matchup
+
+
+# Players per NFL team for each position
+DEPTH_CHART = {'QB': 3, 'RB': 5, 'WR': 6, 'TE': 3, 'K': 1, 'DEF': 1}
+
+# Typical weekly points for a starter at each position
+POSITION_POINTS = {'QB': 18, 'RB': 12, 'WR': 11, 'TE': 8, 'K': 8, 'DEF': 7}
+
+BATCH_SIZE = 2000
+
+
+@contextmanager
+def scratch_database():
+    """Point the default connection at a fresh test database for the duration.
+
+    Lets multi-threaded benchmarks commit freely without touching real data.
+    SQLite gets a temporary file rather than its default shared-cache memory
+    database, whose table locks fail instead of waiting for the busy timeout.
+    """
+    if connection.vendor == 'sqlite':
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        test_settings['NAME'] = os.path.join(tempfile.gettempdir(), 'gridiron_bench.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL')
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def seed_players(rng=None):
+    """Create a full NFL player pool and return it grouped by position."""
+    rng = rng or random.Random(0)
+    players = []
+    for nfl_team, _ in NFLPlayer.NFL_TEAMS:
+        bye_week = rng.randint(5, 14)
+        for position, depth in DEPTH_CHART.items():
+            for n in range(depth):
+                name = f"{nfl_team} Defense" if position == 'DEF' else f"{nfl_team} {position}{n + 1}"
+                average = max(0.0, rng.gauss(POSITION_POINTS[position], 4) / (n + 1) ** 0.5)
+                players.append(NFLPlayer(
+                    name=name,
+                    position=position,
+                    nfl_team=nfl_team,
+                    jersey_number=rng.randint(1, 99),
+                    bye_week=bye_week,
+                    average_points=Decimal(f'{average:.2f}'),
+                ))
+    NFLPlayer.objects.bulk_create(players, batch_size=BATCH_SIZE)
+
+    by_position = {}
+    for player_id, position in NFLPlayer.objects.values_list('id', 'position'):
+        by_position.setdefault(position, []).append(player_id)
+    return by_position
+
+
+def _draft_team(rng, available):
+    """Pick a starting lineup and bench from the available player ids."""
+    picks = []
+    for slot in Roster.STARTING_SLOTS:
+        position = rng.choice([p for p in Roster.SLOT_ELIGIBILITY[slot] if available[p]])
+        picks.append((slot, available[position].pop(), True))
+    for slot in Roster.BENCH_SLOTS:
+        position = rng.choice([p for p in ('RB', 'WR', 'TE', 'QB') if available[p]])
+        picks.append((slot, available[position].pop(), False))
+    return picks
+
+
+def seed_leagues(count, players_by_position, teams_per_league=12, season_year=2024,
+                 league_types=('standard', 'ppr', 'half_ppr'), weeks=0, rosters=True, rng=None,
+                 password='!'):
+    """Create ``count`` full leagues with owners, teams, rosters and matchups.
+
+    Pass ``rosters=False`` for leagues that have yet to draft. Owners get
+    ``password``, an already hashed value (unusable by default). Returns the
+    list of new league ids.
+    """
+    rng = rng or random.Random(0)
+    User = get_user_model()
+    start = User.objects.count()
+
+    users = [
+        User(username=f'bench{start + i}', email=f'bench{start + i}@example.com', password=password)
+        for i in range(count * teams_per_league)
+    ]
+    User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+    user_ids = [user.id for user in users]
+
+    leagues = [
+        League(
+            name=f'Bench League {i}',
+            commissioner_id=user_ids[i * teams_per_league],
+            league_type=league_types[i % len(league_types)],
+            max_teams=teams_per_league,
+            team_count=teams_per_league,
+            season_year=season_year,
+        )
+        for i in range(count)
+    ]
+    League.objects.bulk_create(leagues, batch_size=BATCH_SIZE)
+    league_ids = [league.id for league in leagues]
+
+    teams = [
+        FantasyTeam(name=f'Team {n + 1}', owner_id=user_ids[i * teams_per_league + n], league_id=league_id)
+        for i, league_id in enumerate(league_ids)
+        for n in range(teams_per_league)
+    ]
+    FantasyTeam.objects.bulk_create(teams, batch_size=BATCH_SIZE)
+
+    roster = []
+    matchups = []
+    for i, league_id in enumerate(league_ids):
+        league_teams = teams[i * teams_per_league:(i + 1) * teams_per_league]
+        available = {position: rng.sample(ids, len(ids)) for position, ids in players_by_position.items()}
+        for team in league_teams if rosters else ():
+            for slot, player_id, is_starter in _draft_team(rng, available):
+                roster.append(Roster(
+                    fantasy_team_id=team.id,
+                    player_id=player_id,
+                    roster_position=slot,
+                    is_starter=is_starter,
+                ))
+        for week in range(1, weeks + 1):
+            order = rng.sample(league_teams, len(league_teams))
+            for home, away in zip(order[::2], order[1::2]):
+                matchups.append(Matchup(league_id=league_id, week=week, home_team_id=home.id, away_team_id=away.id))
+        if len(roster) >= BATCH_SIZE * 10:
+            Roster.objects.bulk_create(roster, batch_size=BATCH_SIZE)
+            roster = []
+    Roster.objects.bulk_create(roster, batch_size=BATCH_SIZE)
+    Matchup.objects.bulk_create(matchups, batch_size=BATCH_SIZE)
+    return league_ids
+
+
+def seed_week_stats(season_year, week, rng=None):
+    """Create a plausible stat line for every active player for one week."""
+    rng = rng or random.Random(week)
+    lines = []
+    for player_id, position in NFLPlayer.objects.filter(is_active=True).values_list('id', 'position'):
+        line = PlayerWeekStats(player_id=player_id, season_year=season_year, week=week)
+        if position == 'QB':
+            line.passing_yards = rng.randint(120, 380)
+            line.passing_tds = rng.randint(0, 4)
+            line.interceptions = rng.randint(0, 2)
+            line.rushing_yards = rng.randint(0, 50)
+        elif position in ('RB', 'WR', 'TE'):
+            line.rushing_yards = rng.randint(0, 120) if position == 'RB' else 0
+            line.rushing_tds = rng.randint(0, 1) if position == 'RB' else 0
+            line.receptions = rng.randint(0, 10)
+            line.receiving_yards = rng.randint(0, 140)
+            line.receiving_tds = rng.randint(0, 2)
+            line.fumbles_lost = int(rng.random() < 0.05)
+        elif position == 'K':
+            line.field_goals_made = rng.randint(0, 4)
+            line.extra_points_made = rng.randint(0, 5)
+        else:
+            line.sacks = rng.randint(0, 6)
+            line.defensive_interceptions = rng.randint(0, 3)
+            line.fumble_recoveries = rng.randint(0, 2)
+            line.defensive_tds = int(rng.random() < 0.15)
+        lines.append(line)
+    PlayerWeekStats.objects.bulk_create(lines, batch_size=BATCH_SIZE)
+    return len(lines)
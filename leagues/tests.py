@@ -1,3 +1,672 @@
-from django.test import TestCase
+import base64
+import json
+import threading
+from io import StringIO
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.test import AsyncClient, Client, SimpleTestCase, TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from accounts import tokens
+
+from .archive import finished_leagues, read_document, rollover_season
+from .draft import DraftConflict, DraftState, _write_pick, forget, get_state, start_draft, submit_pick
+from .fastjson import encoder_for
+from .ingest import parse_row
+from .live import SCORE_FIELDS, ScoreHub, _changed_scores, score_hub
+from .membership import repair_team_counts
+from .models import (
+    ArchivedSeason, Draft, DraftPick, FantasyTeam, League, Matchup, NFLPlayer, PlayerWeekStats, PlayoffOdds, Roster,
+    WaiverClaim,
+)
+from .routing import REPLICA_PIN_COOKIE, ReplicaRouter
+from .schedule import build_schedule
+from .scoring import score_week
+from .serializers import MatchupSerializer, NFLPlayerSerializer
+from .views import matchup_queryset, player_queryset
+from .waivers import process_waivers
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    """Primary and replica are separate files here, so which league a
+    request sees tells which database it read from"""
+
+    databases = '__all__'
+
+    def setUp(self):
+        User = get_user_model()
+        for alias in ('default', 'replica'):
+            owner = User.objects.db_manager(alias).create_user('owner', email='owner@example.com', password='pw')
+            League.objects.using(alias).create(name=f'{alias} league', commissioner=owner)
+        self.owner = User.objects.get(username='owner')
+
+    def league_names(self):
+        response = self.client.get('/api/leagues/')
+        self.assertEqual(response.status_code, 200)
+        return sorted(league['name'] for league in response.json()['results'])
+
+    def test_viewset_reads_use_replica(self):
+        self.assertEqual(self.league_names(), ['replica league'])
+
+    def test_write_pins_client_to_primary(self):
+        self.client.force_login(self.owner)
+        response = self.client.post('/api/leagues/', {'name': 'new league'}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(REPLICA_PIN_COOKIE, response.cookies)
+        self.assertEqual(self.league_names(), ['default league', 'new league'])
+
+        self.client.cookies.pop(REPLICA_PIN_COOKIE)
+        self.assertEqual(self.league_names(), ['replica league'])
+
+    def test_plain_views_read_primary(self):
+        self.client.force_login(self.owner)
+        response = self.client.get('/api/auth/me/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['username'], 'owner')
+
+    def test_reads_outside_requests_use_primary(self):
+        self.assertEqual(ReplicaRouter().db_for_read(League), 'default')
+        self.assertEqual(ReplicaRouter().db_for_write(League), 'default')
+
+
+class LeagueJoinTests(TransactionTestCase):
+    """Joins run on real threads with their own connections, so these need
+    the file-backed test database and no wrapping transaction"""
+
+    def setUp(self):
+        User = get_user_model()
+        self.commissioner = User.objects.create_user('commissioner', email='commissioner@example.com', password='pw')
+        self.league = League.objects.create(name='Rush league', commissioner=self.commissioner, max_teams=8)
+        User.objects.bulk_create(User(username=f'user{n}', email=f'user{n}@example.com', password='!') for n in range(32))
+        self.users = list(User.objects.filter(username__startswith='user'))
+
+    def join(self, client):
+        return client.post(f'/api/leagues/{self.league.id}/join/', {}, content_type='application/json')
+
+    def test_concurrent_joins_fill_league_exactly(self):
+        clients = []
+        for user in self.users:
+            client = Client()
+            client.force_login(user)
+            clients.append(client)
+        barrier = threading.Barrier(len(clients))
+        statuses = []
+
+        def rush(client):
+            try:
+                barrier.wait()
+                statuses.append(self.join(client).status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=rush, args=(client,)) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuses.count(201), 8)
+        self.assertEqual(statuses.count(400), len(self.users) - 8)
+        self.league.refresh_from_db()
+        self.assertEqual(self.league.team_count, 8)
+        self.assertEqual(FantasyTeam.objects.filter(league=self.league).count(), 8)
+
+    def test_rejoin_is_rejected_without_taking_a_spot(self):
+        self.client.force_login(self.users[0])
+        self.assertEqual(self.join(self.client).status_code, 201)
+        response = self.join(self.client)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'You are already a member of this league'})
+        self.league.refresh_from_db()
+        self.assertEqual(self.league.team_count, 1)
+
+    def test_leaving_frees_the_spot(self):
+        self.client.force_login(self.users[0])
+        self.join(self.client)
+        FantasyTeam.objects.get(owner=self.users[0]).delete()
+        self.league.refresh_from_db()
+        self.assertEqual(self.league.team_count, 0)
+
+    def test_repair_resets_drifted_counts(self):
+        FantasyTeam.objects.create(name='Unsynced', owner=self.users[0], league=self.league)
+        League.objects.filter(pk=self.league.pk).update(team_count=5)
+        self.assertEqual(repair_team_counts(), [(self.league.id, 5, 1)])
+        self.league.refresh_from_db()
+        self.assertEqual(self.league.team_count, 1)
+        self.assertEqual(repair_team_counts(), [])
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        owner = get_user_model().objects.create_user('owner', email='owner@example.com', password='pw')
+        for n in range(3):
+            League.objects.create(name=f'League {n}', commissioner=owner)
+
+    def cursor(self, key, reverse=False):
+        payload = json.dumps({'k': key, 'r': reverse}).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+    def test_pages_follow_the_cursor(self):
+        response = self.client.get('/api/leagues/?page_size=2')
+        first = response.json()
+        self.assertEqual([league['name'] for league in first['results']], ['League 0', 'League 1'])
+        second = self.client.get(first['next']).json()
+        self.assertEqual([league['name'] for league in second['results']], ['League 2'])
+        self.assertIsNone(second['next'])
+
+    def test_wrong_typed_cursor_values_are_not_found(self):
+        cases = [
+            ('/api/leagues/', ['abc', 1]),
+            ('/api/leagues/', ['2024-01-01T00:00:00+00:00', 'abc']),
+            ('/api/leagues/', [None, 1]),
+            ('/api/players/', ['QB', 'Name', [1]]),
+            ('/api/matchups/', [{'week': 1}, 1]),
+            ('/api/archive/', ['abc', 1]),
+            ('/api/async/leagues/', [5, 1]),
+        ]
+        for url, key in cases:
+            with self.subTest(url=url, key=key):
+                response = self.client.get(url, {'cursor': self.cursor(key)})
+                self.assertEqual(response.status_code, 404)
+                self.assertEqual(response.json(), {'detail': 'Invalid cursor'})
+
+
+class ParseRowTests(SimpleTestCase):
+    def test_status_with_blank_injured_column_marks_injured(self):
+        row = {'player_id': '7', 'week': '', 'is_injured': '', 'injury_status': 'Questionable'}
+        self.assertEqual(parse_row(row), (7, None, None, {'is_injured': True, 'injury_status': 'Questionable'}))
+
+    def test_blank_injury_columns_are_no_update(self):
+        row = {'player_id': '7', 'week': '3', 'is_injured': '', 'injury_status': ''}
+        player_id, week, stats, injury = parse_row(row)
+        self.assertEqual((player_id, week), (7, 3))
+        self.assertIsNone(injury)
+
+
+class LineupTests(TestCase):
+    # One player per slot of a full roster
+    ROSTER = [
+        ('QB', 'QB'), ('RB1', 'RB'), ('RB2', 'RB'), ('WR1', 'WR'), ('WR2', 'WR'), ('TE', 'TE'),
+        ('FLEX', 'WR'), ('K', 'K'), ('DEF', 'DEF'), ('BN1', 'QB'), ('BN2', 'RB'), ('BN3', 'WR'),
+        ('BN4', 'TE'), ('BN5', 'RB'), ('IR', 'RB'),
+    ]
+
+    def setUp(self):
+        owner = get_user_model().objects.create_user('owner', email='owner@example.com', password='pw')
+        league = League.objects.create(name='Lineup league', commissioner=owner)
+        self.team = FantasyTeam.objects.create(name='Team', owner=owner, league=league)
+        self.players = {}
+        for slot, position in self.ROSTER:
+            player = NFLPlayer.objects.create(name=f'{slot} player', position=position, nfl_team='KC')
+            Roster.objects.create(
+                fantasy_team=self.team, player=player, roster_position=slot,
+                is_starter=slot in Roster.STARTING_SLOTS,
+            )
+            self.players[slot] = player
+        self.client.force_login(owner)
+
+    def swap_qbs(self):
+        lineup = {slot: self.players[slot].id for slot in Roster.STARTING_SLOTS + Roster.BENCH_SLOTS}
+        lineup['QB'], lineup['BN1'] = lineup['BN1'], lineup['QB']
+        return lineup
+
+    def put(self, lineup, week=3):
+        return self.client.put(
+            f'/api/teams/{self.team.id}/lineup/', {'week': week, 'lineup': lineup},
+            content_type='application/json',
+        )
+
+    def slots(self):
+        return dict(self.team.roster.values_list('player__name', 'roster_position'))
+
+    def test_swaps_a_starter_and_a_bench_player(self):
+        response = self.put(self.swap_qbs())
+        self.assertEqual(response.status_code, 200)
+        slots = self.slots()
+        self.assertEqual((slots['BN1 player'], slots['QB player']), ('QB', 'BN1'))
+
+    def test_ineligible_slot_is_rejected(self):
+        response = self.put({'QB': self.players['RB1'].id})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'A RB cannot play QB'})
+
+    def test_bench_overflow_is_rejected(self):
+        before = self.slots()
+        # The unplaced starters have no free bench slot to go to
+        response = self.put({})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('No bench slot left', response.json()['error'])
+        self.assertEqual(self.slots(), before)
+
+    def test_started_player_cannot_move(self):
+        PlayerWeekStats.objects.create(player=self.players['QB'], season_year=2024, week=3)
+        response = self.put(self.swap_qbs())
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': "QB player's game has started"})
+
+    def test_optimizer_keeps_started_players_in_place(self):
+        NFLPlayer.objects.filter(pk=self.players['BN1'].pk).update(average_points=30)
+        NFLPlayer.objects.filter(pk=self.players['QB'].pk).update(average_points=5)
+        PlayerWeekStats.objects.create(player=self.players['BN1'], season_year=2024, week=3)
+        response = self.client.post(
+            f'/api/teams/{self.team.id}/optimize-lineup/', {'week': 3}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        slots = self.slots()
+        self.assertEqual((slots['BN1 player'], slots['QB player']), ('BN1', 'QB'))
+        self.assertEqual(sorted(slots.values()), sorted(slot for slot, _ in self.ROSTER))
+
+
+class LiveScoreTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.matchups = {}
+        for n in range(2):
+            owner = User.objects.create_user(f'owner{n}', email=f'owner{n}@example.com', password='pw')
+            rival = User.objects.create_user(f'rival{n}', email=f'rival{n}@example.com', password='pw')
+            league = League.objects.create(name=f'League {n}', commissioner=owner)
+            home = FantasyTeam.objects.create(name='Home', owner=owner, league=league)
+            away = FantasyTeam.objects.create(name='Away', owner=rival, league=league)
+            self.matchups[n] = Matchup.objects.create(league=league, week=1, home_team=home, away_team=away)
+
+    def test_poll_reads_only_subscribed_leagues(self):
+        mine = self.matchups[0]
+        since = timezone.now() - timedelta(minutes=1)
+        rows = _changed_scores(since, [(mine.league_id, 1)])
+        self.assertEqual([row[0] for row in rows], [mine.id])
+
+    def test_subscriber_gets_no_other_league_scores(self):
+        hub = ScoreHub()
+        mine, other = self.matchups[0], self.matchups[1]
+        subscriber = mock.Mock()
+        hub.subscribers[mine.league_id, 1].add(subscriber)
+        other.home_score = 12
+        hub.dispatch([tuple(getattr(other, field) for field in SCORE_FIELDS)])
+        subscriber.push.assert_not_called()
+
+    def test_scores_publish_only_after_commit(self):
+        matchup = self.matchups[0]
+        with mock.patch.object(score_hub, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                matchup.home_score = 10
+                matchup.save()
+                publish.assert_not_called()
+            publish.assert_called_once_with([matchup])
+
+    def test_rolled_back_scores_are_not_published(self):
+        matchup = self.matchups[0]
+        with mock.patch.object(score_hub, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True) as callbacks:
+                with self.assertRaises(RuntimeError), transaction.atomic():
+                    matchup.home_score = 10
+                    matchup.save()
+                    raise RuntimeError
+            self.assertEqual(callbacks, [])
+            publish.assert_not_called()
+
+
+class PlayoffOddsTests(TestCase):
+    def test_get_without_stored_odds_is_empty_and_writes_nothing(self):
+        owner = get_user_model().objects.create_user('owner', email='owner@example.com', password='pw')
+        league = League.objects.create(name='Odds league', commissioner=owner)
+        FantasyTeam.objects.create(name='Team', owner=owner, league=league)
+        response = self.client.get(f'/api/leagues/{league.id}/playoff-odds/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [])
+        self.assertFalse(PlayoffOdds.objects.exists())
+
+
+class RolloverTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user('owner', email='owner@example.com', password='pw')
+        self.rival = User.objects.create_user('rival', email='rival@example.com', password='pw')
+        self.player = NFLPlayer.objects.create(name='Kept player', position='QB', nfl_team='KC')
+
+    def finished_league(self, league_type):
+        league = League.objects.create(name=f'{league_type} league', commissioner=self.owner, league_type=league_type)
+        home = FantasyTeam.objects.create(name='Home', owner=self.owner, league=league, wins=1)
+        away = FantasyTeam.objects.create(name='Away', owner=self.rival, league=league, losses=1)
+        Roster.objects.create(fantasy_team=home, player=self.player, roster_position='QB', is_starter=True)
+        Matchup.objects.create(
+            league=league, week=1, home_team=home, away_team=away,
+            home_score=100, away_score=90, is_complete=True,
+        )
+        return league
+
+    def test_unscheduled_league_is_not_finished(self):
+        league = League.objects.create(name='Unscheduled', commissioner=self.owner)
+        FantasyTeam.objects.create(name='Team', owner=self.owner, league=league)
+        self.assertFalse(finished_leagues(2024).exists())
+        self.assertEqual(rollover_season(2024), (0, 0, 1))
+        self.assertTrue(FantasyTeam.objects.filter(league=league).exists())
+
+    def test_rollover_archives_and_renews(self):
+        dynasty = self.finished_league('dynasty')
+        standard = self.finished_league('standard')
+        self.assertEqual(rollover_season(2024), (2, 2, 0))
+        self.assertFalse(League.objects.filter(season_year=2024).exists())
+
+        renewed = League.objects.get(season_year=2025, name='dynasty league')
+        self.assertEqual(renewed.team_count, 2)
+        teams = renewed.teams.order_by('name')
+        self.assertEqual([(team.name, team.wins, team.losses) for team in teams], [('Away', 0, 0), ('Home', 0, 0)])
+        self.assertEqual(list(Roster.objects.filter(fantasy_team__league=renewed).values_list('player', flat=True)),
+                         [self.player.id])
+        other = League.objects.get(season_year=2025, name='standard league')
+        self.assertFalse(Roster.objects.filter(fantasy_team__league=other).exists())
+
+        archive = ArchivedSeason.objects.get(league_id=dynasty.id)
+        self.assertEqual(archive.successor_id, renewed.id)
+        document = read_document(archive)
+        self.assertEqual([team['name'] for team in document['standings']], ['Home', 'Away'])
+        self.assertEqual([(m['week'], m['home_score'], m['away_score']) for m in document['matchups']],
+                         [(1, '100.00', '90.00')])
+        home_id = str(document['standings'][0]['id'])
+        self.assertEqual(document['rosters'][home_id], [
+            {'player': self.player.id, 'roster_position': 'QB', 'is_starter': True},
+        ])
+        self.assertTrue(ArchivedSeason.objects.filter(league_id=standard.id).exists())
+
+
+class ScheduleTests(SimpleTestCase):
+    def meetings(self, teams, weeks, division_games):
+        schedule = build_schedule(teams, weeks, division_games, seed=1)
+        games = Counter()
+        pairs = Counter()
+        for week in schedule:
+            for home, away in week:
+                games[home] += 1
+                games[away] += 1
+                pairs[frozenset((home, away))] += 1
+        return games, pairs
+
+    def test_full_season_meets_rivals_twice_and_others_once(self):
+        teams = [(n, n // 6) for n in range(12)]
+        games, pairs = self.meetings(teams, 16, division_games=2)
+        self.assertEqual(set(games.values()), {16})
+        for a, da in teams:
+            for b, db in teams:
+                if a < b:
+                    self.assertEqual(pairs[frozenset((a, b))], 2 if da == db else 1)
+
+    def test_short_season_keeps_every_rivalry_week(self):
+        teams = [(n, n // 6) for n in range(12)]
+        division = dict(teams)
+        games, pairs = self.meetings(teams, 14, division_games=2)
+        self.assertEqual(set(games.values()), {14})
+        # League rounds are cut instead: each rival met again in the five rivalry weeks
+        rivalry_weeks = build_schedule(teams, 14, 2, seed=1)[-5:]
+        met = {frozenset(pair) for week in rivalry_weeks for pair in week}
+        self.assertLessEqual(max(pairs.values()), 2)
+        rivals = {frozenset((a, b)) for a, _ in teams for b, _ in teams if a < b and division[a] == division[b]}
+        self.assertEqual(met, rivals)
+
+    def test_teams_without_a_division_are_not_idle(self):
+        teams = [(n, n // 4) for n in range(8)] + [(8, None), (9, None)]
+        games, pairs = self.meetings(teams, 12, division_games=2)
+        self.assertEqual(set(games.values()), {12})
+        self.assertEqual(pairs[frozenset((8, 9))], 4)
+
+
+class ScoreWeekTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user('owner', email='owner@example.com', password='pw')
+        self.rival = User.objects.create_user('rival', email='rival@example.com', password='pw')
+        self.qb = NFLPlayer.objects.create(name='Passer', position='QB', nfl_team='KC')
+        self.wr = NFLPlayer.objects.create(name='Catcher', position='WR', nfl_team='KC')
+        PlayerWeekStats.objects.create(
+            player=self.qb, season_year=2024, week=1,
+            passing_yards=300, passing_tds=2, interceptions=1, rushing_yards=20,
+        )
+        PlayerWeekStats.objects.create(
+            player=self.wr, season_year=2024, week=1,
+            receptions=5, receiving_yards=80, receiving_tds=1,
+        )
+
+    def matchup(self, league_type, scoring_rules=None):
+        league = League.objects.create(
+            name=league_type, commissioner=self.owner, league_type=league_type, scoring_rules=scoring_rules or {},
+        )
+        home = FantasyTeam.objects.create(name='Home', owner=self.owner, league=league)
+        away = FantasyTeam.objects.create(name='Away', owner=self.rival, league=league)
+        Roster.objects.create(fantasy_team=home, player=self.qb, roster_position='QB', is_starter=True)
+        Roster.objects.create(fantasy_team=home, player=self.wr, roster_position='WR1', is_starter=True)
+        # A benched player scores nothing
+        Roster.objects.create(fantasy_team=away, player=self.wr, roster_position='BN1')
+        return Matchup.objects.create(league=league, week=1, home_team=home, away_team=away)
+
+    def test_points_match_hand_computed_lines(self):
+        standard = self.matchup('standard')
+        ppr = self.matchup('ppr')
+        custom = self.matchup('custom', {'passing_tds': 6, 'receptions': 0.5})
+        score_week(2024, 1, complete=True)
+
+        # QB: 300 * 0.04 + 2 * 4 - 2 + 20 * 0.1 = 20; WR: 80 * 0.1 + 6 = 14
+        lines = dict(PlayerWeekStats.objects.values_list('player__name', 'fantasy_points'))
+        self.assertEqual(lines, {'Passer': Decimal('20.00'), 'Catcher': Decimal('14.00')})
+        expected = {
+            standard.id: Decimal('34.00'),
+            ppr.id: Decimal('39.00'),         # + 5 receptions
+            custom.id: Decimal('40.50'),      # + 2 more per passing TD, + 2.5 for receptions
+        }
+        for matchup in Matchup.objects.all():
+            self.assertEqual((matchup.home_score, matchup.away_score), (expected[matchup.id], Decimal('0.00')))
+            self.assertTrue(matchup.is_complete)
+        self.assertEqual(
+            set(FantasyTeam.objects.filter(name='Home').values_list('wins', 'points_for')),
+            {(1, score) for score in expected.values()},
+        )
+
+
+class DraftTests(TransactionTestCase):
+    """Concurrent picks run on real threads, so no wrapping transaction"""
+
+    def setUp(self):
+        User = get_user_model()
+        owners = [User.objects.create_user(f'owner{n}', email=f'owner{n}@example.com', password='pw') for n in range(3)]
+        league = League.objects.create(name='Draft league', commissioner=owners[0])
+        self.teams = [
+            FantasyTeam.objects.create(name=f'Team {n}', owner=owner, league=league).id
+            for n, owner in enumerate(owners)
+        ]
+        self.players = [
+            NFLPlayer.objects.create(name=f'{position} {n}', position=position, nfl_team='KC', average_points=20 - n).id
+            for n, position in enumerate(['QB', 'RB', 'WR', 'TE', 'RB', 'WR', 'QB', 'WR', 'RB'])
+        ]
+        self.draft = start_draft(Draft.objects.create(league=league, rounds=2), shuffle=False)
+
+    def tearDown(self):
+        forget(self.draft.pk)
+
+    def test_snake_order(self):
+        for _ in range(6):
+            state = get_state(self.draft.pk)
+            submit_pick(self.draft.pk, state.on_the_clock)
+        picks = list(DraftPick.objects.order_by('overall_pick').values_list('fantasy_team_id', flat=True))
+        a, b, c = self.teams
+        self.assertEqual(picks, [a, b, c, c, b, a])
+        self.draft.refresh_from_db()
+        self.assertEqual(self.draft.status, 'complete')
+
+    def test_concurrent_picks_on_one_slot_make_one_pick(self):
+        # Two processes' copies of the draft, both with the first team on the clock
+        states = [DraftState.load(self.draft.pk) for _ in range(2)]
+        barrier = threading.Barrier(2)
+        outcomes = []
+
+        def pick(state, player_id):
+            try:
+                barrier.wait()
+                _write_pick(state, self.teams[0], player_id, 'BN1', is_autopick=False)
+                outcomes.append('picked')
+            except DraftConflict:
+                outcomes.append('conflict')
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=pick, args=(state, player_id))
+            for state, player_id in zip(states, self.players)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(outcomes), ['conflict', 'picked'])
+        self.assertEqual(DraftPick.objects.count(), 1)
+        self.draft.refresh_from_db()
+        self.assertEqual(self.draft.current_pick, 2)
+
+    def test_stale_state_is_reloaded(self):
+        cached = get_state(self.draft.pk)
+        # Another process makes the first pick behind this one's back
+        other = DraftState.load(self.draft.pk)
+        _write_pick(other, self.teams[0], self.players[0], 'QB', is_autopick=False)
+        self.assertEqual(cached.draft.current_pick, 1)
+
+        pick = submit_pick(self.draft.pk, self.teams[1], self.players[1])
+        self.assertEqual((pick.overall_pick, pick.fantasy_team_id), (2, self.teams[1]))
+        self.assertEqual(get_state(self.draft.pk).draft.current_pick, 3)
+
+
+class FastJsonTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        owner = User.objects.create_user('owner', email='owner@example.com', password='pw')
+        rival = User.objects.create_user('rival', email='rival@example.com', password='pw')
+        league = League.objects.create(name='Ligue \u00e9t\u00e9 \u2028', commissioner=owner, scoring_rules={'sacks': 1.5})
+        home = FantasyTeam.objects.create(name='Home "quoted"', owner=owner, league=league, points_for='101.5')
+        away = FantasyTeam.objects.create(name='Away', owner=rival, league=league, division=2)
+        for week in (1, 2):
+            Matchup.objects.create(
+                league=league, week=week, home_team=home, away_team=away,
+                home_score='98.76', away_score=week, is_complete=week == 1,
+            )
+        NFLPlayer.objects.create(name='Zo\u00eb \u2029 Smith', position='WR', nfl_team='KC', average_points='12.3')
+        NFLPlayer.objects.create(
+            name='Al Back', position='RB', nfl_team='SF', bye_week=9, is_injured=True, injury_status='Questionable',
+        )
+
+    def assertSameBytes(self, serializer_class, queryset):
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        self.assertEqual(encoder_for(serializer_class).render(queryset), expected)
+
+    def test_players_match_serializer(self):
+        self.assertSameBytes(NFLPlayerSerializer, player_queryset({}))
+
+    def test_matchups_match_serializer(self):
+        self.assertSameBytes(MatchupSerializer, matchup_queryset({}))
+
+    def test_empty_list(self):
+        self.assertSameBytes(MatchupSerializer, Matchup.objects.none())
+
+
+class WaiverTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        owner = User.objects.create_user('owner', email='owner@example.com', password='pw')
+        self.league = League.objects.create(name='Waiver league', commissioner=owner)
+        self.teams = {}
+        for priority, name in enumerate(['first', 'second', 'third'], start=1):
+            user = User.objects.create_user(name, email=f'{name}@example.com', password='pw')
+            self.teams[name] = FantasyTeam.objects.create(
+                name=name, owner=user, league=self.league, waiver_priority=priority
+            )
+        self.star = NFLPlayer.objects.create(name='Star', position='RB', nfl_team='KC')
+        self.backup = NFLPlayer.objects.create(name='Backup', position='WR', nfl_team='KC')
+
+    def claim(self, team, player, rank=0):
+        return WaiverClaim.objects.create(
+            league=self.league, fantasy_team=self.teams[team], player=player, rank=rank
+        )
+
+    def status(self, claim):
+        claim.refresh_from_db()
+        return claim.status
+
+    def test_claims_are_awarded_in_priority_order(self):
+        second_star = self.claim('second', self.star)
+        second_backup = self.claim('second', self.backup, rank=1)
+        first_star = self.claim('first', self.star)
+        run = process_waivers(League.objects.all())
+
+        self.assertEqual((run.claims, run.won, run.lost, run.invalid), (3, 2, 1, 0))
+        self.assertEqual(
+            [self.status(claim) for claim in (first_star, second_star, second_backup)], ['won', 'lost', 'won']
+        )
+        self.assertEqual(
+            set(Roster.objects.values_list('fantasy_team__name', 'player__name')),
+            {('first', 'Star'), ('second', 'Backup')},
+        )
+        # Both winners moved behind the team that won nothing
+        priorities = dict(FantasyTeam.objects.values_list('name', 'waiver_priority'))
+        self.assertEqual(priorities, {'third': 1, 'first': 2, 'second': 3})
+
+    def test_claim_for_a_rostered_player_is_lost(self):
+        Roster.objects.create(fantasy_team=self.teams['third'], player=self.star, roster_position='RB1')
+        claim = self.claim('first', self.star)
+        process_waivers(League.objects.all())
+        self.assertEqual(self.status(claim), 'lost')
+        self.assertFalse(Roster.objects.filter(fantasy_team=self.teams['first']).exists())
+
+    def test_run_over_the_window_is_an_error(self):
+        self.claim('first', self.star)
+        with self.assertRaisesMessage(CommandError, 'over the 0s window'):
+            call_command('process_waivers', 2024, window=0, stdout=StringIO())
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.owner = User.objects.create_user('owner', email='owner@example.com', password='pw')
+        rival = User.objects.create_user('rival', email='rival@example.com', password='pw')
+        league = League.objects.create(name='Async league', commissioner=self.owner)
+        self.team = FantasyTeam.objects.create(name='Home', owner=self.owner, league=league)
+        away = FantasyTeam.objects.create(name='Away', owner=rival, league=league)
+        player = NFLPlayer.objects.create(name='Runner', position='RB', nfl_team='KC', average_points='9.5')
+        NFLPlayer.objects.create(name='Kicker', position='K', nfl_team='SF')
+        Roster.objects.create(fantasy_team=self.team, player=player, roster_position='RB1', is_starter=True)
+        Matchup.objects.create(league=league, week=1, home_team=self.team, away_team=away, home_score='12.5')
+        self.headers = {'Authorization': f"Bearer {tokens.issue_tokens(self.owner)['access']}"}
+
+    def body(self, response):
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return json.loads(content)
+
+    def test_async_endpoints_match_sync(self):
+        team = self.team.id
+        pairs = [
+            ('/api/leagues/', '/api/async/leagues/'),
+            ('/api/leagues/?compact=1', '/api/async/leagues/?compact=1'),
+            ('/api/players/', '/api/async/players/'),
+            ('/api/matchups/', '/api/async/matchups/'),
+            ('/api/matchups/?compact=1', '/api/async/matchups/?compact=1'),
+            (f'/api/teams/{team}/roster/', f'/api/async/teams/{team}/roster/'),
+            ('/api/auth/me/', '/api/async/auth/me/'),
+        ]
+        async_get = async_to_sync(AsyncClient().get)
+        for sync_url, async_url in pairs:
+            with self.subTest(url=async_url):
+                expected = self.body(self.client.get(sync_url, headers=self.headers))
+                self.assertEqual(self.body(async_get(async_url, headers=self.headers)), expected)
+
+    def test_bad_bearer_token_is_unauthorized(self):
+        async_get = async_to_sync(AsyncClient().get)
+        for url in ('/api/async/auth/me/', f'/api/async/teams/{self.team.id}/roster/'):
+            with self.subTest(url=url):
+                response = async_get(url, headers={'Authorization': 'Bearer not-a-token'})
+                self.assertEqual(response.status_code, 401)
+                self.assertEqual(response['WWW-Authenticate'], 'Bearer')
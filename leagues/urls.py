@@ -1,13 +1,25 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from . import views
+from . import async_views, live, snapshot, views
 
 router = DefaultRouter()
 router.register(r'leagues', views.LeagueViewSet)
 router.register(r'players', views.NFLPlayerViewSet)
 router.register(r'teams', views.FantasyTeamViewSet)
 router.register(r'matchups', views.MatchupViewSet)
+router.register(r'drafts', views.DraftViewSet)
+router.register(r'archive', views.ArchivedSeasonViewSet)
 
 urlpatterns = [
+    path('leagues/<int:league_id>/weeks/<int:week>/live/', live.score_stream, name='score-stream'),
+    path('perf/', views.performance, name='performance'),
+    # Before the router, which would take 'snapshot' for a player id
+    path('players/snapshot/', snapshot.snapshot_view, name='player-snapshot'),
+    # Async twins of the hot read endpoints for ASGI workers
+    path('async/leagues/', async_views.league_list, name='async-league-list'),
+    path('async/players/', async_views.player_list, name='async-player-list'),
+    path('async/matchups/', async_views.matchup_list, name='async-matchup-list'),
+    path('async/teams/<int:pk>/roster/', async_views.team_roster, name='async-team-roster'),
+    path('async/auth/me/', async_views.current_user, name='async-current-user'),
     path('', include(router.urls)),
 ]
@@ -1,17 +1,137 @@
-from rest_framework import viewsets, status
-from rest_framework.decorators import action
+from rest_framework import mixins, viewsets, status
+from rest_framework.exceptions import NotFound, PermissionDenied
+from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
-from .models import League, NFLPlayer, FantasyTeam, Roster, Matchup
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
+from .models import League, NFLPlayer, FantasyTeam, Roster, Matchup, PlayoffOdds, Draft, ArchivedSeason
 from .serializers import (
     LeagueSerializer, LeagueCreateSerializer, NFLPlayerSerializer,
-    FantasyTeamSerializer, RosterSerializer, MatchupSerializer
+    FantasyTeamSerializer, RosterSerializer, RosterPlayerIdSerializer, MatchupSerializer, StandingSerializer,
+    PlayoffOddsSerializer, WaiverClaimSerializer,
+    CompactLeagueSerializer, CompactFantasyTeamSerializer, CompactMatchupSerializer,
+    DraftSerializer, DraftPickSerializer, ArchivedSeasonSerializer, sideload_tables
 )
+from .archive import read_document
+from .availability import availability_index
+from .caching import CachedResponseMixin
+from .draft import DraftConflict, DraftError, start_draft, submit_pick
+from .fastjson import FastListMixin
+from .instrumentation import load_stats, summarize
+from .lineups import LineupError, optimize_team, set_lineup
+from .membership import AlreadyMember, LeagueFull, join_league
+from .pagination import ArchivePagination, LeaguePagination, MatchupPagination, PlayerPagination
+from .search import player_index
+from .standings import league_standings
 
 
-class LeagueViewSet(viewsets.ModelViewSet):
-    queryset = League.objects.filter(is_active=True)
+def league_queryset(params):
+    """Active leagues narrowed by the list endpoint's query parameters"""
+    queryset = League.objects.filter(is_active=True).with_related()
+
+    # Filter by public/private
+    is_public = params.get('is_public')
+    if is_public is not None:
+        queryset = queryset.filter(is_public=is_public.lower() == 'true')
+
+    # Filter by league type
+    league_type = params.get('league_type')
+    if league_type:
+        queryset = queryset.filter(league_type=league_type)
+
+    # Filter by available spots
+    has_spots = params.get('has_spots')
+    if has_spots and has_spots.lower() == 'true':
+        queryset = queryset.filter(open_spots__gt=0)
+
+    return queryset
+
+
+def player_queryset(params):
+    queryset = NFLPlayer.objects.filter(is_active=True)
+
+    position = params.get('position')
+    if position:
+        queryset = queryset.filter(position=position)
+
+    team = params.get('team')
+    if team:
+        queryset = queryset.filter(nfl_team=team)
+
+    return queryset
+
+
+def matchup_queryset(params):
+    queryset = Matchup.objects.with_related()
+
+    league_id = params.get('league')
+    if league_id:
+        queryset = queryset.filter(league_id=league_id)
+
+    week = params.get('week')
+    if week:
+        queryset = queryset.filter(week=week)
+
+    return queryset
+
+
+def player_ids_only(params):
+    return params.get('players') == 'ids'
+
+
+def roster_queryset(team_id, params):
+    """A team's roster, loading the players unless ``?players=ids`` asked for ids only"""
+    queryset = Roster.objects.filter(fantasy_team_id=team_id)
+    if player_ids_only(params):
+        return queryset
+    return queryset.select_related('player')
+
+
+def roster_serializer_class(params):
+    return RosterPlayerIdSerializer if player_ids_only(params) else RosterSerializer
+
+
+def is_compact(params):
+    return params.get('compact', '').lower() in ('1', 'true')
+
+
+def compact_payload(serializer_class, objects, sideload_argument, paginator=None):
+    serializer = serializer_class(objects, many=True)
+    tables = sideload_tables(**{sideload_argument: objects})
+    # The listed objects themselves are already in the results
+    tables.pop(sideload_argument, None)
+    if paginator is None:
+        return {'results': serializer.data, **tables}
+    return {**paginator.get_paginated_data(serializer.data), **tables}
+
+
+class CompactListMixin:
+    """List in compact form when the request asks for ?compact=true.
+
+    Related objects are referenced by id and side-loaded once each in lookup
+    tables next to the results, instead of being nested in every row.
+    """
+    compact_serializer_class = None
+    sideload_argument = None
+
+    def is_compact(self):
+        return is_compact(self.request.query_params)
+
+    def list(self, request, *args, **kwargs):
+        if not self.is_compact():
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        objects = list(queryset) if self.paginator is None else self.paginate_queryset(queryset)
+        return Response(compact_payload(
+            self.compact_serializer_class, objects, self.sideload_argument, self.paginator
+        ))
+
+
+class LeagueViewSet(CompactListMixin, viewsets.ModelViewSet):
+    queryset = League.objects.filter(is_active=True).with_team_counts()
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = LeaguePagination
+    compact_serializer_class = CompactLeagueSerializer
+    sideload_argument = 'leagues'
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -19,24 +139,7 @@ class LeagueViewSet(viewsets.ModelViewSet):
         return LeagueSerializer
 
     def get_queryset(self):
-        queryset = League.objects.filter(is_active=True)
-
-        # Filter by public/private
-        is_public = self.request.query_params.get('is_public')
-        if is_public is not None:
-            queryset = queryset.filter(is_public=is_public.lower() == 'true')
-
-        # Filter by league type
-        league_type = self.request.query_params.get('league_type')
-        if league_type:
-            queryset = queryset.filter(league_type=league_type)
-
-        # Filter by available spots
-        has_spots = self.request.query_params.get('has_spots')
-        if has_spots and has_spots.lower() == 'true':
-            queryset = [l for l in queryset if l.spots_available > 0]
-
-        return queryset
+        return league_queryset(self.request.query_params)
 
     def perform_create(self, serializer):
         serializer.save(commissioner=self.request.user)
@@ -44,84 +147,269 @@ class LeagueViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
     def join(self, request, pk=None):
         league = self.get_object()
-
-        # Check if already a member
-        if FantasyTeam.objects.filter(league=league, owner=request.user).exists():
+        team_name = request.data.get('team_name', f"{request.user.username}'s Team")
+        try:
+            team = join_league(league, request.user, team_name)
+        except AlreadyMember:
             return Response(
                 {'error': 'You are already a member of this league'},
                 status=status.HTTP_400_BAD_REQUEST
             )
-
-        # Check if league has spots
-        if league.spots_available <= 0:
+        except LeagueFull:
             return Response(
                 {'error': 'This league is full'},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Create team for user
-        team_name = request.data.get('team_name', f"{request.user.username}'s Team")
-        team = FantasyTeam.objects.create(
-            name=team_name,
-            owner=request.user,
-            league=league
-        )
-
         return Response({
             'message': f'Successfully joined {league.name}',
             'team': FantasyTeamSerializer(team).data
         }, status=status.HTTP_201_CREATED)
 
+    @action(detail=True, methods=['get'])
+    def standings(self, request, pk=None):
+        league = self.get_object()
+        serializer = StandingSerializer(league_standings(league), many=True)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['get'], url_path='available-players')
+    def available_players(self, request, pk=None):
+        """Unrostered players by average points, filtered like /api/players/"""
+        try:
+            league_id = int(pk)
+        except ValueError:
+            raise NotFound()
+        version = League.objects.filter(pk=league_id, is_active=True).values_list(
+            'roster_version', flat=True
+        ).first()
+        if version is None:
+            raise NotFound()
+        try:
+            limit = min(int(request.query_params.get('limit', 50)), 200)
+        except ValueError:
+            limit = 50
+        player_ids = availability_index.available(
+            league_id, version,
+            position=request.query_params.get('position'),
+            nfl_team=request.query_params.get('team'),
+            limit=limit,
+        )
+        players = NFLPlayer.objects.in_bulk(player_ids)
+        ordered = [players[player_id] for player_id in player_ids if player_id in players]
+        return Response(NFLPlayerSerializer(ordered, many=True).data)
+
+    @action(detail=True, methods=['get'], url_path='playoff-odds')
+    def playoff_odds(self, request, pk=None):
+        """Stored odds from the nightly simulation; empty until it has run"""
+        league = self.get_object()
+        odds = PlayoffOdds.objects.filter(fantasy_team__league=league).select_related(
+            'fantasy_team__owner'
+        ).order_by('-playoffs', '-championship')
+        return Response(PlayoffOddsSerializer(odds, many=True).data)
+
+    @action(detail=True, methods=['get'])
+    def history(self, request, pk=None):
+        """Archived past seasons of this league, newest first"""
+        league = self.get_object()
+        archives = league.archived_seasons.defer('document').order_by('-season_year', '-id')
+        return Response(ArchivedSeasonSerializer(archives, many=True).data)
 
-class NFLPlayerViewSet(viewsets.ReadOnlyModelViewSet):
+
+class NFLPlayerViewSet(CachedResponseMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = NFLPlayer.objects.filter(is_active=True)
     serializer_class = NFLPlayerSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = PlayerPagination
+    cache_resource = 'players'
 
     def get_queryset(self):
-        queryset = NFLPlayer.objects.filter(is_active=True)
-
-        position = self.request.query_params.get('position')
-        if position:
-            queryset = queryset.filter(position=position)
-
-        team = self.request.query_params.get('team')
-        if team:
-            queryset = queryset.filter(nfl_team=team)
+        return player_queryset(self.request.query_params)
 
-        return queryset
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        """Autocomplete over player names, served from the in-process index"""
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(int(request.query_params.get('limit', 10)), 50)
+        except ValueError:
+            limit = 10
+        position = request.query_params.get('position') or None
+        return Response(player_index.search(query, limit=limit, position=position))
 
 
-class FantasyTeamViewSet(viewsets.ModelViewSet):
+class FantasyTeamViewSet(CompactListMixin, viewsets.ModelViewSet):
     queryset = FantasyTeam.objects.all()
     serializer_class = FantasyTeamSerializer
     permission_classes = [IsAuthenticated]
+    compact_serializer_class = CompactFantasyTeamSerializer
+    sideload_argument = 'teams'
 
     def get_queryset(self):
-        return FantasyTeam.objects.filter(owner=self.request.user)
+        return FantasyTeam.objects.filter(owner=self.request.user).with_related()
 
     @action(detail=True, methods=['get'])
     def roster(self, request, pk=None):
         team = self.get_object()
-        roster = Roster.objects.filter(fantasy_team=team)
-        serializer = RosterSerializer(roster, many=True)
-        return Response(serializer.data)
+        params = request.query_params
+        roster = roster_queryset(team.id, params)
+        return Response(roster_serializer_class(params)(roster, many=True).data)
 
+    @action(detail=True, methods=['get', 'post'])
+    def waivers(self, request, pk=None):
+        """List the team's waiver claims, or file a new one"""
+        team = self.get_object()
+        if request.method == 'GET':
+            claims = team.waiver_claims.order_by('-created_at')[:50]
+            return Response(WaiverClaimSerializer(claims, many=True).data)
+        serializer = WaiverClaimSerializer(data=request.data, context={'team': team})
+        serializer.is_valid(raise_exception=True)
+        serializer.save(fantasy_team=team, league_id=team.league_id)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-class MatchupViewSet(viewsets.ReadOnlyModelViewSet):
+    @action(detail=True, methods=['post'], url_path='optimize-lineup')
+    def optimize_lineup(self, request, pk=None):
+        """Start the highest-projected legal lineup for ``week``"""
+        team = self.get_object()
+        try:
+            week = int(request.data.get('week'))
+        except (TypeError, ValueError):
+            return Response({'error': 'week is required'}, status=status.HTTP_400_BAD_REQUEST)
+        optimize_team(team, week)
+        params = request.query_params
+        roster = roster_queryset(team.id, params)
+        return Response(roster_serializer_class(params)(roster, many=True).data)
+
+    @action(detail=True, methods=['put'])
+    def lineup(self, request, pk=None):
+        """Set the whole lineup for ``week`` from a ``lineup`` map of slot to player id"""
+        team = self.get_object()
+        try:
+            week = int(request.data.get('week'))
+        except (TypeError, ValueError):
+            return Response({'error': 'week is required'}, status=status.HTTP_400_BAD_REQUEST)
+        lineup = request.data.get('lineup')
+        if not isinstance(lineup, dict):
+            return Response(
+                {'error': 'lineup must map roster slots to player ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            set_lineup(team, week, lineup)
+        except LineupError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        params = request.query_params
+        roster = roster_queryset(team.id, params)
+        return Response(roster_serializer_class(params)(roster, many=True).data)
+
+
+class MatchupViewSet(CachedResponseMixin, CompactListMixin, FastListMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Matchup.objects.all()
     serializer_class = MatchupSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = MatchupPagination
+    compact_serializer_class = CompactMatchupSerializer
+    sideload_argument = 'matchups'
+    cache_resource = 'matchups'
+    # Team records and league details are nested in every matchup
+    cache_version_fields = ('home_team__updated_at', 'away_team__updated_at', 'league__updated_at')
 
     def get_queryset(self):
-        queryset = Matchup.objects.all()
+        return matchup_queryset(self.request.query_params)
+
 
-        league_id = self.request.query_params.get('league')
+class DraftViewSet(mixins.CreateModelMixin, viewsets.ReadOnlyModelViewSet):
+    queryset = Draft.objects.all()
+    serializer_class = DraftSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def perform_create(self, serializer):
+        if serializer.validated_data['league'].commissioner_id != self.request.user.id:
+            raise PermissionDenied('Only the commissioner can set up the draft')
+        serializer.save()
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def start(self, request, pk=None):
+        draft = self.get_object()
+        if draft.league.commissioner_id != request.user.id:
+            raise PermissionDenied('Only the commissioner can start the draft')
+        try:
+            start_draft(draft)
+        except DraftError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(DraftSerializer(draft).data)
+
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def pick(self, request, pk=None):
+        """Pick ``player_id`` for the caller's team, or autopick when omitted"""
+        team = FantasyTeam.objects.filter(league__draft=pk, owner=request.user).first()
+        if team is None:
+            raise PermissionDenied('You do not have a team in this draft')
+        player_id = request.data.get('player_id')
+        try:
+            pick = submit_pick(int(pk), team.id, int(player_id) if player_id is not None else None)
+        except DraftConflict as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_409_CONFLICT)
+        except DraftError as exc:
+            return Response({'error': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except (Draft.DoesNotExist, ValueError):
+            return Response({'error': 'Invalid draft or player'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(DraftPickSerializer(pick).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def picks(self, request, pk=None):
+        draft = self.get_object()
+        return Response(DraftPickSerializer(draft.picks.all(), many=True).data)
+
+
+class ArchivedSeasonViewSet(viewsets.ReadOnlyModelViewSet):
+    """Seasons moved out of the live tables by ``rollover_season``"""
+    queryset = ArchivedSeason.objects.all()
+    serializer_class = ArchivedSeasonSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = ArchivePagination
+
+    def get_queryset(self):
+        queryset = ArchivedSeason.objects.all()
+        # Only the standings and matchups actions read the document
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.defer('document')
+        params = self.request.query_params
+
+        season = params.get('season')
+        if season:
+            queryset = queryset.filter(season_year=season)
+
+        league_type = params.get('league_type')
+        if league_type:
+            queryset = queryset.filter(league_type=league_type)
+
+        # The league's id while it was live
+        league_id = params.get('league')
         if league_id:
             queryset = queryset.filter(league_id=league_id)
 
-        week = self.request.query_params.get('week')
-        if week:
-            queryset = queryset.filter(week=week)
+        # The live league a season led to
+        successor = params.get('successor')
+        if successor:
+            queryset = queryset.filter(successor_id=successor)
 
         return queryset
+
+    @action(detail=True, methods=['get'])
+    def standings(self, request, pk=None):
+        return Response(read_document(self.get_object())['standings'])
+
+    @action(detail=True, methods=['get'])
+    def matchups(self, request, pk=None):
+        matchups = read_document(self.get_object())['matchups']
+        week = request.query_params.get('week')
+        if week:
+            matchups = [matchup for matchup in matchups if str(matchup['week']) == week]
+        return Response(matchups)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def performance(request):
+    """Per-view timing histograms from the sampled requests of every worker"""
+    return Response({'views': summarize(load_stats())})
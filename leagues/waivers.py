@@ -0,0 +1,202 @@
+"""
+Waiver wire processing.
+
+Claims collect during the week as pending ``WaiverClaim`` rows and are
+processed league by league, each league in one transaction:
+
+1. Lock the league's teams (the time spent waiting here is reported as lock
+   wait) and its pending claims, then load rosters in one query.
+2. Award claims in memory: the team with the best waiver priority gets its
+   highest-ranked claim that is still valid, drops to the back of the order,
+   and the loop starts again from the top until nobody can win anything.
+   Claims for a player someone else took are lost; claims whose drop player
+   has left the roster, or that would overfill it, are invalid.
+3. Write the result set-based: one DELETE for dropped players, one INSERT for
+   added ones, one UPDATE per claim outcome and one upsert for the new waiver
+   order.
+
+Lock wait runs until the team rows are locked. SQLite has no row locks, so
+there it is the wait for ``writer_lock``, which only covers writers in this
+process.
+"""
+import time
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.utils import timezone
+
+from .availability import rosters_changed
+from .bulk import bulk_write, writer_lock
+from .models import FantasyTeam, Roster, WaiverClaim
+
+# Slots a claimed player may land in, bench first
+OPEN_SLOTS = Roster.BENCH_SLOTS + Roster.STARTING_SLOTS
+
+
+@dataclass
+class WaiverRun:
+    leagues: int = 0
+    claims: int = 0
+    won: int = 0
+    lost: int = 0
+    invalid: int = 0
+    elapsed: float = 0.0
+    lock_wait: float = 0.0
+    max_lock_wait: float = 0.0
+    lock_waits: list = field(default_factory=list, repr=False)
+
+    @property
+    def claims_per_second(self):
+        return self.claims / self.elapsed if self.elapsed else 0.0
+
+
+def waiver_order(teams):
+    """Teams in claim order: set priority first, then worst record first"""
+    return sorted(teams, key=lambda team: (
+        team.waiver_priority is None,
+        team.waiver_priority or 0,
+        team.wins,
+        team.points_for,
+        team.id,
+    ))
+
+
+def _open_slot(occupied, position):
+    for slot in OPEN_SLOTS:
+        if slot not in occupied and position in Roster.SLOT_ELIGIBILITY[slot]:
+            return slot
+    return None
+
+
+def award_claims(order, claims, rosters, rostered):
+    """Decide every claim of one league in memory.
+
+    ``order`` is team ids in waiver order, ``claims`` pending claims in each
+    team's preference order, ``rosters`` maps team id to ``{player_id:
+    Roster}`` and ``rostered`` is every player id on a roster in the league.
+    ``rosters`` and ``rostered`` are updated in place, new rows being unsaved
+    Roster instances. Returns ``(won, lost, invalid, order)`` with the new
+    waiver order.
+    """
+    queues = {team_id: [] for team_id in order}
+    for claim in claims:
+        queues.setdefault(claim.fantasy_team_id, []).append(claim)
+
+    won, lost, invalid = [], [], []
+    order = list(order)
+    while True:
+        for team_id in order:
+            queue = queues.get(team_id)
+            roster = rosters.setdefault(team_id, {})
+            while queue:
+                claim = queue.pop(0)
+                if claim.player_id in rostered:
+                    lost.append(claim)
+                    continue
+                occupied = {row.roster_position for row in roster.values() if row.roster_position != 'IR'}
+                if claim.drop_player_id is not None:
+                    dropped = roster.get(claim.drop_player_id)
+                    if dropped is None:
+                        invalid.append(claim)
+                        continue
+                    occupied.discard(dropped.roster_position)
+                slot = _open_slot(occupied, claim.player.position)
+                if slot is None:
+                    invalid.append(claim)
+                    continue
+                if claim.drop_player_id is not None:
+                    rostered.discard(claim.drop_player_id)
+                    del roster[claim.drop_player_id]
+                roster[claim.player_id] = Roster(
+                    fantasy_team_id=team_id, player_id=claim.player_id, roster_position=slot
+                )
+                rostered.add(claim.player_id)
+                won.append(claim)
+                break
+            else:
+                continue
+            # A successful claim sends the team to the back of the line
+            order.remove(team_id)
+            order.append(team_id)
+            break
+        else:
+            # Whatever is left belongs to teams no longer in the league
+            invalid += [claim for queue in queues.values() for claim in queue]
+            return won, lost, invalid, order
+
+
+def process_league(league_id, run):
+    """Process one league's pending claims in a single transaction"""
+    now = timezone.now()
+    started = time.perf_counter()
+    with writer_lock(), transaction.atomic():
+        teams = list(FantasyTeam.objects.select_for_update().filter(league_id=league_id))
+        wait = time.perf_counter() - started
+        run.lock_wait += wait
+        run.max_lock_wait = max(run.max_lock_wait, wait)
+        run.lock_waits.append(wait)
+
+        claims = list(
+            WaiverClaim.objects.select_for_update(of=('self',))
+            .filter(league_id=league_id, status='pending')
+            .select_related('player')
+            .order_by('rank', 'created_at', 'id')
+        )
+        run.leagues += 1
+        if not claims:
+            return
+
+        rosters = {}
+        rostered = set()
+        for row in Roster.objects.filter(fantasy_team__league_id=league_id).only(
+            'id', 'fantasy_team_id', 'player_id', 'roster_position'
+        ):
+            rosters.setdefault(row.fantasy_team_id, {})[row.player_id] = row
+            rostered.add(row.player_id)
+        before = {row.id for roster in rosters.values() for row in roster.values()}
+
+        order = [team.id for team in waiver_order(teams)]
+        won, lost, invalid, order = award_claims(order, claims, rosters, rostered)
+
+        # Net roster changes; a player added and dropped again in the same
+        # run never reaches the database
+        after = [row for roster in rosters.values() for row in roster.values()]
+        kept = {row.id for row in after if row.id is not None}
+        if before - kept:
+            Roster.objects.filter(id__in=before - kept).delete()
+        added = [row for row in after if row.id is None]
+        for row in added:
+            row.is_starter = row.roster_position in Roster.STARTING_SLOTS
+        Roster.objects.bulk_create(added)
+        rosters_changed([league_id])
+
+        for status, decided in [('won', won), ('lost', lost), ('invalid', invalid)]:
+            if decided:
+                WaiverClaim.objects.filter(id__in=[claim.id for claim in decided]).update(
+                    status=status, processed_at=now
+                )
+
+        by_id = {team.id: team for team in teams}
+        for priority, team_id in enumerate(order, start=1):
+            by_id[team_id].waiver_priority = priority
+            by_id[team_id].updated_at = now
+        bulk_write(FantasyTeam, teams, ['waiver_priority', 'updated_at'])
+
+    run.claims += len(claims)
+    run.won += len(won)
+    run.lost += len(lost)
+    run.invalid += len(invalid)
+
+
+def process_waivers(leagues):
+    """Process pending claims for a queryset of leagues, one transaction each"""
+    run = WaiverRun()
+    league_ids = (
+        WaiverClaim.objects.filter(league__in=leagues, status='pending')
+        .order_by('league_id').values_list('league_id', flat=True).distinct()
+    )
+    started = time.perf_counter()
+    for league_id in list(league_ids):
+        process_league(league_id, run)
+    run.elapsed = time.perf_counter() - started
+    return run
@@ -6,7 +6,9 @@ import sys
 
 def main():
     """Run administrative tasks."""
-    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'gridiron.settings')
+    # The test suite has its own databases; see gridiron.test_settings
+    settings = 'gridiron.test_settings' if sys.argv[1:2] == ['test'] else 'gridiron.settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings)
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc: